@@ -15,6 +15,8 @@ TensorFlow GraphDef         | `pb`                          | yolov5s.pb
 TensorFlow Lite             | `tflite`                      | yolov5s.tflite
 TensorFlow Edge TPU         | `edgetpu`                     | yolov5s_edgetpu.tflite
 TensorFlow.js               | `tfjs`                        | yolov5s_web_model/
+PaddlePaddle                | `paddle`                      | yolov5s_paddle_model/
+Safetensors                 | `safetensors`                 | yolov5s.safetensors
 
 Requirements:
     $ pip install -r requirements.txt coremltools onnx onnx-simplifier onnxruntime openvino-dev tensorflow-cpu  # CPU
@@ -23,15 +25,25 @@ Requirements:
 
 Usage:
     $ python benchmarks.py --weights yolov5s.pt --img 640
+    $ python benchmarks.py --weights yolov5s.pt --img 640 --nms  # add ONNX with NMS in the graph
+    $ python benchmarks.py --weights yolov5s.pt --img 640 --device cpu --int8 --pt-only  # INT8 vs FP32
+    $ python benchmarks.py --weights yolov5s.pt --img 640 --device cpu --cpu-modes --pt-only  # channels-last, BF16
+    $ python benchmarks.py --weights yolov5s.onnx --img 640 --ort-sweep  # best ONNX Runtime options for this host
+    $ python benchmarks.py --weights yolov5s.torchscript --img 640 --startup  # time-to-first-detection with caching
+    $ python benchmarks.py --import-time --hard-fail  # import time of the inference entry points, fails over budget
 """
 
 import argparse
+import os
 import platform
 import sys
 import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import psutil
+import torch
 
 FILE = Path(__file__).resolve()
 ROOT = FILE.parents[0]  # YOLOv5 root directory
@@ -40,6 +52,7 @@ if str(ROOT) not in sys.path:
 # ROOT = ROOT.relative_to(Path.cwd())  # relative
 
 import export
+from models.common import ORT_OPTIONS, DetectMultiBackend
 from models.experimental import attempt_load
 from models.yolo import SegmentationModel
 from segment.val import run as val_seg
@@ -49,6 +62,23 @@ from utils.torch_utils import select_device
 from val import run as val_det
 
 
+def benchmark(y, name, fn, hard_fail=False):
+    """
+    Appends the benchmark row of format `name` to `y`, [name, size (MB), mAP50-95, inference ms, NMS ms].
+
+    `fn()` exports and validates a model, returning its (weights, mAP50-95, (inference, NMS) times). On failure the row
+    is empty, and with `hard_fail` errors other than AssertionError, i.e. format not supported, are raised.
+    """
+    try:
+        w, metric, speed = fn()
+        y.append([name, round(file_size(w), 1), round(metric, 4), *(round(x, 2) for x in speed)])  # MB, mAP, t
+    except Exception as e:
+        if hard_fail:
+            assert type(e) is AssertionError, f"Benchmark --hard-fail for {name}: {e}"
+        LOGGER.warning(f"WARNING ⚠️ Benchmark failure for {name}: {e}")
+        y.append([name, None, None, None, None])  # mAP, t_inference, t_nms
+
+
 def run(
     weights=ROOT / "yolov5s.pt",  # weights path
     imgsz=640,  # inference size (pixels)
@@ -59,6 +89,9 @@ def run(
     test=False,  # test exports only
     pt_only=False,  # test PyTorch only
     hard_fail=False,  # throw error on benchmark failure
+    nms=False,  # also benchmark ONNX with NMS in the graph
+    int8=False,  # also benchmark CPU INT8 TorchScript and ONNX
+    cpu_modes=False,  # also benchmark PyTorch with channels-last memory format and bfloat16 autocast
 ):
     """
     Run YOLOv5 benchmarks on multiple export formats and log results for model performance evaluation.
@@ -73,9 +106,15 @@ def run(
         test (bool): Test export formats only (default: False).
         pt_only (bool): Test PyTorch format only (default: False).
         hard_fail (bool): Throw an error on benchmark failure if True (default: False).
+        nms (bool): Also benchmark an ONNX model exported with `--nms`, next to ONNX with Python NMS (default: False).
+        int8 (bool): Also benchmark TorchScript models quantized to INT8, static calibrated on `data` and dynamic, and
+            static INT8 ONNX models, next to their FP32 models, CPU only (default: False).
+        cpu_modes (bool): Also benchmark PyTorch with channels-last memory format, bfloat16 autocast and both
+            (default: False).
 
     Returns:
-        None. Logs information about the benchmark results, including the format, size, mAP50-95, and inference time.
+        None. Logs information about the benchmark results, including the format, size, mAP50-95, inference and NMS
+            time.
 
     Notes:
         Supported export formats and models include PyTorch, TorchScript, ONNX, OpenVINO, TensorRT, CoreML,
@@ -99,46 +138,76 @@ def run(
     y, t = [], time.time()
     device = select_device(device)
     model_type = type(attempt_load(weights, fuse=False))  # DetectionModel, SegmentationModel, etc.
+    seg = model_type == SegmentationModel
+
+    def export_val(f, val_kwargs=None, **kwargs):
+        """Exports `weights` to format `f` with export.run() `kwargs`, '-' for PyTorch, and validates it with val.py
+        `val_kwargs`, returning its (weights, mAP50-95, (inference, NMS) times).
+        """
+        w = weights
+        if f != "-":
+            kw = {"weights": weights, "imgsz": [imgsz], "include": [f], "batch_size": batch_size, "device": device}
+            w = export.run(**{**kw, "half": half, **kwargs})[-1]
+        kwargs = {"plots": False, "device": device, "task": "speed", "half": half, **(val_kwargs or {})}
+        result = (val_seg if seg else val_det)(data, w, batch_size, imgsz, **kwargs)
+        return w, result[0][7 if seg else 3], result[2][1:]  # box(p, r, map50, map), mask(...) for segmentation
+
     for i, (name, f, suffix, cpu, gpu) in export.export_formats().iterrows():  # index, (name, file, suffix, CPU, GPU)
-        try:
+
+        def export_format():
+            """Exports and validates format `f`."""
             assert i not in (9, 10), "inference not supported"  # Edge TPU and TF.js are unsupported
             assert i != 5 or platform.system() == "Darwin", "inference only supported on macOS>=10.13"  # CoreML
             if "cpu" in device.type:
                 assert cpu, "inference not supported on CPU"
             if "cuda" in device.type:
                 assert gpu, "inference not supported on GPU"
-
-            # Export
-            if f == "-":
-                w = weights  # PyTorch format
-            else:
-                w = export.run(
-                    weights=weights, imgsz=[imgsz], include=[f], batch_size=batch_size, device=device, half=half
-                )[-1]  # all others
+            w, metric, speed = export_val(f)
             assert suffix in str(w), "export failed"
+            return w, metric, speed
+
+        benchmark(y, name, export_format, hard_fail)
+        if nms and i == 2:  # ONNX end-to-end, NMS time is only the conf filter on the fixed-size output
+
+            def export_nms():
+                """Exports and validates ONNX with NMS in the graph at val.py thresholds."""
+                assert not seg, "NMS export only supported for detection models"
+                return export_val(f, nms=True, topk_all=300, iou_thres=0.6, conf_thres=0.001)  # val.py defaults
+
+            benchmark(y, f"{name} NMS", export_nms, hard_fail)
+        if cpu_modes and i == 0:  # PyTorch channels-last and bfloat16 autocast
+            for memory_format, autocast in ("channels_last", None), (None, "bfloat16"), ("channels_last", "bfloat16"):
+
+                def val_mode():
+                    """Validates PyTorch with `memory_format` and `autocast`."""
+                    assert not seg, "CPU modes only benchmarked for detection models"
+                    return export_val(f, {"memory_format": memory_format, "autocast": autocast})
 
-            # Validate
-            if model_type == SegmentationModel:
-                result = val_seg(data, w, batch_size, imgsz, plots=False, device=device, task="speed", half=half)
-                metric = result[0][7]  # (box(p, r, map50, map), mask(p, r, map50, map), *loss(box, obj, cls))
-            else:  # DetectionModel:
-                result = val_det(data, w, batch_size, imgsz, plots=False, device=device, task="speed", half=half)
-                metric = result[0][3]  # (p, r, map50, map, *loss(box, obj, cls))
-            speed = result[2][1]  # times (preprocess, inference, postprocess)
-            y.append([name, round(file_size(w), 1), round(metric, 4), round(speed, 2)])  # MB, mAP, t_inference
-        except Exception as e:
-            if hard_fail:
-                assert type(e) is AssertionError, f"Benchmark --hard-fail for {name}: {e}"
-            LOGGER.warning(f"WARNING ⚠️ Benchmark failure for {name}: {e}")
-            y.append([name, None, None, None])  # mAP, t_inference
-        if pt_only and i == 0:
-            break  # break after PyTorch
+                benchmark(y, " ".join(x for x in ("PyTorch", memory_format, autocast) if x), val_mode, hard_fail)
+        if int8 and i in (1, 2):  # TorchScript INT8 static and dynamic, ONNX INT8 static
+            for mode in ("static", "dynamic") if i == 1 else ("static",):
+
+                def export_int8():
+                    """Exports and validates an INT8 model quantized with `mode`."""
+                    assert not seg, "INT8 export only supported for detection models"
+                    assert device.type == "cpu", "INT8 inference only supported on CPU"
+                    w, metric, speed = export_val(f, data=data, int8_mode=mode)
+                    assert mode == "dynamic" or "-dynamic" not in Path(w).name, "static quantization failed"
+                    return w, metric, speed
+
+                benchmark(y, f"{'TorchScript' if i == 1 else 'ONNX'} INT8 {mode}", export_int8, hard_fail)
+        if pt_only and i == (2 if int8 else 0):
+            break  # break after PyTorch, or after TorchScript, ONNX and their INT8 variants with --int8
 
     # Print results
     LOGGER.info("\n")
     parse_opt()
     notebook_init()  # print system info
-    c = ["Format", "Size (MB)", "mAP50-95", "Inference time (ms)"] if map else ["Format", "Export", "", ""]
+    c = (
+        ["Format", "Size (MB)", "mAP50-95", "Inference time (ms)", "NMS time (ms)"]
+        if map
+        else ["Format", "Export", "", "", ""]
+    )
     py = pd.DataFrame(y, columns=c)
     LOGGER.info(f"\nBenchmarks complete ({time.time() - t:.2f}s)")
     LOGGER.info(str(py if map else py.iloc[:, :2]))
@@ -159,6 +228,9 @@ def test(
     test=False,  # test exports only
     pt_only=False,  # test PyTorch only
     hard_fail=False,  # throw error on benchmark failure
+    nms=False,  # also test ONNX export with NMS in the graph
+    int8=False,  # unused, INT8 models are only benchmarked by run()
+    cpu_modes=False,  # unused, CPU modes are only benchmarked by run()
 ):
     """
     Run YOLOv5 export tests for all supported formats and log the results, including export statuses.
@@ -173,6 +245,9 @@ def test(
         test (bool): Test export formats only without running inference. Default is False.
         pt_only (bool): Test only the PyTorch model if True. Default is False.
         hard_fail (bool): Raise error on export or test failure if True. Default is False.
+        nms (bool): Also test ONNX export with NMS in the graph if True. Default is False.
+        int8 (bool): Unused, accepted for command-line compatibility with run(). Default is False.
+        cpu_modes (bool): Unused, accepted for command-line compatibility with run(). Default is False.
 
     Returns:
         pd.DataFrame: DataFrame containing the results of the export tests, including format names and export statuses.
@@ -207,6 +282,13 @@ def test(
             y.append([name, True])
         except Exception:
             y.append([name, False])  # mAP, t_inference
+        if nms and i == 2:  # ONNX end-to-end
+            try:
+                w = export.run(weights=weights, imgsz=[imgsz], include=[f], device=device, half=half, nms=True)[-1]
+                assert suffix in str(w), "export failed"
+                y.append([f"{name} NMS", True])
+            except Exception:
+                y.append([f"{name} NMS", False])
 
     # Print results
     LOGGER.info("\n")
@@ -218,6 +300,189 @@ def test(
     return py
 
 
+def ort_sweep(
+    weights=ROOT / "yolov5s.pt",  # weights path, exported to ONNX unless *.onnx
+    imgsz=640,  # inference size (pixels)
+    batch_size=1,  # batch size
+    device="cpu",  # cuda device, i.e. 0 or cpu
+    n=50,  # timed inferences per setting
+):
+    """
+    Sweeps ONNX Runtime session options on this host and logs the fastest as --ort arguments for detect.py and val.py.
+
+    Options are tuned one at a time in ORT_OPTIONS order, each keeping the fastest value found so far for the others
+    (coordinate descent), which takes a handful of sessions instead of the full grid. Latency is the median of `n`
+    inferences after warmup.
+
+    Args:
+        weights (Path | str): Path to *.onnx weights, or *.pt weights to export to ONNX first.
+        imgsz (int): Inference size in pixels (default: 640).
+        batch_size (int): Batch size (default: 1).
+        device (str): Device, 'cpu' or a CUDA device such as '0' (default: 'cpu').
+        n (int): Timed inferences per setting (default: 50).
+
+    Returns:
+        (dict): Best ONNX Runtime options.
+    """
+    device = select_device(device)
+    w = str(weights)
+    if not w.endswith(".onnx"):
+        w = export.run(weights=weights, imgsz=[imgsz], include=["onnx"], batch_size=batch_size, device=device)[-1]
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    grid = {
+        "threads": sorted({1, max(cores // 2, 1), cores}),
+        "parallel": [False, True],
+        "opt": ["basic", "extended", "all"],
+        "arena": [True, False],
+        "io_binding": [False, True],
+    }
+    im = torch.rand(batch_size, 3, imgsz, imgsz, device=device)
+    best, y = {}, []
+    for k, values in grid.items():
+        t = []
+        for v in values:
+            model = DetectMultiBackend(w, device=device, ort={**best, k: v})
+            for _ in range(3):
+                model(im)  # warmup
+            dt = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                model(im)
+                dt.append(time.perf_counter() - t0)
+            t.append(np.median(dt) * 1e3)
+            y.append([k, v, round(t[-1], 2)])
+        best[k] = values[int(np.argmin(t))]
+
+    LOGGER.info(f"\n{pd.DataFrame(y, columns=['Option', 'Value', 'Inference time (ms)'])}")
+    args = " ".join(f"{k}={int(v) if isinstance(v, bool) else v}" for k, v in best.items() if v != ORT_OPTIONS[k])
+    LOGGER.info(f"Best ONNX Runtime options for {w} on this host: --ort {args or '(defaults)'}")
+    return best
+
+
+STARTUP = """
+import json, sys, time
+t = time.perf_counter()
+import torch
+from models.common import DetectMultiBackend
+from utils.torch_utils import select_device
+w, imgsz, device, cache = sys.argv[1], int(sys.argv[2]), select_device(sys.argv[3]), sys.argv[4] or None
+t1 = time.perf_counter()
+model = DetectMultiBackend(w, device=device, compile_cache=cache)
+t2 = time.perf_counter()
+model(torch.rand(1, 3, imgsz, imgsz, device=device))
+t3 = time.perf_counter()
+print(json.dumps([t1 - t, t2 - t1, t3 - t2]))
+"""  # time-to-first-detection child process, imports, model load and first inference seconds
+
+
+def startup(
+    weights=ROOT / "yolov5s.pt",  # weights path, exported to TorchScript unless *.torchscript or *_openvino_model
+    imgsz=640,  # inference size (pixels)
+    device="cpu",  # cuda device, i.e. 0 or cpu
+    n=3,  # process starts per setting
+):
+    """
+    Benchmarks time-to-first-detection of fresh processes without and with a compiled model cache (--compile-cache).
+
+    Each start runs in a new Python process, so nothing is shared between starts but the cache directory. The cold cache
+    start populates a temporary cache, the warm starts load from it. Times are medians of `n` starts.
+
+    Args:
+        weights (Path | str): Path to *.torchscript or *_openvino_model weights, or *.pt weights to export first.
+        imgsz (int): Inference size in pixels (default: 640).
+        device (str): Device, 'cpu' or a CUDA device such as '0' (default: 'cpu').
+        n (int): Process starts per setting (default: 3).
+
+    Returns:
+        (pd.DataFrame): Seconds to import, load the model, run the first inference and in total per setting.
+    """
+    import json
+    import subprocess
+    import tempfile
+
+    w = str(weights)
+    if not (w.endswith(".torchscript") or w.rstrip("/").endswith("_openvino_model")):
+        w = export.run(weights=weights, imgsz=[imgsz], include=["torchscript"], device=select_device(device))[-1]
+
+    def start(cache):
+        """Returns [import, load, first inference, total] seconds of one fresh process."""
+        t = time.perf_counter()
+        p = subprocess.run(
+            [sys.executable, "-c", STARTUP, w, str(imgsz), device, cache], cwd=ROOT, capture_output=True, text=True
+        )
+        total = time.perf_counter() - t
+        assert p.returncode == 0, p.stderr
+        return [*json.loads(p.stdout.strip().splitlines()[-1]), total]
+
+    y = []
+    with tempfile.TemporaryDirectory() as cache:
+        y.append(["no cache", *np.median([start("") for _ in range(n)], 0)])
+        y.append(["cache cold", *start(cache)])
+        y.append(["cache warm", *np.median([start(cache) for _ in range(n)], 0)])
+    py = pd.DataFrame(y, columns=["Startup", "Import (s)", "Load (s)", "First inference (s)", "Total (s)"]).round(3)
+    LOGGER.info(f"\nTime-to-first-detection of {w} ({n} process starts per setting)\n{py}")
+    return py
+
+
+IMPORT_MODULES = "models.common", "models.yolo", "utils.general", "utils.augmentations", "detect", "val"  # inference
+IMPORT_HEAVY = (  # packages the inference modules must not import, only imported where used
+    "pandas",
+    "matplotlib",
+    "seaborn",
+    "scipy",
+    "torchvision",
+    "pkg_resources",
+    "export",
+    "utils.plots",
+    "utils.loggers",
+    "tensorboard",
+    "wandb",
+    "clearml",
+    "comet_ml",
+)
+
+
+def import_time(
+    modules=IMPORT_MODULES,  # modules to import, each in a fresh process
+    budget=1.0,  # maximum seconds per module on top of importing torch
+    hard_fail=False,  # raise if a module imports IMPORT_HEAVY packages or exceeds the budget
+):
+    """
+    Benchmarks the import time of each of `modules` with `python -X importtime` in a fresh process.
+
+    Import time is split into torch, which every module needs, and everything else, which is checked against `budget`.
+    Modules importing any IMPORT_HEAVY package, i.e. plotting, pandas, loggers, export or torchvision, are flagged.
+
+    Args:
+        modules (tuple[str]): Modules to import (default: IMPORT_MODULES, the inference entry points).
+        budget (float): Maximum seconds per module excluding torch (default: 1.0).
+        hard_fail (bool): Raise an AssertionError on heavy imports or import times over budget (default: False).
+
+    Returns:
+        (pd.DataFrame): Total, torch and other import seconds and heavy packages imported per module.
+    """
+    import subprocess
+
+    y = []
+    for m in modules:
+        args = sys.executable, "-X", "importtime", "-c", f"import {m}"
+        p = subprocess.run(args, cwd=ROOT, capture_output=True, text=True)
+        assert p.returncode == 0, p.stderr
+        t = {}  # module: cumulative seconds
+        for line in p.stderr.splitlines():
+            if line.startswith("import time:") and "[us]" not in line:
+                _, cumulative, name = line[12:].split("|")
+                t[name.strip()] = int(cumulative) / 1e6
+        heavy = [h for h in IMPORT_HEAVY if h in t]
+        y.append([m, t[m], t.get("torch", 0), t[m] - t.get("torch", 0), " ".join(heavy)])
+    py = pd.DataFrame(y, columns=["Module", "Import (s)", "torch (s)", "Other (s)", "Heavy imports"]).round(3)
+    LOGGER.info(f"\nImport times, {budget}s budget excluding torch\n{py}")
+    if hard_fail:
+        assert not py["Heavy imports"].any(), f"HARD FAIL: heavy imports\n{py}"
+        assert (py["Other (s)"] <= budget).all(), f"HARD FAIL: import time over {budget}s budget\n{py}"
+    return py
+
+
 def parse_opt():
     """
     Parses command-line arguments for YOLOv5 model inference configuration.
@@ -233,6 +498,17 @@ def parse_opt():
         pt_only (bool): Test PyTorch only. This is a flag and defaults to False.
         hard_fail (bool | str): Throw an error on benchmark failure. Can be a boolean or a string representing a minimum
             metric floor, e.g., '0.29'. Defaults to False.
+        int8 (bool): Also benchmark CPU INT8 TorchScript models quantized statically and dynamically, and static INT8
+            ONNX models. Defaults to False.
+        cpu_modes (bool): Also benchmark PyTorch with channels-last memory format and bfloat16 autocast. Defaults to
+            False.
+        ort_sweep (bool): Sweep ONNX Runtime session options on this host instead of benchmarking formats. Defaults
+            to False.
+        startup (bool): Benchmark time-to-first-detection without and with a compiled model cache instead of
+            benchmarking formats. Defaults to False.
+        import_time (bool): Benchmark import times of the inference entry points instead of benchmarking formats, with
+            --hard-fail raising on heavy imports or times over `import_budget`. Defaults to False.
+        import_budget (float): Import time budget in seconds per module, excluding torch. Defaults to 1.0.
 
     Returns:
         argparse.Namespace: Parsed command-line arguments encapsulated in an argparse Namespace object.
@@ -251,6 +527,13 @@ def parse_opt():
     parser.add_argument("--test", action="store_true", help="test exports only")
     parser.add_argument("--pt-only", action="store_true", help="test PyTorch only")
     parser.add_argument("--hard-fail", nargs="?", const=True, default=False, help="Exception on error or < min metric")
+    parser.add_argument("--nms", action="store_true", help="also benchmark ONNX with NMS in the graph")
+    parser.add_argument("--int8", action="store_true", help="also benchmark CPU INT8 TorchScript and ONNX")
+    parser.add_argument("--cpu-modes", action="store_true", help="also benchmark PyTorch channels-last and bfloat16")
+    parser.add_argument("--ort-sweep", action="store_true", help="sweep ONNX Runtime session options only")
+    parser.add_argument("--startup", action="store_true", help="benchmark time-to-first-detection with --compile-cache")
+    parser.add_argument("--import-time", action="store_true", help="benchmark import times of inference modules only")
+    parser.add_argument("--import-budget", type=float, default=1.0, help="--import-time seconds excluding torch")
     opt = parser.parse_args()
     opt.data = check_yaml(opt.data)  # check YAML
     print_args(vars(opt))
@@ -286,7 +569,16 @@ def main(opt):
         $ python benchmarks.py --weights yolov5s.pt --img 640
         ```
     """
-    test(**vars(opt)) if opt.test else run(**vars(opt))
+    ort, start, imports = vars(opt).pop("ort_sweep"), vars(opt).pop("startup"), vars(opt).pop("import_time")
+    budget = vars(opt).pop("import_budget")
+    if imports:
+        import_time(budget=budget, hard_fail=bool(opt.hard_fail))
+    elif ort:
+        ort_sweep(opt.weights, opt.imgsz, opt.batch_size, opt.device or "cpu")
+    elif start:
+        startup(opt.weights, opt.imgsz, opt.device or "cpu")
+    else:
+        test(**vars(opt)) if opt.test else run(**vars(opt))
 
 
 if __name__ == "__main__":
@@ -14,6 +14,12 @@ Usage - sources:
                                                      'https://youtu.be/LNwODJXcvt4'  # YouTube
                                                      'rtsp://example.com/media.mp4'  # RTSP, RTMP, HTTP stream
 
+Usage - detect-then-track on video, detector every 5th frame:
+    $ python detect.py --weights yolov5s.pt --source vid.mp4 --track --track-interval 5
+
+Usage - tiled inference on high-resolution images:
+    $ python detect.py --weights yolov5s.pt --source 4k.jpg --img 640 --tile --tile-overlap 0.2 --tile-full
+
 Usage - formats:
     $ python detect.py --weights yolov5s.pt                 # PyTorch
                                  yolov5s.torchscript        # TorchScript
@@ -45,8 +51,10 @@ ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from ultralytics.utils.plotting import Annotator, colors, save_one_box
 
-from models.common import DetectMultiBackend
-from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadStreams
+from models.common import DetectMultiBackend, parse_ort, parse_shapes
+from models.experimental import Ensemble
+from models.yolo import Detect
+from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadSharedStreams, LoadStreams
 from utils.general import (
     LOGGER,
     Profile,
@@ -54,6 +62,7 @@ from utils.general import (
     check_img_size,
     check_imshow,
     check_requirements,
+    clip_boxes,
     colorstr,
     cv2,
     increment_path,
@@ -63,6 +72,9 @@ from utils.general import (
     strip_optimizer,
     xyxy2xywh,
 )
+from utils.motion import MotionGate
+from utils.tiling import merge_tiles, tile_images
+from utils.tracker import Tracker
 from utils.torch_utils import select_device, smart_inference_mode
 
 
@@ -97,6 +109,20 @@ def run(
     half=False,  # use FP16 half-precision inference
     dnn=False,  # use OpenCV DNN for ONNX inference
     vid_stride=1,  # video frame-rate stride
+    tile=False,  # sliced inference with imgsz tiles
+    tile_overlap=0.2,  # fractional overlap between tiles
+    tile_full=False,  # add a full-frame pass to tiled inference
+    motion_thres=0.0,  # skip inference on streams with a smaller changed-pixel fraction, i.e. 0.005
+    motion_refresh=5.0,  # maximum seconds between inferences of a motion-gated stream
+    track=False,  # track objects across frames with persistent ids
+    track_interval=1,  # with --track, run the detector every track_interval frames
+    ensemble="sequential",  # run multi-weight ensemble members 'sequential' or concurrently in 'thread's
+    shm=False,  # capture streams in separate processes, passing frames through shared memory
+    ort=None,  # ONNX Runtime session options dict, i.e. {'threads': 4, 'cache': True}
+    compile_cache=None,  # directory caching compiled TorchScript and OpenVINO models across runs
+    memory_format=None,  # PyTorch/TorchScript input memory format, i.e. 'channels_last'
+    autocast=None,  # PyTorch/TorchScript autocast dtype, i.e. 'bfloat16' on CPU
+    compile_shapes=None,  # torch.compile() PyTorch models for these shape buckets, i.e. [320, 640, (384, 640)]
 ):
     """
     Runs YOLOv5 detection inference on various sources like images, videos, directories, streams, etc.
@@ -133,6 +159,32 @@ def run(
         half (bool): If True, use FP16 half-precision inference. Default is False.
         dnn (bool): If True, use OpenCV DNN backend for ONNX inference. Default is False.
         vid_stride (int): Stride for processing video frames, to skip frames between processing. Default is 1.
+        tile (bool): If True, run sliced inference on overlapping imgsz tiles of the original image. Default is False.
+        tile_overlap (float): Fractional overlap between neighbouring tiles. Default is 0.2.
+        tile_full (bool): If True, add a letterboxed full-frame view to the tile batch. Default is False.
+        motion_thres (float): If > 0, skip inference on streams whose fraction of changed pixels since their last
+            inference is below this value and reuse the last detections, videos and streams only. Default is 0 (off).
+        motion_refresh (float): Maximum seconds between inferences of a motion-gated stream. Default is 5.0.
+        track (bool): If True, assign persistent track ids with an IoU + Kalman tracker and report unique object counts.
+            Default is False.
+        track_interval (int): With `track`, run the detector every `track_interval` frames and propagate tracks with the
+            Kalman filter in between. Default is 1.
+        ensemble (str): Execution strategy for multiple --weights, 'sequential' or 'thread' to run the members
+            concurrently. Default is 'sequential'.
+        shm (bool): If True, capture and decode each stream in its own process and pass frames to inference through a
+            shared-memory ring buffer instead of threads. Default is False.
+        ort (dict, optional): ONNX Runtime session options for *.onnx weights, see models.common.ORT_OPTIONS, i.e.
+            intra/inter-op threads, execution mode, graph optimization level, memory arena, IO binding and optimized
+            graph caching. Default is None.
+        compile_cache (str, optional): Directory caching frozen TorchScript modules and OpenVINO compiled models across
+            runs, so later starts skip compilation. Default is None.
+        memory_format (str, optional): PyTorch and TorchScript input memory format, 'channels_last' for faster CPU
+            convolutions. Default is None.
+        autocast (str, optional): PyTorch and TorchScript autocast dtype, i.e. 'bfloat16' on CPUs with AVX512-BF16 or
+            AMX. Default is None.
+        compile_shapes (list, optional): Input shape buckets, square sizes or (h, w), to run PyTorch models with
+            torch.compile(). All buckets are compiled on startup, inputs are padded to the smallest bucket they fit and
+            larger inputs run eagerly. Default is None.
 
     Returns:
         None
@@ -163,15 +215,33 @@ def run(
 
     # Load model
     device = select_device(device)
-    model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
+    model = DetectMultiBackend(
+        weights,
+        device=device,
+        dnn=dnn,
+        data=data,
+        fp16=half,
+        ort=ort,
+        compile_cache=compile_cache,
+        memory_format=memory_format,
+        autocast=autocast,
+        compile_shapes=compile_shapes,
+    )
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
+    if tile:
+        assert not model.end2end, "--tile requires raw model outputs, not a model exported with --nms"
+    if pt and not augment and not compile_shapes:  # decode only candidate rows above conf_thres in Detect()
+        for m in model.model.modules():
+            if type(m) is Detect:
+                m.conf_thres = conf_thres
 
     # Dataloader
     bs = 1  # batch_size
     if webcam:
         view_img = check_imshow(warn=True)
-        dataset = LoadStreams(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+        loader = LoadSharedStreams if shm else LoadStreams
+        dataset = loader(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
         bs = len(dataset)
     elif screenshot:
         dataset = LoadScreenshots(source, img_size=imgsz, stride=stride, auto=pt)
@@ -180,34 +250,80 @@ def run(
     vid_path, vid_writer = [None] * bs, [None] * bs
 
     # Run inference
-    model.warmup(imgsz=(1 if pt or model.triton else bs, 3, *imgsz))  # warmup
+    if isinstance(getattr(model, "model", None), Ensemble):
+        model.model.strategy = ensemble
+    model.warmup(imgsz=(1 if (pt and not compile_shapes) or model.triton else bs, 3, *imgsz))  # warmup
     seen, windows, dt = 0, [], (Profile(device=device), Profile(device=device), Profile(device=device))
+    gate, last_pred = (MotionGate(motion_thres, motion_refresh), None) if motion_thres else (None, None)
+    gate_path = None  # video gated by motion, still images are never gated
+    trackers, track_path, track_frame = [], None, 0
     for path, im, im0s, vid_cap, s in dataset:
-        with dt[0]:
-            im = torch.from_numpy(im).to(model.device)
-            im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
-            im /= 255  # 0 - 255 to 0.0 - 1.0
-            if len(im.shape) == 3:
-                im = im[None]  # expand for batch dim
-            if model.xml and im.shape[0] > 1:
-                ims = torch.chunk(im, im.shape[0], 0)
-
-        # Inference
-        with dt[1]:
-            visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
-            if model.xml and im.shape[0] > 1:
-                pred = None
-                for image in ims:
-                    if pred is None:
-                        pred = model(image, augment=augment, visualize=visualize).unsqueeze(0)
-                    else:
-                        pred = torch.cat((pred, model(image, augment=augment, visualize=visualize).unsqueeze(0)), dim=0)
-                pred = [pred, None]
-            else:
-                pred = model(im, augment=augment, visualize=visualize)
-        # NMS
-        with dt[2]:
-            pred = non_max_suppression(pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)
+        if track:  # new trackers per video, detector every track_interval frames
+            if path != track_path:
+                for t in trackers if dataset.mode != "image" else []:
+                    LOGGER.info(f"{track_path}: {t.summary(names)}")
+                trackers, track_path, track_frame = [Tracker() for _ in range(bs)], path, 0
+            detect_frame = track_frame % track_interval == 0
+            track_frame += 1
+        n = len(im0s) if webcam else 1  # streams
+        gated = gate is not None and dataset.mode != "image"  # video and stream frames only
+        if gated and not webcam and path != gate_path:  # new video file
+            gate.reset()
+            gate_path = path
+        if track and not detect_frame:
+            run = [False] * n
+        else:
+            run = gate(im0s if webcam else [im0s]) if gated else [True] * n  # per-stream inference flags
+        if not any(run):  # no pre-processing or inference, reuse or propagate last detections
+            pred = [None] * n
+            im = im[None] if len(im.shape) == 3 else im  # letterboxed shape for scale_boxes()
+        else:
+            with dt[0]:
+                if tile:  # slice original images, im0s is a list for streams
+                    ims = [x for x, r in zip(im0s if webcam else [im0s], run) if r]  # gated streams only
+                    im, transforms, counts = tile_images(ims, imgsz, tile_overlap, tile_full)
+                elif webcam and not all(run):
+                    im = im[run]  # gated streams only
+                im = torch.from_numpy(im).to(model.device)
+                im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
+                im /= 255  # 0 - 255 to 0.0 - 1.0
+                if len(im.shape) == 3:
+                    im = im[None]  # expand for batch dim
+                if model.xml and im.shape[0] > 1:
+                    ims = torch.chunk(im, im.shape[0], 0)
+
+            # Inference
+            with dt[1]:
+                visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
+                if model.xml and im.shape[0] > 1:
+                    pred = None
+                    for image in ims:
+                        if pred is None:
+                            pred = model(image, augment=augment, visualize=visualize).unsqueeze(0)
+                        else:
+                            pred = torch.cat(
+                                (pred, model(image, augment=augment, visualize=visualize).unsqueeze(0)), dim=0
+                            )
+                    pred = [pred, None]
+                else:
+                    pred = model(im, augment=augment, visualize=visualize)
+            # NMS
+            with dt[2]:
+                if tile:  # merge tiles in image pixels with one NMS per image
+                    pred = [
+                        non_max_suppression(x, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det)[0]
+                        for x in merge_tiles(pred, transforms, counts)
+                    ]
+                else:
+                    pred = non_max_suppression(
+                        pred, conf_thres, iou_thres, classes, agnostic_nms, max_det=max_det, end2end=model.end2end
+                    )
+
+            pred = iter(pred)  # streams with inference
+            pred = [next(pred) if r else None for r in run]
+        if gated and not track:  # reuse last detections for unchanged streams
+            last_pred = [x if x is not None else y for x, y in zip(pred, last_pred or pred)]
+            pred = [x.clone() for x in last_pred]  # boxes are rescaled in-place below
 
         # Second-stage classifier (optional)
         # pred = utils.general.apply_classifier(pred, classifier_model, im, im0s)
@@ -241,17 +357,27 @@ def run(
             gn = torch.tensor(im0.shape)[[1, 0, 1, 0]]  # normalization gain whwh
             imc = im0.copy() if save_crop else im0  # for save_crop
             annotator = Annotator(im0, line_width=line_thickness, example=str(names))
+            if det is not None and len(det):  # rescale boxes from img_size to im0 size
+                if tile:  # already in im0 pixels
+                    clip_boxes(det[:, :4], im0.shape)
+                    det[:, :4] = det[:, :4].round()
+                else:
+                    det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()
+            if track:  # assign track ids, or propagate tracks on frames without inference
+                det = trackers[i].update(det.cpu().numpy()) if det is not None else trackers[i].predict()
+                det = torch.from_numpy(det).float()
+                clip_boxes(det[:, :4], im0.shape)
+                det[:, :4] = det[:, :4].round()
+                det, ids = det[:, :6], det[:, 6].int().tolist()
             if len(det):
-                # Rescale boxes from img_size to im0 size
-                det[:, :4] = scale_boxes(im.shape[2:], det[:, :4], im0.shape).round()
-
                 # Print results
                 for c in det[:, 5].unique():
                     n = (det[:, 5] == c).sum()  # detections per class
                     s += f"{n} {names[int(c)]}{'s' * (n > 1)}, "  # add to string
 
                 # Write results
-                for *xyxy, conf, cls in reversed(det):
+                for j in reversed(range(len(det))):
+                    *xyxy, conf, cls = det[j]
                     c = int(cls)  # integer class
                     label = names[c] if hide_conf else f"{names[c]}"
                     confidence = float(conf)
@@ -268,12 +394,14 @@ def run(
                         else:
                             coords = (torch.tensor(xyxy).view(1, 4) / gn).view(-1).tolist()  # xyxy
                         line = (cls, *coords, conf) if save_conf else (cls, *coords)  # label format
+                        line += (ids[j],) if track else ()  # track id
                         with open(f"{txt_path}.txt", "a") as f:
                             f.write(("%g " * len(line)).rstrip() % line + "\n")
 
                     if save_img or save_crop or view_img:  # Add bbox to image
                         c = int(cls)  # integer class
                         label = None if hide_labels else (names[c] if hide_conf else f"{names[c]} {conf:.2f}")
+                        label = f"id:{ids[j]} {label}" if track and label else label
                         annotator.box_label(xyxy, label, color=colors(c, True))
                     if save_crop:
                         save_one_box(xyxy, imc, file=save_dir / "crops" / names[c] / f"{p.stem}.jpg", BGR=True)
@@ -313,6 +441,12 @@ def run(
     # Print results
     t = tuple(x.t / seen * 1e3 for x in dt)  # speeds per image
     LOGGER.info(f"Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS per image at shape {(1, 3, *imgsz)}" % t)
+    if isinstance(getattr(model, "model", None), Ensemble):
+        LOGGER.info(model.model.summary())
+    if gate:
+        LOGGER.info(gate.summary())
+    for t in trackers if dataset.mode != "image" else []:
+        LOGGER.info(f"{track_path}: {t.summary(names)}")
     if save_txt or save_img:
         s = f"\n{len(list(save_dir.glob('labels/*.txt')))} labels saved to {save_dir / 'labels'}" if save_txt else ""
         LOGGER.info(f"Results saved to {colorstr('bold', save_dir)}{s}")
@@ -354,6 +488,24 @@ def parse_opt():
         --dnn (bool, optional): Flag to use OpenCV DNN for ONNX inference. Defaults to False.
         --vid-stride (int, optional): Video frame-rate stride, determining the number of frames to skip in between
             consecutive frames. Defaults to 1.
+        --tile (bool, optional): Flag to run sliced inference on overlapping imgsz tiles. Defaults to False.
+        --tile-overlap (float, optional): Fractional overlap between neighbouring tiles. Defaults to 0.2.
+        --tile-full (bool, optional): Flag to add a full-frame pass to tiled inference. Defaults to False.
+        --motion-thres (float, optional): Changed-pixel fraction below which inference is skipped and the last
+            detections are reused, i.e. 0.005 for static cameras. Defaults to 0.0 (disabled).
+        --motion-refresh (float, optional): Maximum seconds between inferences of a motion-gated stream. Defaults to 5.0.
+        --track (bool, optional): Flag to track objects across frames with persistent ids. Defaults to False.
+        --track-interval (int, optional): With --track, run the detector every N frames and propagate tracks in
+            between. Defaults to 1.
+        --ensemble (str, optional): Run multi-weight ensemble members 'sequential' or concurrently in 'thread's.
+            Defaults to 'sequential'.
+        --shm (bool, optional): Capture streams in separate processes, passing frames through shared memory.
+        --ort (list[str], optional): ONNX Runtime options as KEY=VALUE, i.e. 'threads=4 opt=all cache=1'.
+        --compile-cache (str, optional): Directory caching compiled TorchScript and OpenVINO models across runs.
+        --memory-format (str, optional): PyTorch and TorchScript input memory format, 'channels_last'.
+        --autocast (str, optional): PyTorch and TorchScript autocast dtype, 'bfloat16' or 'float16'.
+        --compile (list[str], optional): torch.compile() PyTorch models for shape buckets, SIZE or HxW, i.e.
+            '320 640 384x640', default buckets if none given.
 
     Returns:
         argparse.Namespace: Parsed command-line arguments as an argparse.Namespace object.
@@ -399,7 +551,23 @@ def parse_opt():
     parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
     parser.add_argument("--dnn", action="store_true", help="use OpenCV DNN for ONNX inference")
     parser.add_argument("--vid-stride", type=int, default=1, help="video frame-rate stride")
+    parser.add_argument("--tile", action="store_true", help="sliced inference with imgsz tiles")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="fractional overlap between tiles")
+    parser.add_argument("--tile-full", action="store_true", help="add a full-frame pass to tiled inference")
+    parser.add_argument("--motion-thres", type=float, default=0.0, help="skip inference below this changed fraction")
+    parser.add_argument("--motion-refresh", type=float, default=5.0, help="max seconds between gated inferences")
+    parser.add_argument("--track", action="store_true", help="track objects across frames with persistent ids")
+    parser.add_argument("--track-interval", type=int, default=1, help="--track: run the detector every N frames")
+    parser.add_argument("--ensemble", default="sequential", choices=["sequential", "thread"], help="ensemble strategy")
+    parser.add_argument("--shm", action="store_true", help="capture streams in processes via shared memory")
+    parser.add_argument("--ort", nargs="+", metavar="KEY=VALUE", help="ONNX Runtime options, i.e. threads=4 cache=1")
+    parser.add_argument("--compile-cache", type=str, default=None, help="compiled TorchScript/OpenVINO model cache dir")
+    parser.add_argument("--memory-format", choices=["channels_last"], default=None, help="PyTorch input memory format")
+    parser.add_argument("--autocast", choices=["bfloat16", "float16"], default=None, help="PyTorch autocast dtype")
+    parser.add_argument("--compile", nargs="*", dest="compile_shapes", metavar="SHAPE", help="torch.compile() buckets")
     opt = parser.parse_args()
+    opt.ort = parse_ort(opt.ort)
+    opt.compile_shapes = parse_shapes(opt.compile_shapes)
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
     return opt
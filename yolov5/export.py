@@ -16,6 +16,7 @@ TensorFlow Lite             | `tflite`                      | yolov5s.tflite
 TensorFlow Edge TPU         | `edgetpu`                     | yolov5s_edgetpu.tflite
 TensorFlow.js               | `tfjs`                        | yolov5s_web_model/
 PaddlePaddle                | `paddle`                      | yolov5s_paddle_model/
+Safetensors                 | `safetensors`                 | yolov5s.safetensors
 
 Requirements:
     $ pip install -r requirements.txt coremltools onnx onnx-simplifier onnxruntime openvino-dev tensorflow-cpu  # CPU
@@ -23,6 +24,8 @@ Requirements:
 
 Usage:
     $ python export.py --weights yolov5s.pt --include torchscript onnx openvino engine coreml tflite ...
+    $ python export.py --weights yolov5s.pt --include torchscript --int8-mode static --data coco128.yaml  # CPU INT8
+    $ python export.py --weights yolov5s.pt --include onnx --int8-mode static --data coco128.yaml  # INT8 QDQ ONNX
 
 Inference:
     $ python detect.py --weights yolov5s.pt                 # PyTorch
@@ -36,6 +39,7 @@ Inference:
                                  yolov5s.tflite             # TensorFlow Lite
                                  yolov5s_edgetpu.tflite     # TensorFlow Edge TPU
                                  yolov5s_paddle_model       # PaddlePaddle
+                                 yolov5s.safetensors        # PyTorch, fused memory-mapped weights
 
 TensorFlow.js:
     $ cd .. && git clone https://github.com/zldrobit/tfjs-yolov5-example.git && cd tfjs-yolov5-example
@@ -67,6 +71,7 @@ if str(ROOT) not in sys.path:
 if platform.system() != "Windows":
     ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
+from models.common import EXPORT_FORMATS
 from models.experimental import attempt_load
 from models.yolo import ClassificationModel, Detect, DetectionModel, SegmentationModel
 from utils.dataloaders import LoadImages
@@ -142,6 +147,61 @@ class iOSModel(torch.nn.Module):
         return cls * conf, xywh * self.normalize  # confidence (3780, 80), coordinates (3780, 4)
 
 
+class NMSModel(torch.nn.Module):
+    """An end-to-end wrapper for YOLOv5 detection models that appends confidence filtering and NMS to the graph."""
+
+    def __init__(self, model, conf_thres=0.25, iou_thres=0.45, max_det=100, agnostic=False):
+        """
+        Initializes an end-to-end model that outputs fixed-size, NMS-filtered detections.
+
+        Args:
+            model (torch.nn.Module): The YOLOv5 DetectionModel to wrap, with Detect() in export mode.
+            conf_thres (float): Confidence threshold applied before NMS.
+            iou_thres (float): IoU threshold for NMS.
+            max_det (int): Fixed number of output detections per image, padded with zero rows.
+            agnostic (bool): If True, applies class-agnostic NMS.
+
+        Notes:
+            Matches utils.general.non_max_suppression() with multi_label=False. Exported through the TorchScript ONNX
+            exporter, torchvision.ops.nms() becomes a single ONNX `NonMaxSuppression` op.
+        """
+        import torchvision  # scoped for faster 'import export', imported before tracing which would trace its init ops
+
+        super().__init__()
+        self.model = model
+        self.conf_thres = conf_thres
+        self.iou_thres = iou_thres
+        self.max_det = max_det
+        self.agnostic = agnostic
+
+    def forward(self, x):
+        """
+        Run inference and NMS, returning detections as a (batch, max_det, 6) tensor of [xyxy, conf, cls] rows.
+
+        Rows past the number of detections in an image are all zeros, so consumers filter on conf > 0.
+        """
+        import torchvision  # imported by __init__()
+
+        p = self.model(x)[0]  # (b, n, 5 + nc)
+        b, n, no = p.shape
+        xywh, obj, cls = p.split((4, 1, no - 5), 2)
+        conf, j = (cls * obj).max(2)  # best class only, (b, n)
+        box = torch.cat((xywh[..., :2] - xywh[..., 2:] / 2, xywh[..., :2] + xywh[..., 2:] / 2), 2)  # xywh to xyxy
+        box, conf, j = box.flatten(0, 1), conf.flatten(), j.flatten()  # merge batch into one NMS call
+
+        # Batched NMS, offsetting boxes by image index and class so they never overlap
+        i = (conf > self.conf_thres).nonzero().squeeze(1)  # candidates
+        offset = i.div(n, rounding_mode="floor") * (1 if self.agnostic else no - 5) + (0 if self.agnostic else j[i])
+        k = i[torchvision.ops.nms(box[i] + offset.unsqueeze(1).float() * 7680, conf[i], self.iou_thres)]
+
+        # Fixed-size output, top max_det scores per image
+        score = torch.zeros_like(conf).index_put((k,), conf[k]).view(b, n)  # zero scores for suppressed boxes
+        score, k = score.topk(min(self.max_det, n), 1)
+        box = box.view(b, n, 4).gather(1, k.unsqueeze(2).expand(-1, -1, 4)) * (score > 0).unsqueeze(2)
+        cls = j.view(b, n).gather(1, k).float() * (score > 0)
+        return torch.cat((box, score.unsqueeze(2), cls.unsqueeze(2)), 2)
+
+
 def export_formats():
     r"""
     Returns a DataFrame of supported YOLOv5 model export formats and their properties.
@@ -165,21 +225,7 @@ def export_formats():
         - Supports Training: Whether the format supports training.
         - Supports Detection: Whether the format supports detection.
     """
-    x = [
-        ["PyTorch", "-", ".pt", True, True],
-        ["TorchScript", "torchscript", ".torchscript", True, True],
-        ["ONNX", "onnx", ".onnx", True, True],
-        ["OpenVINO", "openvino", "_openvino_model", True, False],
-        ["TensorRT", "engine", ".engine", False, True],
-        ["CoreML", "coreml", ".mlpackage", True, False],
-        ["TensorFlow SavedModel", "saved_model", "_saved_model", True, True],
-        ["TensorFlow GraphDef", "pb", ".pb", True, True],
-        ["TensorFlow Lite", "tflite", ".tflite", True, False],
-        ["TensorFlow Edge TPU", "edgetpu", "_edgetpu.tflite", False, False],
-        ["TensorFlow.js", "tfjs", "_web_model", False, False],
-        ["PaddlePaddle", "paddle", "_paddle_model", True, True],
-    ]
-    return pd.DataFrame(x, columns=["Format", "Argument", "Suffix", "CPU", "GPU"])
+    return pd.DataFrame(EXPORT_FORMATS, columns=["Format", "Argument", "Suffix", "CPU", "GPU"])
 
 
 def try_export(inner_func):
@@ -226,7 +272,16 @@ def try_export(inner_func):
 
 
 @try_export
-def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:")):
+def export_torchscript(
+    model,
+    im,
+    file,
+    optimize,
+    int8_mode=None,
+    data=None,
+    int8_calib=100,
+    prefix=colorstr("TorchScript:"),
+):
     """
     Export a YOLOv5 model to the TorchScript format.
 
@@ -235,6 +290,11 @@ def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:"
         im (torch.Tensor): Example input tensor to be used for tracing the TorchScript model.
         file (Path): File path where the exported TorchScript model will be saved.
         optimize (bool): If True, applies optimizations for mobile deployment.
+        int8_mode (str | None): If set, quantizes the model to INT8 for CPU inference instead and saves it as
+            '*-int8.torchscript' with 'static' quantization calibrated on the `data` train split, or as
+            '*-int8-dynamic.torchscript' with 'dynamic' quantization or if static quantization fails. Default is None.
+        data (str | Path, optional): Dataset YAML file whose train split calibrates static INT8 quantization.
+        int8_calib (int): Number of calibration images for static INT8 quantization. Default is 100.
         prefix (str): Optional prefix for log messages. Default is 'TorchScript:'.
 
     Returns:
@@ -247,6 +307,7 @@ def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:"
         - Metadata, including the input image shape, model stride, and class names, is saved in an extra file (`config.txt`)
           within the TorchScript model package.
         - For mobile optimization, refer to the PyTorch tutorial: https://pytorch.org/tutorials/recipes/mobile_interpreter.html
+        - INT8 models keep the Detect head in FP32 and run on CPU only, see utils/quantize.py.
 
     Example:
         ```python
@@ -270,9 +331,16 @@ def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:"
     """
     LOGGER.info(f"\n{prefix} starting export with torch {torch.__version__}...")
     f = file.with_suffix(".torchscript")
+    d = {"shape": im.shape, "stride": int(max(model.stride)), "names": model.names}
+    if int8_mode:
+        from utils.quantize import calibration_images, quantize
+
+        assert im.device.type == "cpu", "--int8-mode TorchScript export requires --device cpu"
+        images = calibration_images(data, im.shape[2:], int8_calib, im.shape[0]) if int8_mode == "static" else None
+        model, mode = quantize(model, images, int8_mode)  # mode used, 'dynamic' if static quantization failed
+        f = file.with_name(f"{file.stem}-int8{'-dynamic' if mode == 'dynamic' else ''}.torchscript")
 
     ts = torch.jit.trace(model, im, strict=False)
-    d = {"shape": im.shape, "stride": int(max(model.stride)), "names": model.names}
     extra_files = {"config.txt": json.dumps(d)}  # torch._C.ExtraFilesMap()
     if optimize:  # https://pytorch.org/tutorials/recipes/mobile_interpreter.html
         optimize_for_mobile(ts)._save_for_lite_interpreter(str(f), _extra_files=extra_files)
@@ -282,7 +350,23 @@ def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:"
 
 
 @try_export
-def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX:")):
+def export_onnx(
+    model,
+    im,
+    file,
+    opset,
+    dynamic,
+    simplify,
+    nms=False,
+    agnostic_nms=False,
+    topk_all=100,
+    iou_thres=0.45,
+    conf_thres=0.25,
+    int8=False,
+    data=None,
+    int8_calib=100,
+    prefix=colorstr("ONNX:"),
+):
     """
     Export a YOLOv5 model to ONNX format with dynamic axes support and optional model simplification.
 
@@ -293,6 +377,16 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
         opset (int): The ONNX opset version to use for export.
         dynamic (bool): If True, enables dynamic axes for batch, height, and width dimensions.
         simplify (bool): If True, applies ONNX model simplification for optimization.
+        nms (bool): If True, appends confidence filtering and NMS to the graph, see NMSModel. Default is False.
+        agnostic_nms (bool): If True, the appended NMS is class-agnostic. Default is False.
+        topk_all (int): Fixed number of detections per image output by the NMS graph. Default is 100.
+        iou_thres (float): IoU threshold for the NMS graph. Default is 0.45.
+        conf_thres (float): Confidence threshold for the NMS graph. Default is 0.25.
+        int8 (bool): If True, also saves an INT8 QDQ model '*-int8.onnx' quantized by ONNX Runtime static
+            quantization and returns its path, see utils/quantize.py. Set by run() for `int8_mode` 'static' only.
+            Default is False.
+        data (str | Path, optional): Dataset YAML file whose train split calibrates INT8 quantization.
+        int8_calib (int): Number of calibration images for INT8 quantization. Default is 100.
         prefix (str): A prefix string for logging messages, defaults to 'ONNX:'.
 
     Returns:
@@ -341,10 +435,17 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
             dynamic["output0"] = {0: "batch", 1: "anchors"}  # shape(1,25200,85)
             dynamic["output1"] = {0: "batch", 2: "mask_height", 3: "mask_width"}  # shape(1,32,160,160)
         elif isinstance(model, DetectionModel):
-            dynamic["output0"] = {0: "batch", 1: "anchors"}  # shape(1,25200,85)
-
+            dynamic["output0"] = {0: "batch"} if nms else {0: "batch", 1: "anchors"}  # shape(1,25200,85)
+
+    kwargs = {}
+    if nms:  # end-to-end model, output shape(1,100,6)
+        assert type(model) is DetectionModel, "ONNX --nms only supported for detection models"
+        LOGGER.info(f"{prefix} adding {'agnostic ' if agnostic_nms else ''}NMS with max_det={topk_all}...")
+        if check_version(torch.__version__, "2.5.0"):
+            kwargs["dynamo"] = False  # torchvision.ops.nms() exports to NonMaxSuppression with the TorchScript exporter
+    m = model.cpu() if dynamic else model  # --dynamic only compatible with cpu
     torch.onnx.export(
-        model.cpu() if dynamic else model,  # --dynamic only compatible with cpu
+        NMSModel(m, conf_thres, iou_thres, topk_all, agnostic_nms) if nms else m,
         im.cpu() if dynamic else im,
         f,
         verbose=False,
@@ -353,6 +454,7 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
         input_names=["images"],
         output_names=output_names,
         dynamic_axes=dynamic or None,
+        **kwargs,
     )
 
     # Checks
@@ -361,6 +463,8 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
 
     # Metadata
     d = {"stride": int(max(model.stride)), "names": model.names}
+    if nms:
+        d["nms"] = {"conf_thres": conf_thres, "iou_thres": iou_thres, "max_det": topk_all, "agnostic": agnostic_nms}
     for k, v in d.items():
         meta = model_onnx.metadata_props.add()
         meta.key, meta.value = k, str(v)
@@ -378,6 +482,14 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
             onnx.save(model_onnx, f)
         except Exception as e:
             LOGGER.info(f"{prefix} simplifier failure: {e}")
+
+    # INT8
+    if int8:
+        check_requirements("onnxruntime")
+        from utils.quantize import calibration_images, quantize_onnx
+
+        images = calibration_images(data, im.shape[2:], int8_calib, 1 if dynamic else im.shape[0])
+        f = quantize_onnx(f, str(file.with_name(f"{file.stem}-int8.onnx")), images)
     return f, model_onnx
 
 
@@ -522,6 +634,45 @@ def export_paddle(model, im, file, metadata, prefix=colorstr("PaddlePaddle:")):
     return f, None
 
 
+@try_export
+def export_safetensors(model, file, metadata, prefix=colorstr("Safetensors:")):
+    """
+    Export the fused weights of a YOLOv5 model to a memory-mappable safetensors file for PyTorch inference.
+
+    Args:
+        model (torch.nn.Module): The fused YOLOv5 DetectionModel or SegmentationModel to be exported.
+        file (pathlib.Path): Path to the source PyTorch weights, the output is saved with a '.safetensors' suffix.
+        metadata (dict): Model stride and class names, saved with the model yaml and anchors in the file header.
+        prefix (str): Prefix for logging information.
+
+    Returns:
+        tuple (str, None): A tuple where the first element is the path to the saved safetensors file, and the second
+        element is None.
+
+    Examples:
+        ```python
+        from pathlib import Path
+        from models.experimental import attempt_load
+
+        model = attempt_load("yolov5s.pt", fuse=True)
+        metadata = {"stride": int(max(model.stride)), "names": model.names}
+        export_safetensors(model, Path("yolov5s.pt"), metadata)  # yolov5s.safetensors
+        ```
+
+    Notes:
+        Weights are saved without the training checkpoint, optimizer or pickled modules. DetectMultiBackend rebuilds the
+        model from its yaml and memory-maps the weights, so processes loading the same file share memory on CPU.
+    """
+    from utils.safetensors import save_model
+
+    assert not isinstance(model, ClassificationModel), "ClassificationModel safetensors export not yet supported."
+    LOGGER.info(f"\n{prefix} starting export with torch {torch.__version__}...")
+    f = file.with_suffix(".safetensors")
+
+    save_model(model, f, metadata)
+    return f, None
+
+
 @try_export
 def export_coreml(model, im, file, int8, half, nms, mlmodel, prefix=colorstr("CoreML:")):
     """
@@ -1285,7 +1436,9 @@ def run(
     inplace=False,  # set YOLOv5 Detect() inplace=True
     keras=False,  # use Keras
     optimize=False,  # TorchScript: optimize for mobile
-    int8=False,  # CoreML/TF INT8 quantization
+    int8=False,  # CoreML/TF/OpenVINO INT8 quantization
+    int8_mode=None,  # TorchScript/ONNX CPU INT8 quantization, None (off), 'static' (calibrated on data) or 'dynamic'
+    int8_calib=100,  # TorchScript/ONNX INT8 calibration images
     per_tensor=False,  # TF per tensor quantization
     dynamic=False,  # ONNX/TF/TensorRT: dynamic axes
     cache="",  # TensorRT: timing cache path
@@ -1294,12 +1447,12 @@ def run(
     opset=12,  # ONNX: opset version
     verbose=False,  # TensorRT: verbose log
     workspace=4,  # TensorRT: workspace size (GB)
-    nms=False,  # TF: add NMS to model
-    agnostic_nms=False,  # TF: add agnostic NMS to model
+    nms=False,  # ONNX/TF: add NMS to model
+    agnostic_nms=False,  # ONNX/TF: add agnostic NMS to model
     topk_per_class=100,  # TF.js NMS: topk per class to keep
-    topk_all=100,  # TF.js NMS: topk for all classes to keep
-    iou_thres=0.45,  # TF.js NMS: IoU threshold
-    conf_thres=0.25,  # TF.js NMS: confidence threshold
+    topk_all=100,  # ONNX/TF.js NMS: topk for all classes to keep
+    iou_thres=0.45,  # ONNX/TF.js NMS: IoU threshold
+    conf_thres=0.25,  # ONNX/TF.js NMS: confidence threshold
 ):
     """
     Exports a YOLOv5 model to specified formats including ONNX, TensorRT, CoreML, and TensorFlow.
@@ -1315,7 +1468,12 @@ def run(
         inplace (bool): Set the YOLOv5 Detect() module inplace=True. Default is False.
         keras (bool): Flag to use Keras for TensorFlow SavedModel export. Default is False.
         optimize (bool): Optimize TorchScript model for mobile deployment. Default is False.
-        int8 (bool): Apply INT8 quantization for CoreML or TensorFlow models. Default is False.
+        int8 (bool): Apply INT8 quantization for CoreML, TensorFlow or OpenVINO models. Default is False.
+        int8_mode (str | None): Export TorchScript and ONNX quantized to INT8 for CPU instead of FP32, 'static'
+            calibrated on the `data` train split or 'dynamic' (TorchScript only). Default is None (off), independent
+            of `int8`.
+        int8_calib (int): Number of `data` train images calibrating TorchScript and ONNX INT8 quantization. Default is
+            100.
         per_tensor (bool): Apply per tensor quantization for TensorFlow models. Default is False.
         dynamic (bool): Enable dynamic axes for ONNX, TensorFlow, or TensorRT exports. Default is False.
         cache (str): TensorRT timing cache path. Default is an empty string.
@@ -1323,10 +1481,10 @@ def run(
         opset (int): ONNX opset version. Default is 12.
         verbose (bool): Enable verbose logging for TensorRT export. Default is False.
         workspace (int): TensorRT workspace size in GB. Default is 4.
-        nms (bool): Add non-maximum suppression (NMS) to the TensorFlow model. Default is False.
-        agnostic_nms (bool): Add class-agnostic NMS to the TensorFlow model. Default is False.
+        nms (bool): Add non-maximum suppression (NMS) to the ONNX or TensorFlow model. Default is False.
+        agnostic_nms (bool): Add class-agnostic NMS to the ONNX or TensorFlow model. Default is False.
         topk_per_class (int): Top-K boxes per class to keep for TensorFlow.js NMS. Default is 100.
-        topk_all (int): Top-K boxes for all classes to keep for TensorFlow.js NMS. Default is 100.
+        topk_all (int): Top-K boxes for all classes to keep for ONNX and TensorFlow.js NMS. Default is 100.
         iou_thres (float): IoU threshold for NMS. Default is 0.45.
         conf_thres (float): Confidence threshold for NMS. Default is 0.25.
         mlmodel (bool): Flag to use *.mlmodel for CoreML export. Default is False.
@@ -1352,6 +1510,8 @@ def run(
             keras=False,
             optimize=False,
             int8=False,
+            int8_mode=None,
+            int8_calib=100,
             per_tensor=False,
             dynamic=False,
             cache="",
@@ -1374,7 +1534,7 @@ def run(
     fmts = tuple(export_formats()["Argument"][1:])  # --include arguments
     flags = [x in include for x in fmts]
     assert sum(flags) == len(include), f"ERROR: Invalid --include {include}, valid --include arguments are {fmts}"
-    jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle = flags  # export booleans
+    jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, safetensors = flags  # exports
     file = Path(url2file(weights) if str(weights).startswith(("http:/", "https:/")) else weights)  # PyTorch weights
 
     # Load PyTorch model
@@ -1415,11 +1575,30 @@ def run(
     f = [""] * len(fmts)  # exported filenames
     warnings.filterwarnings(action="ignore", category=torch.jit.TracerWarning)  # suppress TracerWarning
     if jit:  # TorchScript
-        f[0], _ = export_torchscript(model, im, file, optimize)
+        f[0], _ = export_torchscript(model, im, file, optimize, int8_mode, data, int8_calib)
     if engine:  # TensorRT required before ONNX
         f[1], _ = export_engine(model, im, file, half, dynamic, simplify, workspace, verbose, cache)
     if onnx or xml:  # OpenVINO requires ONNX
-        f[2], _ = export_onnx(model, im, file, opset, dynamic, simplify)
+        onnx_nms = (nms or agnostic_nms) and not xml  # OpenVINO converts the raw head output
+        onnx_int8 = onnx and int8_mode == "static"  # opt-in, OpenVINO --int8 quantizes the FP32 ONNX model with NNCF
+        if onnx and int8_mode == "dynamic":
+            LOGGER.warning("WARNING ⚠️ ONNX INT8 quantization is static only, exporting FP32 ONNX")
+        f[2], _ = export_onnx(
+            model,
+            im,
+            file,
+            opset,
+            dynamic,
+            simplify,
+            onnx_nms,
+            agnostic_nms,
+            topk_all,
+            iou_thres,
+            conf_thres,
+            onnx_int8,
+            data,
+            int8_calib,
+        )
     if xml:  # OpenVINO
         f[3], _ = export_openvino(file, metadata, half, int8, data)
     if coreml:  # CoreML
@@ -1455,6 +1634,8 @@ def run(
             f[9], _ = export_tfjs(file, int8)
     if paddle:  # PaddlePaddle
         f[10], _ = export_paddle(model, im, file, metadata)
+    if safetensors:  # PyTorch memory-mapped
+        f[11], _ = export_safetensors(model, file, metadata)
 
     # Finish
     f = [str(x) for x in f if x]  # filter out '' and None
@@ -1510,6 +1691,8 @@ def parse_opt(known=False):
     parser.add_argument("--keras", action="store_true", help="TF: use Keras")
     parser.add_argument("--optimize", action="store_true", help="TorchScript: optimize for mobile")
     parser.add_argument("--int8", action="store_true", help="CoreML/TF/OpenVINO INT8 quantization")
+    parser.add_argument("--int8-mode", default=None, choices=["static", "dynamic"], help="TorchScript/ONNX CPU INT8")
+    parser.add_argument("--int8-calib", type=int, default=100, help="TorchScript/ONNX INT8 calibration images")
     parser.add_argument("--per-tensor", action="store_true", help="TF per-tensor quantization")
     parser.add_argument("--dynamic", action="store_true", help="ONNX/TF/TensorRT: dynamic axes")
     parser.add_argument("--cache", type=str, default="", help="TensorRT: timing cache file path")
@@ -1518,17 +1701,17 @@ def parse_opt(known=False):
     parser.add_argument("--opset", type=int, default=17, help="ONNX: opset version")
     parser.add_argument("--verbose", action="store_true", help="TensorRT: verbose log")
     parser.add_argument("--workspace", type=int, default=4, help="TensorRT: workspace size (GB)")
-    parser.add_argument("--nms", action="store_true", help="TF: add NMS to model")
-    parser.add_argument("--agnostic-nms", action="store_true", help="TF: add agnostic NMS to model")
+    parser.add_argument("--nms", action="store_true", help="ONNX/TF: add NMS to model")
+    parser.add_argument("--agnostic-nms", action="store_true", help="ONNX/TF: add agnostic NMS to model")
     parser.add_argument("--topk-per-class", type=int, default=100, help="TF.js NMS: topk per class to keep")
-    parser.add_argument("--topk-all", type=int, default=100, help="TF.js NMS: topk for all classes to keep")
-    parser.add_argument("--iou-thres", type=float, default=0.45, help="TF.js NMS: IoU threshold")
-    parser.add_argument("--conf-thres", type=float, default=0.25, help="TF.js NMS: confidence threshold")
+    parser.add_argument("--topk-all", type=int, default=100, help="ONNX/TF.js NMS: topk for all classes to keep")
+    parser.add_argument("--iou-thres", type=float, default=0.45, help="ONNX/TF.js NMS: IoU threshold")
+    parser.add_argument("--conf-thres", type=float, default=0.25, help="ONNX/TF.js NMS: confidence threshold")
     parser.add_argument(
         "--include",
         nargs="+",
         default=["torchscript"],
-        help="torchscript, onnx, openvino, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle",
+        help="torchscript, onnx, openvino, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, safetensors",
     )
     opt = parser.parse_known_args()[0] if known else parser.parse_args()
     print_args(vars(opt))
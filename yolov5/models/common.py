@@ -5,22 +5,22 @@ import ast
 import contextlib
 import json
 import math
+import os
 import platform
 import warnings
 import zipfile
 from collections import OrderedDict, namedtuple
 from copy import copy
+from functools import cached_property
 from pathlib import Path
 from urllib.parse import urlparse
 
 import cv2
 import numpy as np
-import pandas as pd
 import requests
 import torch
 import torch.nn as nn
 from PIL import Image
-from torch.cuda import amp
 
 # Import 'ultralytics' package or install if missing
 try:
@@ -33,10 +33,9 @@ except (ImportError, AssertionError):
     os.system("pip install -U ultralytics")
     import ultralytics
 
-from ultralytics.utils.plotting import Annotator, colors, save_one_box
-
 from utils import TryExcept
-from utils.dataloaders import exif_transpose, letterbox
+from utils.augmentations import LetterboxBuffer
+from utils.dataloaders import exif_transpose
 from utils.general import (
     LOGGER,
     ROOT,
@@ -44,7 +43,9 @@ from utils.general import (
     check_requirements,
     check_suffix,
     check_version,
+    clip_boxes,
     colorstr,
+    file_hash,
     increment_path,
     is_jupyter,
     make_divisible,
@@ -54,7 +55,8 @@ from utils.general import (
     xyxy2xywh,
     yaml_load,
 )
-from utils.torch_utils import copy_attr, smart_inference_mode
+from utils.tiling import merge_tiles, tile_images
+from utils.torch_utils import copy_attr, is_compiling, smart_inference_mode
 
 
 def autopad(k, p=None, d=1):
@@ -309,8 +311,10 @@ class SPP(nn.Module):
         tensor.
         """
         x = self.cv1(x)
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")  # suppress torch 1.9.0 max_pool2d() warning
+        compiling = is_compiling()  # torch.compile() graphs break on warnings filters
+        with contextlib.nullcontext() if compiling else warnings.catch_warnings():
+            if not compiling:
+                warnings.simplefilter("ignore")  # suppress torch 1.9.0 max_pool2d() warning
             return self.cv2(torch.cat([x] + [m(x) for m in self.m], 1))
 
 
@@ -333,8 +337,10 @@ class SPPF(nn.Module):
     def forward(self, x):
         """Processes input through a series of convolutions and max pooling operations for feature extraction."""
         x = self.cv1(x)
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")  # suppress torch 1.9.0 max_pool2d() warning
+        compiling = is_compiling()  # torch.compile() graphs break on warnings filters
+        with contextlib.nullcontext() if compiling else warnings.catch_warnings():
+            if not compiling:
+                warnings.simplefilter("ignore")  # suppress torch 1.9.0 max_pool2d() warning
             y1 = self.m(x)
             y2 = self.m(y1)
             return self.cv2(torch.cat((x, y1, y2, self.m(y2)), 1))
@@ -456,11 +462,255 @@ class Concat(nn.Module):
         return torch.cat(x, self.d)
 
 
+EXPORT_FORMATS = (  # format, export.py --include argument, suffix, CPU and GPU inference, see export.export_formats()
+    ("PyTorch", "-", ".pt", True, True),
+    ("TorchScript", "torchscript", ".torchscript", True, True),
+    ("ONNX", "onnx", ".onnx", True, True),
+    ("OpenVINO", "openvino", "_openvino_model", True, False),
+    ("TensorRT", "engine", ".engine", False, True),
+    ("CoreML", "coreml", ".mlpackage", True, False),
+    ("TensorFlow SavedModel", "saved_model", "_saved_model", True, True),
+    ("TensorFlow GraphDef", "pb", ".pb", True, True),
+    ("TensorFlow Lite", "tflite", ".tflite", True, False),
+    ("TensorFlow Edge TPU", "edgetpu", "_edgetpu.tflite", False, False),
+    ("TensorFlow.js", "tfjs", "_web_model", False, False),
+    ("PaddlePaddle", "paddle", "_paddle_model", True, True),
+    ("Safetensors", "safetensors", ".safetensors", True, True),
+)
+
+ORT_OPTIONS = {
+    "threads": 0,  # intra-op threads, 0 for ONNX Runtime default (physical cores)
+    "inter_threads": 0,  # inter-op threads for parallel execution, 0 for default
+    "parallel": False,  # run independent graph nodes in parallel
+    "opt": "all",  # graph optimization level: disable, basic, extended or all
+    "arena": True,  # CPU memory arena
+    "io_binding": False,  # bind inputs and outputs to device buffers, avoids host copies on CUDA
+    "cache": False,  # save the optimized graph next to the model and load it on later starts
+}
+
+
+def parse_ort(args):
+    """
+    Parses ['threads=4', 'cache=true'] style KEY=VALUE strings to an ONNX Runtime options dict, i.e. for --ort.
+
+    Boolean options accept true, false, 1 or 0 and integer options non-negative integers.
+    """
+    options = {}
+    for x in args or []:
+        k, _, v = x.partition("=")
+        assert k in ORT_OPTIONS, f"invalid ONNX Runtime option '{k}', valid options are {list(ORT_OPTIONS)}"
+        if isinstance(ORT_OPTIONS[k], bool):
+            assert v.lower() in {"true", "false", "1", "0"}, f"ONNX Runtime option '{k}' must be true/false, not '{v}'"
+            options[k] = v.lower() in {"true", "1"}
+        elif isinstance(ORT_OPTIONS[k], int):
+            assert v.isdigit(), f"ONNX Runtime option '{k}' must be a non-negative integer, not '{v}'"
+            options[k] = int(v)
+        else:
+            options[k] = v
+    return options
+
+
+def ort_session(w, cuda=False, threads=0, inter_threads=0, parallel=False, opt="all", arena=True, cache=False):
+    """
+    Creates an ONNX Runtime InferenceSession for model `w` with the given threading, execution mode, graph optimization
+    level and memory arena settings (see ORT_OPTIONS).
+
+    With `cache`, the graph optimized at level `opt` is saved next to the model, keyed by ONNX Runtime version and
+    device, and later sessions load it with optimizations disabled so startup skips graph optimization. The cache is
+    rebuilt when the model is newer. Graphs optimized at level 'all' may use hardware-specific kernels, so caches are
+    only valid on the host that wrote them.
+    """
+    import onnxruntime as ort
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    assert opt in levels, f"invalid ONNX Runtime optimization level '{opt}', valid levels are {list(levels)}"
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = threads
+    so.inter_op_num_threads = inter_threads
+    so.execution_mode = ort.ExecutionMode.ORT_PARALLEL if parallel else ort.ExecutionMode.ORT_SEQUENTIAL
+    so.enable_cpu_mem_arena = arena
+    so.graph_optimization_level = levels[opt]
+    providers = ["CUDAExecutionProvider", "CPUExecutionProvider"] if cuda else ["CPUExecutionProvider"]
+    if not cache or opt == "disable":
+        return ort.InferenceSession(w, so, providers=providers)
+
+    f = Path(w).with_name(f"{Path(w).stem}.ort{ort.__version__}-{'cuda' if cuda else 'cpu'}-{opt}.onnx")  # cache
+    if f.exists() and f.stat().st_mtime >= Path(w).stat().st_mtime:
+        LOGGER.info(f"Loading optimized graph from {f}")
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(str(f), so, providers=providers)
+    tmp = f.with_suffix(f".{os.getpid()}.tmp")  # written by ONNX Runtime, then renamed atomically
+    so.optimized_model_filepath = str(tmp)
+    session = ort.InferenceSession(w, so, providers=providers)
+    try:
+        tmp.replace(f)
+        LOGGER.info(f"Saved optimized graph to {f}")
+    except OSError as e:
+        LOGGER.warning(f"WARNING ⚠️ ONNX Runtime graph cache {f} not saved: {e}")
+    return session
+
+
+def jit_load(w, device, fp16=False, cache=None):
+    """
+    Loads TorchScript model `w` to `device` in FP16 or FP32, returning (model, metadata json string).
+
+    With a `cache` directory, the model is frozen (weights inlined as constants, constant folding and conv-bn folding
+    applied) and saved there keyed by model file hash, torch version, device and precision, and later loads use the
+    frozen module, which loads and runs its first inferences faster.
+    """
+    extra_files = {"config.txt": ""}  # model metadata
+    f = None
+    if cache:
+        key = f"{file_hash(w)}-torch{torch.__version__.split('+')[0]}-{device.type}-{'fp16' if fp16 else 'fp32'}"
+        f = Path(cache) / f"{Path(w).stem}-{key}.torchscript"
+        if f.exists():
+            LOGGER.info(f"Loading frozen TorchScript model from {f}")
+            return torch.jit.load(f, _extra_files=extra_files, map_location=device), extra_files["config.txt"]
+    model = torch.jit.load(w, _extra_files=extra_files, map_location=device)
+    model.half() if fp16 else model.float()
+    if f:
+        model = torch.jit.freeze(model.eval())
+        try:
+            f.parent.mkdir(parents=True, exist_ok=True)
+            tmp = f.with_suffix(f".{os.getpid()}.tmp")  # renamed atomically, concurrent loaders never see partial files
+            torch.jit.save(model, tmp, _extra_files=extra_files)
+            tmp.replace(f)
+            LOGGER.info(f"Saved frozen TorchScript model to {f}")
+        except OSError as e:
+            LOGGER.warning(f"WARNING ⚠️ TorchScript cache {f} not saved: {e}")
+    return model, extra_files["config.txt"]
+
+
+COMPILE_SHAPES = (320, 416, 640, (384, 640), (480, 640))  # squares, 16:9 and 4:3 letterboxes at 640
+
+
+def parse_shapes(args):
+    """Parses ['640', '384x640'] style SIZE or HxW strings to compile shape buckets, i.e. for --compile, COMPILE_SHAPES
+    if empty and None if `args` is None.
+    """
+    if args is None:
+        return None
+    return [tuple(int(x) for x in s.split("x")) if "x" in s else int(s) for s in args] or list(COMPILE_SHAPES)
+
+
+class ShapeBuckets:
+    """
+    torch.compile() inference of a PyTorch model for a fixed set of input shapes, or buckets.
+
+    The model is compiled once per bucket (height, width) with static shapes, so each graph is specialized for its size.
+    Inputs run on the smallest bucket they fit, padded bottom-right with letterbox grey so box coordinates are
+    unchanged, and the predictions of grid cells in the padding are dropped so only cells eager inference would have
+    remain; inputs larger than every bucket run eagerly, as do all inputs if compilation fails. Buckets are compiled
+    for the warmup batch size, other batch sizes compile on first use.
+
+    Compiled calls build the Detect grids in-graph, eager calls keep using the stored grids. To hold up to 4 batch sizes
+    per bucket, the process-wide torch._dynamo recompile limit is raised to 4 x buckets if lower, which also applies to
+    any other compiled model in the process.
+    """
+
+    def __init__(self, model, shapes=COMPILE_SHAPES, stride=32):
+        """Wraps PyTorch `model` for buckets `shapes`, each a square size or (h, w), rounded up to multiples of
+        `stride`.
+        """
+        shapes = ((s, s) if isinstance(s, int) else tuple(s) for s in shapes)
+        self.shapes = sorted({tuple(make_divisible(x, stride) for x in s) for s in shapes}, key=lambda s: s[0] * s[1])
+        self.detect = [m for m in model.modules() if hasattr(m, "grids")]  # Detect
+        self.masks = {}  # (bucket, h, w): prediction rows of grid cells inside the unpadded input
+        config = torch._dynamo.config
+        limit = "recompile_limit" if hasattr(config, "recompile_limit") else "cache_size_limit"  # renamed in torch 2.7
+        setattr(config, limit, max(getattr(config, limit), 4 * len(self.shapes)))  # up to 4 batch sizes per bucket
+        self.model = model
+        self.compiled = torch.compile(model, dynamic=False)
+        self.eager = False  # compilation failed
+
+    def bucket(self, h, w):
+        """Returns the smallest bucket (h, w) holding an `h` x `w` input, None if none does."""
+        return next((s for s in self.shapes if s[0] >= h and s[1] >= w), None)
+
+    @smart_inference_mode()
+    def warmup(self, batch_size=1, dtype=torch.float, device="cpu"):
+        """Compiles all buckets for `batch_size`, `dtype` and `device` inputs, runs eagerly if compilation fails."""
+        try:
+            with Profile() as dt:
+                for h, w in self.shapes:
+                    self.run(torch.zeros(batch_size, 3, h, w, dtype=dtype, device=device))
+        except Exception as e:
+            LOGGER.warning(f"WARNING ⚠️ torch.compile() failed, falling back to eager inference: {e}")
+            self.eager = True
+            return
+        shapes = ", ".join(f"{h}x{w}" for h, w in self.shapes)
+        LOGGER.info(f"Compiled {shapes} buckets for batch size {batch_size} in {dt.t:.1f}s")
+
+    def __call__(self, im):
+        """Runs BCHW batch `im` on its bucket's compiled graph, or eagerly if no bucket holds it."""
+        h, w = im.shape[2:]
+        s = None if self.eager else self.bucket(h, w)
+        if s is None:
+            return self.model(im)
+        if (h, w) == s:
+            return self.run(im)
+        y = self.run(nn.functional.pad(im, (0, s[1] - w, 0, s[0] - h), value=114 / 255))
+        return (y[0][:, self.mask(s, h, w)], *y[1:])  # drop the padding cells
+
+    def mask(self, s, h, w):
+        """Returns a boolean mask of the Detect output rows of bucket `s` whose grid cells overlap an `h` x `w` input."""
+        key = s, h, w
+        if key not in self.masks:
+            m, masks = self.detect[-1], []
+            for st in m.stride.tolist():
+                ny, nx = round(s[0] / st), round(s[1] / st)
+                x = torch.zeros(m.na, ny, nx, dtype=torch.bool)
+                x[:, : math.ceil(h / st), : math.ceil(w / st)] = True
+                masks.append(x.flatten())
+            self.masks[key] = torch.cat(masks).to(m.anchors.device)
+        return self.masks[key]
+
+    def run(self, im):
+        """Runs `im` on the compiled model with Detect dynamic=True, as stored grids would recompile it on every shape
+        change, restoring dynamic for eager calls.
+        """
+        dynamic = [m.dynamic for m in self.detect]
+        for m in self.detect:
+            m.dynamic = True  # build grids in-graph
+        try:
+            return self.compiled(im)
+        finally:
+            for m, d in zip(self.detect, dynamic):
+                m.dynamic = d
+
+
 class DetectMultiBackend(nn.Module):
     """YOLOv5 MultiBackend class for inference on various backends including PyTorch, ONNX, TensorRT, and more."""
 
-    def __init__(self, weights="yolov5s.pt", device=torch.device("cpu"), dnn=False, data=None, fp16=False, fuse=True):
-        """Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX."""
+    def __init__(
+        self,
+        weights="yolov5s.pt",
+        device=torch.device("cpu"),
+        dnn=False,
+        data=None,
+        fp16=False,
+        fuse=True,
+        ort=None,
+        compile_cache=None,
+        memory_format=None,
+        autocast=None,
+        compile_shapes=None,
+    ):
+        """
+        Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX.
+
+        `ort` is an optional dict of ONNX Runtime session options, see ORT_OPTIONS. `compile_cache` is an optional
+        directory caching compiled models across runs: frozen TorchScript modules and OpenVINO compiled blobs.
+        `memory_format` ('channels_last') and `autocast` ('bfloat16' or 'float16') set the input memory format and
+        autocast dtype of PyTorch and TorchScript models, i.e. channels-last BF16 convolutions on x86 CPUs.
+        `compile_shapes` is an optional list of input shape buckets, see ShapeBuckets, PyTorch models are then run by
+        torch.compile() and compiled for all buckets on warmup().
+        """
         #   PyTorch:              weights = *.pt
         #   TorchScript:                    *.torchscript
         #   ONNX Runtime:                   *.onnx
@@ -473,32 +723,62 @@ class DetectMultiBackend(nn.Module):
         #   TensorFlow Lite:                *.tflite
         #   TensorFlow Edge TPU:            *_edgetpu.tflite
         #   PaddlePaddle:                   *_paddle_model
+        #   PyTorch memory-mapped:          *.safetensors
         from models.experimental import attempt_download, attempt_load  # scoped to avoid circular import
 
         super().__init__()
         w = str(weights[0] if isinstance(weights, list) else weights)
-        pt, jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, triton = self._model_type(w)
+        pt, jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, safetensors, triton = (
+            self._model_type(w)
+        )
+        pt |= safetensors  # fused PyTorch model once loaded
         fp16 &= pt or jit or onnx or engine or triton  # FP16
         nhwc = coreml or saved_model or pb or tflite or edgetpu  # BHWC formats (vs torch BCWH)
         stride = 32  # default stride
+        end2end = False  # NMS included in model, outputs (b, max_det, 6)
+        buckets = None  # torch.compile() shape buckets
         cuda = torch.cuda.is_available() and device.type != "cpu"  # use CUDA
+        if (memory_format or autocast) and not (pt or jit):
+            LOGGER.warning("WARNING ⚠️ memory_format and autocast only apply to PyTorch and TorchScript models")
+            memory_format = autocast = None
+        if compile_shapes and not pt:
+            LOGGER.warning("WARNING ⚠️ compile_shapes only applies to PyTorch models")
+            compile_shapes = None
+        if isinstance(memory_format, str):
+            memory_format = getattr(torch, memory_format)  # i.e. 'channels_last' to torch.channels_last
+        if isinstance(autocast, str):
+            autocast = getattr(torch, autocast)  # i.e. 'bfloat16' to torch.bfloat16
         if not (pt or triton):
             w = attempt_download(w)  # download if not local
 
         if pt:  # PyTorch
-            model = attempt_load(weights if isinstance(weights, list) else w, device=device, inplace=True, fuse=fuse)
+            if safetensors:  # fused weights, memory-mapped
+                LOGGER.info(f"Loading {w} for PyTorch inference from memory-mapped weights...")
+                from utils.safetensors import load_model
+
+                model = load_model(w, device)
+            else:
+                model = attempt_load(
+                    weights if isinstance(weights, list) else w, device=device, inplace=True, fuse=fuse
+                )
             stride = max(int(model.stride.max()), 32)  # model stride
             names = model.module.names if hasattr(model, "module") else model.names  # get class names
             model.half() if fp16 else model.float()
+            if memory_format:  # Conv weights only, model.to(memory_format) would also convert the 5D Detect grids
+                for m in model.modules():
+                    if isinstance(m, nn.Conv2d):
+                        m.weight.data = m.weight.data.contiguous(memory_format=memory_format)
             self.model = model  # explicitly assign for to(), cpu(), cuda(), half()
+            if compile_shapes:
+                buckets = ShapeBuckets(model, compile_shapes, stride)
         elif jit:  # TorchScript
             LOGGER.info(f"Loading {w} for TorchScript inference...")
-            extra_files = {"config.txt": ""}  # model metadata
-            model = torch.jit.load(w, _extra_files=extra_files, map_location=device)
-            model.half() if fp16 else model.float()
-            if extra_files["config.txt"]:  # load metadata dict
+            model, config = jit_load(w, device, fp16, compile_cache)
+            if memory_format:
+                model.to(memory_format=memory_format)
+            if config:  # load metadata dict
                 d = json.loads(
-                    extra_files["config.txt"],
+                    config,
                     object_hook=lambda d: {int(k) if k.isdigit() else k: v for k, v in d.items()},
                 )
                 stride, names = int(d["stride"]), d["names"]
@@ -509,14 +789,14 @@ class DetectMultiBackend(nn.Module):
         elif onnx:  # ONNX Runtime
             LOGGER.info(f"Loading {w} for ONNX Runtime inference...")
             check_requirements(("onnx", "onnxruntime-gpu" if cuda else "onnxruntime"))
-            import onnxruntime
-
-            providers = ["CUDAExecutionProvider", "CPUExecutionProvider"] if cuda else ["CPUExecutionProvider"]
-            session = onnxruntime.InferenceSession(w, providers=providers)
+            ort = {**ORT_OPTIONS, **(ort or {})}
+            io_binding = ort.pop("io_binding")
+            session = ort_session(w, cuda, **ort)
             output_names = [x.name for x in session.get_outputs()]
             meta = session.get_modelmeta().custom_metadata_map  # metadata
             if "stride" in meta:
                 stride, names = int(meta["stride"]), eval(meta["names"])
+            end2end = "nms" in meta  # exported with --nms
         elif xml:  # OpenVINO
             LOGGER.info(f"Loading {w} for OpenVINO inference...")
             check_requirements("openvino>=2023.0")  # requires openvino-dev: https://pypi.org/project/openvino-dev/
@@ -529,9 +809,11 @@ class DetectMultiBackend(nn.Module):
             if ov_model.get_parameters()[0].get_layout().empty:
                 ov_model.get_parameters()[0].set_layout(Layout("NCHW"))
             batch_dim = get_batch(ov_model)
+            if compile_cache:  # compiled blobs are keyed by OpenVINO on model hash, version, device and properties
+                core.set_property({"CACHE_DIR": str(Path(compile_cache) / "openvino")})
+            ov_compiled_model = core.compile_model(ov_model, device_name="AUTO")  # AUTO selects best device
             if batch_dim.is_static:
                 batch_size = batch_dim.get_length()
-            ov_compiled_model = core.compile_model(ov_model, device_name="AUTO")  # AUTO selects best available device
             stride, names = self._load_metadata(Path(w).with_suffix(".yaml"))  # load metadata
         elif engine:  # TensorRT
             LOGGER.info(f"Loading {w} for TensorRT inference...")
@@ -684,17 +966,42 @@ class DetectMultiBackend(nn.Module):
         if self.nhwc:
             im = im.permute(0, 2, 3, 1)  # torch BCHW to numpy BHWC shape(1,320,192,3)
 
-        if self.pt:  # PyTorch
-            y = self.model(im, augment=augment, visualize=visualize) if augment or visualize else self.model(im)
-        elif self.jit:  # TorchScript
-            y = self.model(im)
+        if self.pt or self.jit:  # PyTorch, TorchScript
+            if self.memory_format:
+                im = im.contiguous(memory_format=self.memory_format)  # propagates through the convolutions
+            with torch.autocast(self.device.type, dtype=self.autocast) if self.autocast else contextlib.nullcontext():
+                if self.jit:
+                    y = self.model(im)
+                elif self.buckets and not (augment or visualize):
+                    y = self.buckets(im)
+                else:
+                    y = self.model(im, augment=augment, visualize=visualize) if augment or visualize else self.model(im)
+            if self.autocast:  # outputs to FP32
+                y = y.float() if isinstance(y, torch.Tensor) else [x.float() if torch.is_tensor(x) else x for x in y]
         elif self.dnn:  # ONNX OpenCV DNN
             im = im.cpu().numpy()  # torch to numpy
             self.net.setInput(im)
             y = self.net.forward()
         elif self.onnx:  # ONNX Runtime
-            im = im.cpu().numpy()  # torch to numpy
-            y = self.session.run(self.output_names, {self.session.get_inputs()[0].name: im})
+            if self.io_binding:  # run on the input tensor's own buffer and preallocated outputs
+                im = im.contiguous()
+                device_type, device_id = im.device.type, im.device.index or 0
+                binding = self.session.io_binding()
+                binding.bind_input(
+                    name=self.session.get_inputs()[0].name,
+                    device_type=device_type,
+                    device_id=device_id,
+                    element_type=np.float16 if im.dtype == torch.float16 else np.float32,
+                    shape=tuple(im.shape),
+                    buffer_ptr=im.data_ptr(),
+                )
+                for name in self.output_names:
+                    binding.bind_output(name, device_type, device_id)
+                self.session.run_with_iobinding(binding)
+                y = binding.copy_outputs_to_cpu()
+            else:
+                im = im.cpu().numpy()  # torch to numpy
+                y = self.session.run(self.output_names, {self.session.get_inputs()[0].name: im})
         elif self.xml:  # OpenVINO
             im = im.cpu().numpy()  # FP32
             y = list(self.ov_compiled_model(im).values())
@@ -763,8 +1070,14 @@ class DetectMultiBackend(nn.Module):
         return torch.from_numpy(x).to(self.device) if isinstance(x, np.ndarray) else x
 
     def warmup(self, imgsz=(1, 3, 640, 640)):
-        """Performs a single inference warmup to initialize model weights, accepting an `imgsz` tuple for image size."""
+        """
+        Performs a single inference warmup to initialize model weights, accepting an `imgsz` tuple for image size.
+
+        Also compiles all torch.compile() shape buckets for batch size `imgsz[0]`, on CPU too.
+        """
         warmup_types = self.pt, self.jit, self.onnx, self.engine, self.saved_model, self.pb, self.triton
+        if self.buckets:  # compile all buckets, on CPU too
+            self.buckets.warmup(imgsz[0], torch.half if self.fp16 else torch.float, self.device)
         if any(warmup_types) and (self.device.type != "cpu" or self.triton):
             im = torch.empty(*imgsz, dtype=torch.half if self.fp16 else torch.float, device=self.device)  # input
             for _ in range(2 if self.jit else 1):  #
@@ -777,11 +1090,10 @@ class DetectMultiBackend(nn.Module):
 
         Example: path='path/to/model.onnx' -> type=onnx
         """
-        # types = [pt, jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle]
-        from export import export_formats
+        # types = [pt, jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, safetensors]
         from utils.downloads import is_url
 
-        sf = list(export_formats().Suffix)  # export suffixes
+        sf = [x[2] for x in EXPORT_FORMATS]  # export suffixes
         if not is_url(p, check=False):
             check_suffix(p, sf)  # checks
         url = urlparse(p)  # if url may be Triton inference server
@@ -799,6 +1111,124 @@ class DetectMultiBackend(nn.Module):
         return None, None
 
 
+class Cascade(nn.Module):
+    """
+    Confidence-based cascade of DetectMultiBackend models, ordered from fastest to most accurate.
+
+    All images go through the first stage. Images with uncertain detections according to `rule` are escalated to the next
+    stage, and the last stage always answers. Outputs are NMS-applied (b, n, 6) zero-padded [xyxy, conf, cls] detections,
+    like models exported with --nms, and the index of the stage that answered each image.
+
+    Rules:
+        'max_conf': the highest detection confidence of an image lies within `band` [low, high)
+        'count': the number of boxes above band[0] differs from the number above band[1], i.e. some box is uncertain
+        callable: rule(det) -> bool for the (n, 6) detections of one image
+
+    Usage:
+        model = Cascade(['yolov5n.pt', 'yolov5s.pt'], device, band=(0.25, 0.6))
+        det, stage = model(im)
+        LOGGER.info(model.summary())
+    """
+
+    conf = 0.25  # NMS confidence threshold
+    iou = 0.45  # NMS IoU threshold
+    agnostic = False  # NMS class-agnostic
+    multi_label = False  # NMS multiple labels per box
+    classes = None  # (optional list) filter by class, i.e. = [0, 15, 16] for COCO persons, cats and dogs
+    max_det = 1000  # maximum number of detections per image
+
+    def __init__(
+        self,
+        weights,
+        device=torch.device("cpu"),
+        dnn=False,
+        data=None,
+        fp16=False,
+        fuse=True,
+        rule="max_conf",
+        band=(0.25, 0.6),
+    ):
+        """Initializes a cascade of DetectMultiBackend models from a list of `weights` and an escalation `rule` with
+        confidence `band`.
+        """
+        super().__init__()
+        assert len(weights) > 1, "Cascade requires at least 2 models"
+        assert callable(rule) or rule in {"max_conf", "count"}, f"invalid Cascade rule '{rule}'"
+        self.models = nn.ModuleList(DetectMultiBackend(w, device, dnn, data, fp16, fuse) for w in weights)
+        self.rule, self.band = rule, band
+        m = self.models[-1]  # final stage
+        assert all(len(x.names) == len(m.names) for x in self.models), "Cascade models have different class counts"
+        self.names, self.device, self.fp16 = m.names, m.device, m.fp16
+        self.stride = max(int(x.stride) for x in self.models)
+        self.pt, self.jit, self.engine = (all(getattr(x, k) for x in self.models) for k in ("pt", "jit", "engine"))
+        self.batch_size = min(getattr(x, "batch_size", 1) for x in self.models) if self.engine else 1
+        self.end2end = True  # outputs are NMS-applied
+        self.dt = [Profile(device=self.device) for _ in self.models]  # per-stage inference + NMS time
+        self.seen = [0] * len(self.models)  # images run per stage
+        self.answered = [0] * len(self.models)  # images answered per stage
+
+    def escalate(self, det):
+        """Returns True if the (n, 6) detections of one image are uncertain and the image goes to the next stage."""
+        if callable(self.rule):
+            return bool(self.rule(det))
+        lo, hi = self.band
+        conf = det[:, 4]
+        if self.rule == "max_conf":
+            return len(conf) > 0 and lo <= float(conf.max()) < hi
+        return int((conf >= lo).sum()) != int((conf >= hi).sum())  # 'count'
+
+    def forward(self, im, augment=False, visualize=False):
+        """Runs the cascade on a BCHW batch, returning (b, n, 6) detections and the (b,) answering stage indices."""
+        b = im.shape[0]
+        out = [None] * b
+        stage = torch.zeros(b, dtype=torch.long, device=im.device)
+        idx = list(range(b))  # images still in the cascade
+        for i, m in enumerate(self.models):
+            with self.dt[i]:
+                x = im if len(idx) == b else im[torch.tensor(idx, device=im.device)]
+                pred = m(x, augment=augment, visualize=visualize)
+                pred = non_max_suppression(
+                    pred,
+                    self.conf,
+                    self.iou,
+                    self.classes,
+                    self.agnostic,
+                    self.multi_label,
+                    max_det=self.max_det,
+                    end2end=m.end2end,
+                )
+            self.seen[i] += len(idx)
+            last, escalated = i == len(self.models) - 1, []
+            for j, det in zip(idx, pred):
+                if not last and self.escalate(det):
+                    escalated.append(j)
+                else:
+                    out[j], stage[j] = det, i
+                    self.answered[i] += 1
+            if not escalated:
+                break
+            idx = escalated
+        y = torch.zeros((b, max(len(x) for x in out), 6), device=im.device)
+        for j, x in enumerate(out):
+            y[j, : len(x)] = x
+        return y, stage
+
+    def warmup(self, imgsz=(1, 3, 640, 640)):
+        """Warms up all stages, see DetectMultiBackend.warmup()."""
+        for m in self.models:
+            m.warmup(imgsz)
+
+    def summary(self):
+        """Returns a string with the images run, answered and the latency per image of each stage."""
+        n = max(self.seen[0], 1)
+        s = (
+            f"stage {i}: {self.answered[i] / n:.1%} answered, {self.seen[i] / n:.1%} run, "
+            f"{p.t / max(self.seen[i], 1) * 1e3:.1f}ms/img"
+            for i, p in enumerate(self.dt)
+        )
+        return f"Cascade ({self.rule if isinstance(self.rule, str) else 'custom'} {self.band}): {'; '.join(s)}"
+
+
 class AutoShape(nn.Module):
     """AutoShape class for robust YOLOv5 inference with preprocessing, NMS, and support for various input formats."""
 
@@ -808,7 +1238,12 @@ class AutoShape(nn.Module):
     multi_label = False  # NMS multiple labels per box
     classes = None  # (optional list) filter by class, i.e. = [0, 15, 16] for COCO persons, cats and dogs
     max_det = 1000  # maximum number of detections per image
-    amp = False  # Automatic Mixed Precision (AMP) inference
+    amp = False  # Automatic Mixed Precision (AMP) inference, CUDA only unless amp_dtype is set
+    amp_dtype = None  # AMP dtype, i.e. torch.bfloat16 to enable AMP on CPU, defaults to float16 on CUDA
+    memory_format = None  # inference input memory format, i.e. torch.channels_last
+    tile = None  # (optional int or (h, w)) sliced inference tile size, i.e. = 640 for 4K images
+    tile_overlap = 0.2  # fractional overlap between tiles
+    tile_full = False  # add a full-frame pass to tiled inference
 
     def __init__(self, model, verbose=True):
         """Initializes YOLOv5 model for inference, setting up attributes and preparing model for evaluation."""
@@ -860,10 +1295,12 @@ class AutoShape(nn.Module):
             if isinstance(size, int):  # expand
                 size = (size, size)
             p = next(self.model.parameters()) if self.pt else torch.empty(1, device=self.model.device)  # param
-            autocast = self.amp and (p.device.type != "cpu")  # Automatic Mixed Precision (AMP) inference
+            autocast = self.amp and (p.device.type != "cpu" or self.amp_dtype is not None)  # AMP inference
             if isinstance(ims, torch.Tensor):  # torch
-                with amp.autocast(autocast):
-                    return self.model(ims.to(p.device).type_as(p), augment=augment)  # inference
+                with torch.autocast(p.device.type, dtype=self.amp_dtype) if autocast else contextlib.nullcontext():
+                    x = ims.to(p.device).type_as(p)
+                    x = x.contiguous(memory_format=self.memory_format) if self.memory_format else x
+                    return self.model(x, augment=augment)  # inference
 
             # Pre-process
             n, ims = (len(ims), list(ims)) if isinstance(ims, (list, tuple)) else (1, [ims])  # number, list of images
@@ -884,56 +1321,171 @@ class AutoShape(nn.Module):
                 g = max(size) / max(s)  # gain
                 shape1.append([int(y * g) for y in s])
                 ims[i] = im if im.data.contiguous else np.ascontiguousarray(im)  # update
-            shape1 = [make_divisible(x, self.stride) for x in np.array(shape1).max(0)]  # inf shape
-            x = [letterbox(im, shape1, auto=False)[0] for im in ims]  # pad
-            x = np.ascontiguousarray(np.array(x).transpose((0, 3, 1, 2)))  # stack and BHWC to BCHW
-            x = torch.from_numpy(x).to(p.device).type_as(p) / 255  # uint8 to fp16/32
-
-        with amp.autocast(autocast):
+            if self.tile:  # all tiles of all images in one batch
+                assert not (self.dmb and self.model.end2end), "tile requires raw model outputs, not --nms exports"
+                tile = (self.tile, self.tile) if isinstance(self.tile, int) else self.tile
+                tile = [make_divisible(x, self.stride) for x in tile]
+                x, transforms, counts = tile_images(ims, tile, self.tile_overlap, self.tile_full, bgr2rgb=False)
+                x = torch.from_numpy(x).to(p.device).type_as(p) / 255  # uint8 to fp16/32
+            else:
+                shape1 = [make_divisible(x, self.stride) for x in np.array(shape1).max(0)]  # inf shape
+                lb = LetterboxBuffer(shape1, auto=False)  # per call for thread safety
+                x = np.empty((n, 3, *shape1), dtype=np.float32)  # BCHW 0-1 batch
+                for im, out in zip(ims, x):
+                    lb(im, out=out, bgr2rgb=False)  # pad, HWC to CHW and uint8 to float straight into the batch
+                x = torch.from_numpy(x).to(p.device).type_as(p)  # to fp16/32
+            if self.memory_format:
+                x = x.contiguous(memory_format=self.memory_format)
+
+        with torch.autocast(p.device.type, dtype=self.amp_dtype) if autocast else contextlib.nullcontext():
             # Inference
             with dt[1]:
                 y = self.model(x, augment=augment)  # forward
 
             # Post-process
             with dt[2]:
-                y = non_max_suppression(
-                    y if self.dmb else y[0],
-                    self.conf,
-                    self.iou,
-                    self.classes,
-                    self.agnostic,
-                    self.multi_label,
-                    max_det=self.max_det,
-                )  # NMS
-                for i in range(n):
-                    scale_boxes(shape1, y[i][:, :4], shape0[i])
+                if self.tile:  # merge tiles in image pixels with one NMS per image
+                    y = [
+                        non_max_suppression(
+                            yi, self.conf, self.iou, self.classes, self.agnostic, self.multi_label, max_det=self.max_det
+                        )[0]
+                        for yi in merge_tiles(y if self.dmb else y[0], transforms, counts)
+                    ]
+                    for i in range(n):
+                        clip_boxes(y[i][:, :4], shape0[i])
+                else:
+                    y = non_max_suppression(
+                        y if self.dmb else y[0],
+                        self.conf,
+                        self.iou,
+                        self.classes,
+                        self.agnostic,
+                        self.multi_label,
+                        max_det=self.max_det,
+                        end2end=self.dmb and self.model.end2end,
+                    )  # NMS
+                    for i in range(n):
+                        scale_boxes(shape1, y[i][:, :4], shape0[i])
 
             return Detections(ims, y, files, dt, self.names, x.shape)
 
 
 class Detections:
-    """Manages YOLOv5 detection results with methods for visualization, saving, cropping, and exporting detections."""
+    """
+    Manages YOLOv5 detection results with methods for visualization, saving, cropping, and exporting detections.
+
+    Detections of all images are stored as one packed (n, 6) [xyxy, conf, cls] tensor `data`, with image i in rows
+    `offsets[i]:offsets[i + 1]`. Per-image `pred`/`xyxy` are views of it, and the xywh, xyxyn and xywhn formats are
+    computed once for the whole batch on first access.
+    """
+
+    formats = "xyxy", "xyxyn", "xywh", "xywhn"  # box formats
 
     def __init__(self, ims, pred, files, times=(0, 0, 0), names=None, shape=None):
         """Initializes the YOLOv5 Detections class with image info, predictions, filenames, timing and normalization."""
         super().__init__()
-        d = pred[0].device  # device
-        gn = [torch.tensor([*(im.shape[i] for i in [1, 0, 1, 0]), 1, 1], device=d) for im in ims]  # normalizations
+        self.data = pred[0] if len(pred) == 1 else torch.cat(pred)  # packed (n, 6) detections of all images
+        self.offsets = np.cumsum([0, *(len(x) for x in pred)])  # image i rows offsets[i]:offsets[i + 1]
         self.ims = ims  # list of images as numpy arrays
-        self.pred = pred  # list of tensors pred[0] = (xyxy, conf, cls)
+        self.pred = self._split(self.data)  # list of tensors pred[0] = (xyxy, conf, cls)
         self.names = names  # class names
         self.files = files  # image filenames
         self.times = times  # profiling times
-        self.xyxy = pred  # xyxy pixels
-        self.xywh = [xyxy2xywh(x) for x in pred]  # xywh pixels
-        self.xyxyn = [x / g for x, g in zip(self.xyxy, gn)]  # xyxy normalized
-        self.xywhn = [x / g for x, g in zip(self.xywh, gn)]  # xywh normalized
+        self.xyxy = self.pred  # xyxy pixels
         self.n = len(self.pred)  # number of images (batch size)
         self.t = tuple(x.t / self.n * 1e3 for x in times)  # timestamps (ms)
         self.s = tuple(shape)  # inference BCHW shape
+        self._packed = {"xyxy": self.data}  # packed tensors per box format
+        self._numpy = {}  # packed CPU arrays per box format
+
+    def _split(self, x):
+        """Splits a packed (n, 6) tensor into per-image views."""
+        return [x[a:b] for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def packed(self, fmt="xyxy"):
+        """Returns the packed (n, 6) detections tensor of all images in box format `fmt`, computed on first use."""
+        if fmt not in self._packed:
+            x = self.data
+            if fmt.startswith("xywh"):
+                x = torch.cat((xyxy2xywh(x[:, :4]), x[:, 4:]), 1)
+            if fmt.endswith("n"):  # normalize by image width and height
+                wh = torch.tensor([im.shape[1::-1] for im in self.ims], device=x.device, dtype=x.dtype)
+                gn = torch.cat((wh, wh, torch.ones_like(wh)), 1)  # (images, 6) [w, h, w, h, 1, 1]
+                x = x / gn.repeat_interleave(torch.from_numpy(np.diff(self.offsets)).to(x.device), 0)
+            self._packed[fmt] = x
+        return self._packed[fmt]
+
+    @cached_property
+    def xywh(self):
+        """Per-image xywh pixel detections."""
+        return self._split(self.packed("xywh"))
+
+    @cached_property
+    def xyxyn(self):
+        """Per-image xyxy normalized detections."""
+        return self._split(self.packed("xyxyn"))
+
+    @cached_property
+    def xywhn(self):
+        """Per-image xywh normalized detections."""
+        return self._split(self.packed("xywhn"))
+
+    def numpy(self, fmt="xyxy"):
+        """
+        Returns the packed (n, 6) detections of all images in box format `fmt` as a NumPy array, and the image offsets.
+
+        CPU results are zero-copy views of the packed tensor. Example: a, offsets = results.numpy(); a[offsets[0] :
+        offsets[1]].
+        """
+        if fmt not in self._numpy:
+            self._numpy[fmt] = self.packed(fmt).detach().cpu().float().numpy()
+        return self._numpy[fmt], self.offsets
+
+    def arrow(self, fmt="xyxy"):
+        """Returns detections of all images in box format `fmt` as a pyarrow Table with an 'image' index column and a
+        dictionary-encoded 'name' column.
+        """
+        check_requirements("pyarrow")
+        import pyarrow as pa
+
+        a, _ = self.numpy(fmt)
+        cols = ("xmin", "ymin", "xmax", "ymax") if fmt.startswith("xyxy") else ("xcenter", "ycenter", "width", "height")
+        a = np.ascontiguousarray(a.T)  # columns, one copy
+        cls = a[5].astype(np.int32)
+        names = pa.array([self.names[i] for i in range(len(self.names))])
+        return pa.table(
+            {
+                "image": np.repeat(np.arange(self.n, dtype=np.int32), np.diff(self.offsets)),
+                **{c: a[i] for i, c in enumerate(cols)},
+                "confidence": a[4],
+                "class": cls,
+                "name": pa.DictionaryArray.from_arrays(cls, names),
+            }
+        )
+
+    def json(self, i=None, fmt="xyxy", decimals=None):
+        """
+        Returns detections of image `i` in box format `fmt` as a JSON string of records, like pandas().xyxy[i].to_json(
+        orient='records') without pandas, or a JSON list of such lists for all images if `i` is None.
+
+        Boxes are rounded to `decimals`, by default 2 for pixel and 6 for normalized formats.
+        """
+        a, o = self.numpy(fmt)
+        d = decimals if decimals is not None else 6 if fmt.endswith("n") else 2
+        cols = ("xmin", "ymin", "xmax", "ymax") if fmt.startswith("xyxy") else ("xcenter", "ycenter", "width", "height")
+        row = "{" + ",".join(f'"{c}":%.{d}f' for c in cols) + ',"confidence":%.6f,"class":%d,"name":%s}'
+        names = [json.dumps(self.names[j]) for j in range(len(self.names))]
+
+        def records(j):
+            """JSON records of image j."""
+            return f"[{','.join(row % (*x[:5], x[5], names[int(x[5])]) for x in a[o[j] : o[j + 1]].tolist())}]"
+
+        return records(i) if i is not None else f"[{','.join(records(j) for j in range(self.n))}]"
 
     def _run(self, pprint=False, show=False, save=False, crop=False, render=False, labels=True, save_dir=Path("")):
         """Executes model predictions, displaying and/or saving outputs with optional crops and labels."""
+        from ultralytics.utils.plotting import Annotator, colors, save_one_box  # scoped for faster imports
+
         s, crops = "", []
         for i, (im, pred) in enumerate(zip(self.ims, self.pred)):
             s += f"\nimage {i + 1}/{len(self.pred)}: {im.shape[0]}x{im.shape[1]} "  # string
@@ -1024,12 +1576,18 @@ class Detections:
 
         Example: print(results.pandas().xyxy[0]).
         """
+        import pandas as pd  # scoped for faster 'import models.common'
+
+        pd.options.display.max_columns = 10
         new = copy(self)  # return copy
         ca = "xmin", "ymin", "xmax", "ymax", "confidence", "class", "name"  # xyxy columns
         cb = "xcenter", "ycenter", "width", "height", "confidence", "class", "name"  # xywh columns
-        for k, c in zip(["xyxy", "xyxyn", "xywh", "xywhn"], [ca, ca, cb, cb]):
-            a = [[x[:5] + [int(x[5]), self.names[int(x[5])]] for x in x.tolist()] for x in getattr(self, k)]  # update
-            setattr(new, k, [pd.DataFrame(x, columns=c) for x in a])
+        names = np.array([self.names[i] for i in range(len(self.names))], dtype=object)
+        for k, c in zip(self.formats, [ca, ca, cb, cb]):
+            a, o = self.numpy(k)
+            cls = a[:, 5].astype(int)
+            df = pd.DataFrame({**dict(zip(c[:5], a[:, :5].astype(np.float64).T)), "class": cls, "name": names[cls]})
+            setattr(new, k, [df.iloc[i:j].reset_index(drop=True) for i, j in zip(o[:-1], o[1:])])
         return new
 
     def tolist(self):
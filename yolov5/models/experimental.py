@@ -2,12 +2,14 @@
 """Experimental modules."""
 
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import torch
 import torch.nn as nn
 
 from utils.downloads import attempt_download
+from utils.general import Profile
 
 
 class Sum(nn.Module):
@@ -70,30 +72,74 @@ class MixConv2d(nn.Module):
 
 
 class Ensemble(nn.ModuleList):
-    """Ensemble of models."""
+    """
+    Ensemble of models, run one after another or concurrently.
+
+    With strategy='thread' each member runs in its own thread with an equal share of the intra-op threads, which overlaps
+    members on many-core CPUs since PyTorch ops release the GIL. Per-member latencies are accumulated in `dt`.
+    """
 
-    def __init__(self):
-        """Initializes an ensemble of models to be used for aggregated predictions."""
+    def __init__(self, strategy="sequential"):
+        """Initializes an ensemble of models to be used for aggregated predictions, with strategy 'sequential' or
+        'thread'.
+        """
         super().__init__()
+        assert strategy in {"sequential", "thread"}, f"invalid Ensemble strategy '{strategy}'"
+        self.strategy = strategy
+        self.dt = []  # per-member Profile()
+        self.calls = 0  # forward passes
+        self.pool = None  # worker threads with strategy='thread', created on first forward
 
     def forward(self, x, augment=False, profile=False, visualize=False):
         """Performs forward pass aggregating outputs from an ensemble of models.."""
-        y = [module(x, augment, profile, visualize)[0] for module in self]
+        if len(self.dt) != len(self):
+            self.dt, self.calls = [Profile(device=x.device) for _ in self], 0
+        self.calls += 1
+
+        def run(i):
+            """Runs member `i`."""
+            with self.dt[i]:
+                return self[i](x, augment, profile, visualize)[0]
+
+        if self.strategy == "thread" and len(self) > 1:
+            n = torch.get_num_threads()
+            grad, inference = torch.is_grad_enabled(), torch.is_inference_mode_enabled()
+
+            def run_thread(i):
+                """Runs member `i` in a worker thread with the caller's grad mode."""
+                with torch.inference_mode(inference), torch.set_grad_enabled(grad):  # thread-local modes
+                    return run(i)
+
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(len(self), thread_name_prefix="ensemble")
+            torch.set_num_threads(max(n // len(self), 1))  # share, new worker threads take it up on their first op
+            try:
+                y = list(self.pool.map(run_thread, range(len(self))))
+            finally:
+                torch.set_num_threads(n)  # restore
+        else:
+            y = [run(i) for i in range(len(self))]
         # y = torch.stack(y).max(0)[0]  # max ensemble
         # y = torch.stack(y).mean(0)  # mean ensemble
         y = torch.cat(y, 1)  # nms ensemble
         return y, None  # inference, train output
 
+    def summary(self):
+        """Returns a string with the mean latency of each member per forward pass."""
+        t = (f"{i}: {p.t / max(self.calls, 1) * 1e3:.1f}ms" for i, p in enumerate(self.dt))
+        return f"Ensemble ({self.strategy}) member latency: {', '.join(t)} per forward pass"
+
 
-def attempt_load(weights, device=None, inplace=True, fuse=True):
+def attempt_load(weights, device=None, inplace=True, fuse=True, strategy="sequential"):
     """
     Loads and fuses an ensemble or single YOLOv5 model from weights, handling device placement and model adjustments.
 
-    Example inputs: weights=[a,b,c] or a single model weights=[a] or weights=a.
+    Example inputs: weights=[a,b,c] or a single model weights=[a] or weights=a. Ensembles run their members with
+    `strategy` 'sequential' or 'thread', see Ensemble.
     """
     from models.yolo import Detect, Model
 
-    model = Ensemble()
+    model = Ensemble(strategy)
     for w in weights if isinstance(weights, list) else [weights]:
         ckpt = torch.load(attempt_download(w), map_location="cpu")  # load
         ckpt = (ckpt.get("ema") or ckpt["model"]).to(device).float()  # FP32 model
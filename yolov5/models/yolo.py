@@ -17,6 +17,7 @@ from pathlib import Path
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 FILE = Path(__file__).resolve()
 ROOT = FILE.parents[1]  # YOLOv5 root directory
@@ -52,7 +53,6 @@ from models.common import (
 from models.experimental import MixConv2d
 from utils.autoanchor import check_anchor_order
 from utils.general import LOGGER, check_version, check_yaml, colorstr, make_divisible, print_args
-from utils.plots import feature_visualization
 from utils.torch_utils import (
     fuse_conv_and_bn,
     initialize_weights,
@@ -75,6 +75,7 @@ class Detect(nn.Module):
     stride = None  # strides computed during build
     dynamic = False  # force grid reconstruction
     export = False  # export mode
+    conf_thres = 0.0  # inference objectness pre-filter, only candidate rows are decoded and returned if > 0
 
     def __init__(self, nc=80, anchors=(), ch=(), inplace=True):
         """Initializes YOLOv5 detection layer with specified classes, anchors, channels, and inplace operations."""
@@ -85,6 +86,7 @@ class Detect(nn.Module):
         self.na = len(anchors[0]) // 2  # number of anchors
         self.grid = [torch.empty(0) for _ in range(self.nl)]  # init grid
         self.anchor_grid = [torch.empty(0) for _ in range(self.nl)]  # init anchor grid
+        self.grids = {}  # (i, nx, ny, dtype, device) grid cache
         self.register_buffer("anchors", torch.tensor(anchors).float().view(self.nl, -1, 2))  # shape(nl,na,2)
         self.m = nn.ModuleList(nn.Conv2d(x, self.no * self.na, 1) for x in ch)  # output conv
         self.inplace = inplace  # use inplace ops (e.g. slice assignment)
@@ -92,12 +94,15 @@ class Detect(nn.Module):
     def forward(self, x):
         """Processes input through YOLOv5 layers, altering shape for detection: `x(bs, 3, ny, nx, 85)`."""
         z = []  # inference output
+        prefilter = self.conf_thres > 0 and not (self.training or self.export or isinstance(self, Segment))
         for i in range(self.nl):
             x[i] = self.m[i](x[i])  # conv
             bs, _, ny, nx = x[i].shape  # x(bs,255,20,20) to x(bs,3,20,20,85)
             x[i] = x[i].view(bs, self.na, self.no, ny, nx).permute(0, 1, 3, 4, 2).contiguous()
 
-            if not self.training:  # inference
+            if prefilter:  # decode candidate rows only
+                z.append(self._decode_candidates(x[i], i))
+            elif not self.training:  # inference
                 if self.dynamic or self.grid[i].shape[2:4] != x[i].shape[2:4]:
                     self.grid[i], self.anchor_grid[i] = self._make_grid(nx, ny, i)
 
@@ -113,17 +118,51 @@ class Detect(nn.Module):
                     y = torch.cat((xy, wh, conf), 4)
                 z.append(y.view(bs, self.na * nx * ny, self.no))
 
+        if prefilter:
+            return self._pad_candidates(z, x[0].shape[0]), x
         return x if self.training else (torch.cat(z, 1),) if self.export else (torch.cat(z, 1), x)
 
+    def _decode_candidates(self, x, i):
+        """Decodes the rows of one level `x(bs,na,ny,nx,no)` with objectness above `conf_thres`, skipping the sigmoid and
+        box decode of all other rows, and returns them as `(batch_index, rows(n,no))`.
+        """
+        logit = math.log(self.conf_thres / (1 - self.conf_thres)) if self.conf_thres < 1 else math.inf
+        b, a, gy, gx = (x[..., 4] > logit).nonzero(as_tuple=True)  # sigmoid(obj) > conf_thres
+        y = x[b, a, gy, gx].sigmoid()
+        grid = torch.stack((gx, gy), 1).to(y.dtype) - 0.5
+        xy = (y[:, :2] * 2 + grid) * self.stride[i]  # xy
+        wh = (y[:, 2:4] * 2) ** 2 * (self.anchors[i][a] * self.stride[i])  # wh
+        return b, torch.cat((xy, wh, y[:, 4:]), 1)
+
+    @staticmethod
+    def _pad_candidates(z, bs):
+        """Gathers per-level `(batch_index, rows)` candidates into a zero-padded `(bs, n, no)` tensor for NMS."""
+        b, y = (torch.cat(x) for x in zip(*z))
+        if bs == 1:
+            return y[None]
+        b, j = b.sort(stable=True)
+        n = torch.bincount(b, minlength=bs)
+        i = torch.arange(len(b), device=b.device) - (n.cumsum(0) - n)[b]  # row index within each image
+        out = y.new_zeros((bs, int(n.max()), y.shape[1]))
+        out[b, i] = y[j]
+        return out
+
     def _make_grid(self, nx=20, ny=20, i=0, torch_1_10=check_version(torch.__version__, "1.10.0")):
-        """Generates a mesh grid for anchor boxes with optional compatibility for torch versions < 1.10."""
+        """Generates a mesh grid for anchor boxes with optional compatibility for torch versions < 1.10, cached per
+        `(i, nx, ny, dtype, device)` unless `dynamic`.
+        """
         d = self.anchors[i].device
         t = self.anchors[i].dtype
+        key = i, nx, ny, t, d
+        if not self.dynamic and key in self.grids:
+            return self.grids[key]
         shape = 1, self.na, ny, nx, 2  # grid shape
         y, x = torch.arange(ny, device=d, dtype=t), torch.arange(nx, device=d, dtype=t)
         yv, xv = torch.meshgrid(y, x, indexing="ij") if torch_1_10 else torch.meshgrid(y, x)  # torch>=0.7 compatibility
         grid = torch.stack((xv, yv), 2).expand(shape) - 0.5  # add grid offset, i.e. y = 2.0 * x - 0.5
         anchor_grid = (self.anchors[i] * self.stride[i]).view((1, self.na, 1, 1, 2)).expand(shape)
+        if not self.dynamic:
+            self.grids[key] = grid, anchor_grid
         return grid, anchor_grid
 
 
@@ -169,6 +208,8 @@ class BaseModel(nn.Module):
             x = m(x)  # run
             y.append(x if m.i in self.save else None)  # save output
             if visualize:
+                from utils.plots import feature_visualization  # scoped for faster 'import models.yolo'
+
                 feature_visualization(x, m.type, m.i, save_dir=visualize)
         return x
 
@@ -212,12 +253,17 @@ class BaseModel(nn.Module):
             m.grid = list(map(fn, m.grid))
             if isinstance(m.anchor_grid, list):
                 m.anchor_grid = list(map(fn, m.anchor_grid))
+            m.grids = {}  # reset grid cache
         return self
 
 
 class DetectionModel(BaseModel):
     """YOLOv5 detection model class for object detection tasks, supporting custom configurations and anchors."""
 
+    tta_scales = (1, 0.83, 0.67)  # augmented inference scales, largest first
+    tta_flips = (None, 3, None)  # augmented inference flips (2-ud, 3-lr)
+    tta_pad = False  # pad augmented inference variants to one shape for a single forward pass
+
     def __init__(self, cfg="yolov5s.yaml", ch=3, nc=None, anchors=None):
         """Initializes YOLOv5 model with configuration file, input channels, number of classes, and custom anchors."""
         super().__init__()
@@ -270,17 +316,28 @@ class DetectionModel(BaseModel):
         return self._forward_once(x, profile, visualize)  # single-scale inference, train
 
     def _forward_augment(self, x):
-        """Performs augmented inference across different scales and flips, returning combined detections."""
+        """
+        Performs augmented inference across different scales and flips, returning combined detections.
+
+        Variants with the same input shape, e.g. a scale and its flip in `tta_scales=(1, 1, 0.67)`, `tta_flips=(None, 3,
+        None)`, run as one stacked batch with identical results. With `tta_pad`, all variants are padded to the largest
+        shape and run in a single forward pass, which saves per-pass overhead on GPU but slightly changes predictions
+        near the padded borders.
+        """
         img_size = x.shape[-2:]  # height, width
-        s = [1, 0.83, 0.67]  # scales
-        f = [None, 3, None]  # flips (2-ud, 3-lr)
-        y = []  # outputs
-        for si, fi in zip(s, f):
-            xi = scale_img(x.flip(fi) if fi else x, si, gs=int(self.stride.max()))
-            yi = self._forward_once(xi)[0]  # forward
-            # cv2.imwrite(f'img_{si}.jpg', 255 * xi[0].cpu().numpy().transpose((1, 2, 0))[:, :, ::-1])  # save
-            yi = self._descale_pred(yi, fi, si, img_size)
-            y.append(yi)
+        s, f = self.tta_scales, self.tta_flips  # scales, flips
+        xs = [scale_img(x.flip(fi) if fi else x, si, gs=int(self.stride.max())) for si, fi in zip(s, f)]
+        if self.tta_pad:
+            h, w = (max(xi.shape[d] for xi in xs) for d in (2, 3))
+            xs = [F.pad(xi, [0, w - xi.shape[3], 0, h - xi.shape[2]], value=0.447) for xi in xs]  # imagenet mean
+        groups = {}  # input shape: variant indices
+        for i, xi in enumerate(xs):
+            groups.setdefault(xi.shape, []).append(i)
+        y = [None] * len(xs)  # outputs
+        for idx in groups.values():
+            yi = self._forward_once(torch.cat([xs[i] for i in idx]))[0]  # stacked forward
+            for j, i in enumerate(idx):
+                y[i] = self._descale_pred(yi[j * len(x) : (j + 1) * len(x)], f[i], s[i], img_size)
         y = self._clip_augmented(y)  # clip augmented tails
         return torch.cat(y, 1), None  # augmented inference, train
 
@@ -20,7 +20,6 @@ import numpy as np
 import psutil
 import torch
 import torch.nn.functional as F
-import torchvision
 import yaml
 from PIL import ExifTags, Image, ImageOps
 from torch.utils.data import DataLoader, Dataset, dataloader, distributed
@@ -28,6 +27,7 @@ from tqdm import tqdm
 
 from utils.augmentations import (
     Albumentations,
+    LetterboxBuffer,
     augment_hsv,
     classify_albumentations,
     classify_transforms,
@@ -286,6 +286,7 @@ class LoadScreenshots:
         self.stride = stride
         self.transforms = transforms
         self.auto = auto
+        self.letterbox = LetterboxBuffer(img_size, stride=stride, auto=auto)
         self.mode = "stream"
         self.frame = 0
         self.sct = mss.mss()
@@ -312,9 +313,7 @@ class LoadScreenshots:
         if self.transforms:
             im = self.transforms(im0)  # transforms
         else:
-            im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]  # padded resize
-            im = im.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
-            im = np.ascontiguousarray(im)  # contiguous
+            im = self.letterbox(im0)[0]  # padded resize, HWC to CHW, BGR to RGB into a reused contiguous buffer
         self.frame += 1
         return str(self.screen), im, im0, None, s  # screen, img, original img, im0s, s
 
@@ -350,6 +349,7 @@ class LoadImages:
         self.mode = "image"
         self.auto = auto
         self.transforms = transforms  # optional
+        self.letterbox = LetterboxBuffer(img_size, stride=stride, auto=auto)
         self.vid_stride = vid_stride  # video frame-rate stride
         if any(videos):
             self._new_video(videos[0])  # new video
@@ -400,9 +400,7 @@ class LoadImages:
         if self.transforms:
             im = self.transforms(im0)  # transforms
         else:
-            im = letterbox(im0, self.img_size, stride=self.stride, auto=self.auto)[0]  # padded resize
-            im = im.transpose((2, 0, 1))[::-1]  # HWC to CHW, BGR to RGB
-            im = np.ascontiguousarray(im)  # contiguous
+            im = self.letterbox(im0)[0]  # padded resize, HWC to CHW, BGR to RGB into a reused contiguous buffer
 
         return path, im, im0, self.cap, s
 
@@ -450,16 +448,7 @@ class LoadStreams:
         for i, s in enumerate(sources):  # index, source
             # Start thread to read frames from video stream
             st = f"{i + 1}/{n}: {s}... "
-            if urlparse(s).hostname in ("www.youtube.com", "youtube.com", "youtu.be"):  # if source is YouTube video
-                # YouTube format i.e. 'https://www.youtube.com/watch?v=Zgi9g1ksQHc' or 'https://youtu.be/LNwODJXcvt4'
-                check_requirements(("pafy", "youtube_dl==2020.12.2"))
-                import pafy
-
-                s = pafy.new(s).getbest(preftype="mp4").url  # YouTube URL
-            s = eval(s) if s.isnumeric() else s  # i.e. s = '0' local webcam
-            if s == 0:
-                assert not is_colab(), "--source 0 webcam unsupported on Colab. Rerun command in a local environment."
-                assert not is_kaggle(), "--source 0 webcam unsupported on Kaggle. Rerun command in a local environment."
+            s = self.resolve(s)
             cap = cv2.VideoCapture(s)
             assert cap.isOpened(), f"{st}Failed to open {s}"
             w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -474,11 +463,31 @@ class LoadStreams:
             self.threads[i].start()
         LOGGER.info("")  # newline
 
-        # check for common shapes
-        s = np.stack([letterbox(x, img_size, stride=stride, auto=auto)[0].shape for x in self.imgs])
+        self.init_letterbox(auto, transforms)
+
+    @staticmethod
+    def resolve(s):
+        """Resolves a stream source string to a cv2.VideoCapture source, i.e. YouTube URLs and webcam indices."""
+        if urlparse(s).hostname in ("www.youtube.com", "youtube.com", "youtu.be"):  # if source is YouTube video
+            # YouTube format i.e. 'https://www.youtube.com/watch?v=Zgi9g1ksQHc' or 'https://youtu.be/LNwODJXcvt4'
+            check_requirements(("pafy", "youtube_dl==2020.12.2"))
+            import pafy
+
+            s = pafy.new(s).getbest(preftype="mp4").url  # YouTube URL
+        s = eval(s) if s.isnumeric() else s  # i.e. s = '0' local webcam
+        if s == 0:
+            assert not is_colab(), "--source 0 webcam unsupported on Colab. Rerun command in a local environment."
+            assert not is_kaggle(), "--source 0 webcam unsupported on Kaggle. Rerun command in a local environment."
+        return s
+
+    def init_letterbox(self, auto, transforms):
+        """Sets up rect or square letterboxing from the shapes of the first frames in self.imgs."""
+        lb = LetterboxBuffer(self.img_size, stride=self.stride, auto=auto)
+        s = np.stack([lb.shape(x.shape[:2])[0] for x in self.imgs])
         self.rect = np.unique(s, axis=0).shape[0] == 1  # rect inference if all shapes equal
         self.auto = auto and self.rect
         self.transforms = transforms  # optional
+        self.letterbox = LetterboxBuffer(self.img_size, stride=self.stride, auto=self.auto)
         if not self.rect:
             LOGGER.warning("WARNING ⚠️ Stream shapes differ. For optimal performance supply similarly-shaped streams.")
 
@@ -513,20 +522,107 @@ class LoadStreams:
             raise StopIteration
 
         im0 = self.imgs.copy()
-        if self.transforms:
-            im = np.stack([self.transforms(x) for x in im0])  # transforms
-        else:
-            im = np.stack([letterbox(x, self.img_size, stride=self.stride, auto=self.auto)[0] for x in im0])  # resize
-            im = im[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW
-            im = np.ascontiguousarray(im)  # contiguous
+        return self.sources, self.preprocess(im0), im0, None, ""
 
-        return self.sources, im, im0, None, ""
+    def preprocess(self, im0):
+        """Transforms or letterboxes a list of HWC BGR frames into a BCHW RGB batch."""
+        if self.transforms:
+            return np.stack([self.transforms(x) for x in im0])  # transforms
+        shape = self.letterbox.shape(im0[0].shape[:2])[0]  # common shape, rect or fixed img_size
+        im = self.letterbox.buffer((len(im0), 3, *shape))  # reused BCHW batch
+        for x, out in zip(im0, im):
+            self.letterbox(x, out=out)  # padded resize, HWC to CHW, BGR to RGB straight into the batch
+        return im
 
     def __len__(self):
         """Returns the number of sources in the dataset, supporting up to 32 streams at 30 FPS over 30 years."""
         return len(self.sources)  # 1E12 frames = 32 streams at 30 FPS for 30 years
 
 
+class LoadSharedStreams(LoadStreams):
+    """
+    Loads video streams like LoadStreams, but captures and decodes each stream in its own process.
+
+    Capture processes decode frames straight into preallocated slots of a shared-memory FrameRing, and the inference
+    process reads the newest frame of every stream as a zero-copy view, so frames are neither pickled nor copied between
+    processes and decoding does not compete with inference for the GIL. Returned frames stay valid until the next batch.
+    """
+
+    def __init__(
+        self,
+        sources="file.streams",
+        img_size=640,
+        stride=32,
+        auto=True,
+        transforms=None,
+        vid_stride=1,
+        slots=4,
+        timeout=30,
+    ):
+        """Starts one capture process per source, writing into a FrameRing of `slots` frames per stream."""
+        import multiprocessing as mp
+
+        from utils.sharedmem import STARTING, FrameRing, capture
+
+        torch.backends.cudnn.benchmark = True  # faster for fixed-size inference
+        self.mode = "stream"
+        self.img_size = img_size
+        self.stride = stride
+        self.vid_stride = vid_stride  # video frame-rate stride
+        sources = Path(sources).read_text().rsplit() if os.path.isfile(sources) else [sources]
+        n = len(sources)
+        self.sources = [clean_str(x) for x in sources]  # clean source names for later
+        self.ring = FrameRing(streams=n, slots=slots, create=True)
+        ctx = mp.get_context("fork" if hasattr(os, "fork") else "spawn")  # fork avoids re-importing __main__
+        self.procs = [
+            ctx.Process(target=capture, args=(self.ring.name, i, self.resolve(s), vid_stride), daemon=True)
+            for i, s in enumerate(sources)
+        ]
+        for p in self.procs:
+            p.start()
+        self.imgs, self.fps, self.frames = [None] * n, [0] * n, [0] * n
+        for i, (s, p) in enumerate(zip(sources, self.procs)):
+            st = f"{i + 1}/{n}: {s}... "
+            t = time.time()
+            while self.ring.info["head"][i] == 0 and p.is_alive() and time.time() - t < timeout:
+                time.sleep(0.01)  # wait for the first frame
+            self.imgs[i] = self.ring.read(i)[0]
+            if self.imgs[i] is None:
+                self.close()
+                raise AssertionError(f"{st}Failed to open {s}")
+            info = self.ring.info[i]
+            self.fps[i], self.frames[i] = float(info["fps"]), info["frames"]
+            self.frames[i] = int(self.frames[i]) if math.isfinite(self.frames[i]) else float("inf")
+            h, w = self.imgs[i].shape[:2]
+            LOGGER.info(f"{st} Success ({self.frames[i]} frames {w}x{h} at {self.fps[i]:.2f} FPS, pid {p.pid})")
+        LOGGER.info("")  # newline
+        self.init_letterbox(auto, transforms)
+
+    def __next__(self):
+        """Returns the newest frame of every stream, stopping when a capture process exits or on 'q' key press."""
+        self.count += 1
+        if not all(p.is_alive() for p in self.procs) or cv2.waitKey(1) == ord("q"):  # q to quit
+            cv2.destroyAllWindows()
+            self.close()
+            raise StopIteration
+
+        im0 = [self.ring.read(i)[0] for i in range(len(self.sources))]  # zero-copy views, held until the next read
+        return self.sources, self.preprocess(im0), im0, None, ""
+
+    def close(self):
+        """Stops the capture processes and removes the shared memory block."""
+        for p in self.procs:
+            p.terminate()
+            p.join(5)
+        if self.ring.owner:
+            self.ring.close()
+
+    def __del__(self):
+        """Stops the capture processes."""
+        if hasattr(self, "ring"):
+            self.close()
+
+
 def img2label_paths(img_paths):
     """Generates label file paths from corresponding image file paths by replacing `/images/` with `/labels/` and
     extension with `.txt`.
@@ -1317,9 +1413,9 @@ class HUBDatasetStats:
 
 
 # Classification dataloaders -------------------------------------------------------------------------------------------
-class ClassificationDataset(torchvision.datasets.ImageFolder):
+class ClassificationDataset(Dataset):
     """
-    YOLOv5 Classification Dataset.
+    YOLOv5 Classification Dataset of a torchvision ImageFolder directory, one subdirectory of images per class.
 
     Arguments:
         root:  Dataset path
@@ -1331,12 +1427,19 @@ class ClassificationDataset(torchvision.datasets.ImageFolder):
         """Initializes YOLOv5 Classification Dataset with optional caching, augmentations, and transforms for image
         classification.
         """
-        super().__init__(root=root)
+        from torchvision.datasets import ImageFolder  # scoped for faster 'import utils.dataloaders'
+
+        folder = ImageFolder(root=root)
+        self.root, self.classes, self.class_to_idx = folder.root, folder.classes, folder.class_to_idx
         self.torch_transforms = classify_transforms(imgsz)
         self.album_transforms = classify_albumentations(augment, imgsz) if augment else None
         self.cache_ram = cache is True or cache == "ram"
         self.cache_disk = cache == "disk"
-        self.samples = [list(x) + [Path(x[0]).with_suffix(".npy"), None] for x in self.samples]  # file, index, npy, im
+        self.samples = [list(x) + [Path(x[0]).with_suffix(".npy"), None] for x in folder.samples]  # file, idx, npy, im
+
+    def __len__(self):
+        """Returns the number of images in the dataset."""
+        return len(self.samples)
 
     def __getitem__(self, i):
         """Fetches and transforms an image sample by index, supporting RAM/disk caching and Augmentations."""
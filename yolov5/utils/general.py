@@ -3,6 +3,7 @@
 
 import contextlib
 import glob
+import hashlib
 import inspect
 import logging
 import logging.config
@@ -28,10 +29,7 @@ from zipfile import ZipFile, is_zipfile
 
 import cv2
 import numpy as np
-import pandas as pd
-import pkg_resources as pkg
 import torch
-import torchvision
 import yaml
 
 # Import 'ultralytics' package or install if missing
@@ -43,7 +41,7 @@ except (ImportError, AssertionError):
     os.system("pip install -U ultralytics")
     import ultralytics
 
-from ultralytics.utils.checks import check_requirements
+from ultralytics.utils.checks import check_requirements, parse_version
 
 from utils import TryExcept, emojis
 from utils.downloads import curl_download, gsutil_getsize
@@ -63,7 +61,6 @@ FONT = "Arial.ttf"  # https://github.com/ultralytics/assets/releases/download/v0
 
 torch.set_printoptions(linewidth=320, precision=5, profile="long")
 np.set_printoptions(linewidth=320, formatter={"float_kind": "{:11.5g}".format})  # format short g, %precision=5
-pd.options.display.max_columns = 10
 cv2.setNumThreads(0)  # prevent OpenCV from multithreading (incompatible with PyTorch DataLoader)
 os.environ["NUMEXPR_MAX_THREADS"] = str(NUM_THREADS)  # NumExpr max threads
 os.environ["OMP_NUM_THREADS"] = "1" if platform.system() == "darwin" else str(NUM_THREADS)  # OpenMP (PyTorch and SciPy)
@@ -339,6 +336,16 @@ def file_size(path):
         return 0.0
 
 
+def file_hash(*paths, n=16):
+    """Returns the first `n` hex digits of the SHA-256 of the contents of the files `paths`, i.e. as a cache key."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+    return h.hexdigest()[:n]
+
+
 def check_online():
     """Checks internet connectivity by attempting to create a connection to "1.1.1.1" on port 443, retries once if the
     first attempt fails.
@@ -425,8 +432,8 @@ def check_python(minimum="3.8.0"):
 
 def check_version(current="0.0.0", minimum="0.0.0", name="version ", pinned=False, hard=False, verbose=False):
     """Checks if the current version meets the minimum required version, exits or warns based on parameters."""
-    current, minimum = (pkg.parse_version(x) for x in (current, minimum))
-    result = (current == minimum) if pinned else (current >= minimum)  # bool
+    c, m = (parse_version(x) for x in (current, minimum))  # (major, minor, micro) int tuples
+    result = (c == m) if pinned else (c >= m)  # bool
     s = f"WARNING ⚠️ {name}{minimum} is required by YOLOv5, but {name}{current} is currently installed"  # string
     if hard:
         assert result, emojis(s)  # assert min requirements met
@@ -1008,6 +1015,35 @@ def clip_segments(segments, shape):
         segments[:, 1] = segments[:, 1].clip(0, shape[0])  # y
 
 
+def load_torchvision_ops():
+    """
+    Loads torchvision's compiled ops library, registering torch.ops.torchvision.nms() and other ops.
+
+    Importing the torchvision package also imports its datasets, models and transforms, which takes over a second, so
+    only the library is loaded. Falls back to importing the package if the library cannot be loaded on its own.
+    """
+    from importlib.machinery import EXTENSION_SUFFIXES, ExtensionFileLoader, FileFinder
+    from importlib.util import find_spec
+
+    if "torchvision" not in sys.modules:  # else loaded on import
+        with contextlib.suppress(Exception):
+            path = find_spec("torchvision").submodule_search_locations[0]  # package dir, not imported
+            finder = FileFinder(path, (ExtensionFileLoader, EXTENSION_SUFFIXES))
+            spec = finder.find_spec("_C_stable") or finder.find_spec("_C")  # newer, older torchvision
+            torch.ops.load_library(spec.origin)
+            return
+    import torchvision  # noqa: F401
+
+
+def nms(boxes, scores, iou_thres):
+    """Returns indices of (n, 4) xyxy `boxes` kept by torchvision NMS at `iou_thres`, sorted by decreasing `scores`."""
+    try:
+        return torch.ops.torchvision.nms(boxes, scores, iou_thres)
+    except AttributeError:  # ops not loaded yet
+        load_torchvision_ops()
+        return torch.ops.torchvision.nms(boxes, scores, iou_thres)
+
+
 def non_max_suppression(
     prediction,
     conf_thres=0.25,
@@ -1018,10 +1054,13 @@ def non_max_suppression(
     labels=(),
     max_det=300,
     nm=0,  # number of masks
+    end2end=False,  # prediction already has NMS applied, i.e. export.py --include onnx --nms
 ):
     """
     Non-Maximum Suppression (NMS) on inference results to reject overlapping detections.
 
+    End-to-end predictions (b, max_det, 6) from models exported with NMS are only filtered by confidence and class.
+
     Returns:
          list of detections, on (n,6) tensor per image [xyxy, conf, cls]
     """
@@ -1030,6 +1069,14 @@ def non_max_suppression(
     assert 0 <= iou_thres <= 1, f"Invalid IoU {iou_thres}, valid values are between 0.0 and 1.0"
     if isinstance(prediction, (list, tuple)):  # YOLOv5 model in validation model, output = (inference_out, loss_out)
         prediction = prediction[0]  # select only inference output
+    if end2end:  # (b, max_det, 6) zero-padded [xyxy, conf, cls]
+        output = []
+        for x in prediction:
+            x = x[x[:, 4] > conf_thres]
+            if classes is not None:
+                x = x[(x[:, 5:6] == torch.tensor(classes, device=x.device)).any(1)]
+            output.append(x[:max_det].float())
+        return output
 
     device = prediction.device
     mps = "mps" in device.type  # Apple MPS
@@ -1042,7 +1089,7 @@ def non_max_suppression(
     # Settings
     # min_wh = 2  # (pixels) minimum box width and height
     max_wh = 7680  # (pixels) maximum box width and height
-    max_nms = 30000  # maximum number of boxes into torchvision.ops.nms()
+    max_nms = 30000  # maximum number of boxes into nms()
     time_limit = 0.5 + 0.05 * bs  # seconds to quit after
     redundant = True  # require redundant detections
     multi_label &= nc > 1  # multiple labels per box (adds 0.5ms/img)
@@ -1101,7 +1148,7 @@ def non_max_suppression(
         # Batched NMS
         c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
         boxes, scores = x[:, :4] + c, x[:, 4]  # boxes (offset by class), scores
-        i = torchvision.ops.nms(boxes, scores, iou_thres)  # NMS
+        i = nms(boxes, scores, iou_thres)  # NMS
         i = i[:max_det]  # limit detections
         if merge and (1 < n < 3e3):  # Merge NMS (boxes merged using weighted mean)
             # update boxes as boxes(i,4) = weights(i,n) * boxes(n,4)
@@ -1163,6 +1210,8 @@ def print_mutation(keys, results, hyp, save_dir, bucket, prefix=colorstr("evolve
         f.write(s + ("%20.5g," * n % vals).rstrip(",") + "\n")
 
     # Save yaml
+    import pandas as pd  # scoped for faster 'import utils.general'
+
     with open(evolve_yaml, "w") as f:
         data = pd.read_csv(evolve_csv, skipinitialspace=True)
         data = data.rename(columns=lambda x: x.strip())  # strip keys
@@ -0,0 +1,76 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""Motion gating to skip inference on unchanged frames of static camera streams."""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Per-stream frame-difference gate in front of inference.
+
+    Each frame is downsampled to a small grayscale thumbnail and compared with the thumbnail of the last frame that was
+    inferred for the same stream. Inference runs when the fraction of changed pixels reaches `threshold`, when the
+    stream was last inferred more than `refresh` seconds ago, or on the first frame; otherwise the caller reuses the last
+    detections for that stream.
+
+    Usage:
+        gate = MotionGate(threshold=0.005, refresh=5.0)
+        run = gate(frames)  # list of bools, one per stream
+        LOGGER.info(gate.summary())
+    """
+
+    def __init__(self, threshold=0.005, refresh=5.0, size=160, pixel_thres=15):
+        """
+        Initializes the gate.
+
+        Args:
+            threshold (float): Minimum fraction of changed thumbnail pixels that triggers inference.
+            refresh (float): Maximum seconds between inferences of a stream, regardless of change.
+            size (int): Thumbnail width in pixels, height keeps the frame aspect ratio.
+            pixel_thres (int): Minimum grayscale difference (0-255) for a thumbnail pixel to count as changed.
+        """
+        self.threshold = threshold
+        self.refresh = refresh
+        self.size = size
+        self.pixel_thres = pixel_thres
+        self.refs, self.times, self.scores = {}, {}, {}  # per-stream reference thumbnail, last inference time, score
+        self.total = 0  # stream frames seen
+        self.saved = 0  # stream frames with inference skipped
+
+    def reset(self):
+        """Forgets the reference frames, i.e. on a new video, so the next frame of every stream is inferred."""
+        self.refs, self.times, self.scores = {}, {}, {}
+
+    def thumbnail(self, im):
+        """Returns a small blurred grayscale thumbnail of a BGR HWC image, robust to sensor noise."""
+        h, w = im.shape[:2]
+        x = cv2.resize(im, (self.size, max(round(self.size * h / w), 1)), interpolation=cv2.INTER_AREA)
+        x = cv2.cvtColor(x, cv2.COLOR_BGR2GRAY) if x.ndim == 3 else x
+        return cv2.GaussianBlur(x, (3, 3), 0)
+
+    def __call__(self, ims):
+        """Returns a list of booleans, True for each stream in `ims` (list of BGR HWC images) that needs inference."""
+        t = time.time()
+        run = []
+        for i, im in enumerate(ims):
+            x = self.thumbnail(im)
+            ref = self.refs.get(i)
+            if ref is None or ref.shape != x.shape or t - self.times[i] > self.refresh:
+                score = 1.0  # first frame, new shape or refresh due
+            else:
+                score = float(np.count_nonzero(cv2.absdiff(x, ref) > self.pixel_thres)) / x.size
+            self.scores[i] = score
+            r = score >= self.threshold
+            if r:
+                self.refs[i], self.times[i] = x, t
+            run.append(r)
+        self.total += len(run)
+        self.saved += run.count(False)
+        return run
+
+    def summary(self):
+        """Returns a string reporting how many per-stream forward passes were skipped."""
+        return f"Motion gate: {self.saved}/{self.total} forward passes saved ({self.saved / max(self.total, 1):.1%})"
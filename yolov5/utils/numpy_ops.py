@@ -0,0 +1,274 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+NumPy-only pre- and post-processing for torch-free inference.
+
+Mirrors letterbox(), scale_boxes() and non_max_suppression() from utils.general without importing torch or torchvision,
+so ONNX Runtime, OpenVINO or TFLite serving images only need numpy and OpenCV.
+
+Usage:
+    from utils.numpy_ops import LetterboxBuffer, letterbox, non_max_suppression, scale_boxes
+"""
+
+import logging
+import time
+
+import cv2
+import numpy as np
+
+LOGGER = logging.getLogger("yolov5")  # same logger as utils.general.LOGGER, without importing utils.general
+
+
+def letterbox(im, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleFill=False, scaleup=True, stride=32):
+    """Resizes and pads image to new_shape with stride-multiple constraints, returns resized image, ratio, padding."""
+    shape = im.shape[:2]  # current shape [height, width]
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+
+    # Scale ratio (new / old)
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    if not scaleup:  # only scale down, do not scale up (for better val mAP)
+        r = min(r, 1.0)
+
+    # Compute padding
+    ratio = r, r  # width, height ratios
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]  # wh padding
+    if auto:  # minimum rectangle
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)  # wh padding
+    elif scaleFill:  # stretch
+        dw, dh = 0.0, 0.0
+        new_unpad = (new_shape[1], new_shape[0])
+        ratio = new_shape[1] / shape[1], new_shape[0] / shape[0]  # width, height ratios
+
+    dw /= 2  # divide padding into 2 sides
+    dh /= 2
+
+    if shape[::-1] != new_unpad:  # resize
+        im = cv2.resize(im, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    im = cv2.copyMakeBorder(im, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)  # add border
+    return im, ratio, (dw, dh)
+
+
+class LetterboxBuffer:
+    """
+    Allocation-free letterbox and normalisation, producing the same pixels as letterbox().
+
+    Images are resized straight into the interior of a reusable padded buffer, and BGR to RGB plus HWC to CHW are fused
+    into one copy into the output planes, followed by a single 1/255 scaling pass for float outputs. Buffers are kept per
+    shape and dtype in a ring of `n`, so a returned array stays valid until `n` more calls of the same shape.
+
+    Usage:
+        lb = LetterboxBuffer(640, stride=32)
+        x, ratio, pad = lb(im0)  # (3, h, w) uint8 RGB, reused across frames
+        x, ratio, pad = lb(im0, dtype=np.float32)  # (3, h, w) float32 RGB in 0-1
+        batch = lb.buffer((len(ims), 3, 640, 640), np.float32)
+        for im, out in zip(ims, batch):
+            lb(im, out=out)  # write directly into a batch slot
+    """
+
+    def __init__(self, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleup=True, stride=32, n=2):
+        """Initializes letterbox settings as in letterbox(), with a ring of `n` buffers per output shape and dtype."""
+        self.new_shape = (new_shape, new_shape) if isinstance(new_shape, int) else tuple(new_shape)
+        self.color = color
+        self.auto = auto
+        self.scaleup = scaleup
+        self.stride = stride
+        self.n = n
+        self.buffers = {}  # (shape, dtype) -> [ring index, buffers]
+
+    def buffer(self, shape, dtype=np.uint8):
+        """Returns the next reusable array of `shape` and `dtype` from its ring, allocating it on first use."""
+        key = (tuple(shape), np.dtype(dtype))
+        ring = self.buffers.setdefault(key, [0, []])
+        i = ring[0] % self.n
+        if i == len(ring[1]):
+            ring[1].append(np.empty(shape, dtype=dtype))
+        ring[0] = i + 1
+        return ring[1][i]
+
+    def shape(self, shape):
+        """Returns letterbox geometry for an image `shape` (h, w): padded shape, resized shape, ratio and padding."""
+        r = min(self.new_shape[0] / shape[0], self.new_shape[1] / shape[1])
+        if not self.scaleup:  # only scale down, do not scale up (for better val mAP)
+            r = min(r, 1.0)
+        new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+        dw, dh = self.new_shape[1] - new_unpad[0], self.new_shape[0] - new_unpad[1]  # wh padding
+        if self.auto:  # minimum rectangle
+            dw, dh = np.mod(dw, self.stride), np.mod(dh, self.stride)
+        dw /= 2  # divide padding into 2 sides
+        dh /= 2
+        top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+        h = new_unpad[1] + top + int(round(dh + 0.1))
+        w = new_unpad[0] + left + int(round(dw + 0.1))
+        return (h, w), new_unpad, (top, left), (r, r), (dw, dh)
+
+    def letterbox(self, im):
+        """Letterboxes a HWC uint8 image into a reusable padded buffer, returning the buffer, ratio and padding."""
+        (h, w), (nw, nh), (top, left), ratio, pad = self.shape(im.shape[:2])
+        buf = self.buffer((h, w, 3))
+        c = self.color[0] if len(set(self.color)) == 1 else self.color  # scalar fill is much faster
+        buf[:top], buf[top + nh :], buf[top : top + nh, :left], buf[top : top + nh, left + nw :] = c, c, c, c  # border
+        view = buf[top : top + nh, left : left + nw]
+        if im.shape[:2] != (nh, nw):
+            cv2.resize(im, (nw, nh), dst=view, interpolation=cv2.INTER_LINEAR)  # resize into buffer interior
+        else:
+            view[:] = im
+        return buf, ratio, pad
+
+    def __call__(self, im, out=None, dtype=np.uint8, bgr2rgb=True):
+        """
+        Letterboxes a HWC uint8 image to a contiguous (3, h, w) array, fusing the channel flip, transpose and scaling.
+
+        cv2.split() writes the channels straight into the (3, h, w) planes in the requested order, which is several times
+        faster than a strided NumPy transpose copy. Float outputs are then scaled in one contiguous pass.
+
+        Args:
+            im (np.ndarray): HWC uint8 image, BGR if `bgr2rgb`.
+            out (np.ndarray, optional): (3, h, w) destination, i.e. a batch slot; a ring buffer is used by default.
+            dtype (np.dtype): Output dtype, float dtypes are scaled to 0-1.
+            bgr2rgb (bool): Reverse channels, i.e. for OpenCV BGR inputs.
+
+        Returns:
+            (np.ndarray): (3, h, w) letterboxed image.
+            (tuple[float, float]): Width and height ratios.
+            (tuple[float, float]): Width and height padding.
+        """
+        im, ratio, pad = self.letterbox(im)
+        shape = (3, *im.shape[:2])
+        out = self.buffer(shape, dtype) if out is None else out
+        x = out if out.dtype == np.uint8 else self.buffer(shape)  # uint8 CHW planes
+        cv2.split(im, [x[2], x[1], x[0]] if bgr2rgb else [x[0], x[1], x[2]])  # HWC to CHW, BGR to RGB
+        if x is not out:
+            np.multiply(x, out.dtype.type(1 / 255), out=out, casting="unsafe")  # uint8 to float 0-1
+        return out, ratio, pad
+
+
+def xywh2xyxy(x):
+    """Convert nx4 boxes from [x, y, w, h] to [x1, y1, x2, y2] where xy1=top-left, xy2=bottom-right."""
+    y = np.empty_like(x)
+    y[..., 0] = x[..., 0] - x[..., 2] / 2  # top left x
+    y[..., 1] = x[..., 1] - x[..., 3] / 2  # top left y
+    y[..., 2] = x[..., 0] + x[..., 2] / 2  # bottom right x
+    y[..., 3] = x[..., 1] + x[..., 3] / 2  # bottom right y
+    return y
+
+
+def clip_boxes(boxes, shape):
+    """Clips (xyxy) boxes in-place to image shape (height, width)."""
+    boxes[..., [0, 2]] = boxes[..., [0, 2]].clip(0, shape[1])  # x1, x2
+    boxes[..., [1, 3]] = boxes[..., [1, 3]].clip(0, shape[0])  # y1, y2
+
+
+def scale_boxes(img1_shape, boxes, img0_shape, ratio_pad=None):
+    """Rescales (xyxy) bounding boxes from img1_shape to img0_shape, optionally using provided `ratio_pad`."""
+    if ratio_pad is None:  # calculate from img0_shape
+        gain = min(img1_shape[0] / img0_shape[0], img1_shape[1] / img0_shape[1])  # gain  = old / new
+        pad = (img1_shape[1] - img0_shape[1] * gain) / 2, (img1_shape[0] - img0_shape[0] * gain) / 2  # wh padding
+    else:
+        gain = ratio_pad[0][0]
+        pad = ratio_pad[1]
+
+    boxes[..., [0, 2]] -= pad[0]  # x padding
+    boxes[..., [1, 3]] -= pad[1]  # y padding
+    boxes[..., :4] /= gain
+    clip_boxes(boxes, img0_shape)
+    return boxes
+
+
+def nms(boxes, scores, iou_thres=0.45, max_det=300):
+    """
+    Greedy NMS matching torchvision.ops.nms(), returning kept indices sorted by decreasing score.
+
+    Each step suppresses every remaining box with IoU > `iou_thres` against the current best box in one vectorised pass,
+    and stops early once `max_det` boxes are kept.
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort(kind="stable")[::-1]
+    keep = []
+    while order.size and len(keep) < max_det:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_thres]
+    return np.array(keep, dtype=np.int64)
+
+
+def non_max_suppression(
+    prediction,
+    conf_thres=0.25,
+    iou_thres=0.45,
+    classes=None,
+    agnostic=False,
+    multi_label=False,
+    max_det=300,
+    nm=0,  # number of masks
+):
+    """
+    Non-Maximum Suppression (NMS) on NumPy inference results, equivalent to utils.general.non_max_suppression().
+
+    Returns:
+         list of detections, on (n,6) float32 array per image [xyxy, conf, cls]
+    """
+    assert 0 <= conf_thres <= 1, f"Invalid Confidence threshold {conf_thres}, valid values are between 0.0 and 1.0"
+    assert 0 <= iou_thres <= 1, f"Invalid IoU {iou_thres}, valid values are between 0.0 and 1.0"
+    if isinstance(prediction, (list, tuple)):  # (inference_out, ...) outputs
+        prediction = prediction[0]  # select only inference output
+
+    bs = prediction.shape[0]  # batch size
+    nc = prediction.shape[2] - nm - 5  # number of classes
+    xc = prediction[..., 4] > conf_thres  # candidates
+
+    # Settings
+    max_wh = 7680  # (pixels) maximum box width and height
+    max_nms = 30000  # maximum number of boxes into nms()
+    time_limit = 0.5 + 0.05 * bs  # seconds to quit after
+    multi_label &= nc > 1  # multiple labels per box
+
+    t = time.time()
+    mi = 5 + nc  # mask start index
+    output = [np.zeros((0, 6 + nm), dtype=np.float32)] * bs
+    for xi, x in enumerate(prediction):  # image index, image inference
+        x = x[xc[xi]].astype(np.float32, copy=False)  # confidence (boolean indexing already copies)
+        if not x.shape[0]:
+            continue
+
+        # Compute conf
+        x[:, 5:] *= x[:, 4:5]  # conf = obj_conf * cls_conf
+
+        # Box/Mask
+        box = xywh2xyxy(x[:, :4])  # center_x, center_y, width, height) to (x1, y1, x2, y2)
+        mask = x[:, mi:]  # zero columns if no masks
+
+        # Detections matrix nx6 (xyxy, conf, cls)
+        if multi_label:
+            i, j = (x[:, 5:mi] > conf_thres).nonzero()
+            x = np.concatenate((box[i], x[i, 5 + j, None], j[:, None].astype(np.float32), mask[i]), 1)
+        else:  # best class only
+            j = x[:, 5:mi].argmax(1)
+            conf = x[np.arange(len(j)), 5 + j]
+            x = np.concatenate((box, conf[:, None], j[:, None].astype(np.float32), mask), 1)[conf > conf_thres]
+
+        # Filter by class
+        if classes is not None:
+            x = x[np.isin(x[:, 5], classes)]
+
+        # Check shape
+        if not x.shape[0]:  # no boxes
+            continue
+        x = x[x[:, 4].argsort(kind="stable")[::-1][:max_nms]]  # sort by confidence and remove excess boxes
+
+        # Batched NMS
+        c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
+        i = nms(x[:, :4] + c, x[:, 4], iou_thres, max_det)  # NMS
+        output[xi] = x[i]
+        if (time.time() - t) > time_limit:
+            LOGGER.warning(f"WARNING ⚠️ NMS time limit {time_limit:.3f}s exceeded")
+            break  # time limit exceeded
+
+    return output
@@ -0,0 +1,68 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Torch-free ONNX Runtime inference for slim CPU serving images.
+
+Only numpy, OpenCV and onnxruntime are imported, so a container built around this module does not need torch or
+torchvision. Pre- and post-processing come from utils.numpy_ops.
+
+Usage:
+    import cv2
+    from utils.onnx_runtime import ONNXRuntimeModel
+
+    model = ONNXRuntimeModel('best.onnx')
+    det = model(cv2.imread('data/images/bus.jpg'))  # (n, 6) array [xyxy, conf, cls] in original image pixels
+"""
+
+import ast
+from pathlib import Path
+
+import numpy as np
+
+from utils.numpy_ops import letterbox, non_max_suppression, scale_boxes
+
+
+class ONNXRuntimeModel:
+    """YOLOv5 ONNX Runtime detector with letterbox preprocessing and NumPy NMS, without any torch dependency."""
+
+    def __init__(self, weights="yolov5s.onnx", imgsz=640, providers=("CPUExecutionProvider",)):
+        """Loads an exported YOLOv5 *.onnx model, reading stride and class names from its metadata."""
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(str(weights), providers=list(providers))
+        input = self.session.get_inputs()[0]
+        self.input_name = input.name
+        self.output_names = [x.name for x in self.session.get_outputs()]
+        self.fp16 = input.type == "tensor(float16)"
+
+        meta = self.session.get_modelmeta().custom_metadata_map  # metadata
+        self.stride = int(meta.get("stride", 32))
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {i: f"class{i}" for i in range(999)}
+        self.end2end = "nms" in meta  # exported with --nms, outputs (b, max_det, 6)
+
+        shape = input.shape  # i.e. [1, 3, 640, 640], or ['batch', 3, 'height', 'width'] if exported with --dynamic
+        self.dynamic = not all(isinstance(x, int) for x in shape[2:])
+        if self.dynamic:
+            self.imgsz = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+        else:
+            self.imgsz = tuple(shape[2:])  # fixed export shape
+        self.file = Path(weights).name
+
+    def preprocess(self, im):
+        """Letterboxes a BGR HWC uint8 image into a normalized RGB BCHW float array, returning it with its shape."""
+        im = letterbox(im, self.imgsz, stride=self.stride, auto=self.dynamic)[0]  # padded resize
+        x = im.transpose((2, 0, 1))[::-1][None]  # HWC to CHW, BGR to RGB, add batch dim
+        dtype = np.float16 if self.fp16 else np.float32
+        return np.multiply(x, dtype(1 / 255), out=np.empty(x.shape, dtype=dtype))  # uint8 to fp16/32 (contiguous)
+
+    def __call__(self, im, conf_thres=0.25, iou_thres=0.45, classes=None, agnostic=False, max_det=1000):
+        """Runs detection on a BGR HWC image, returning an (n, 6) array of [xyxy, conf, cls] in image pixels."""
+        x = self.preprocess(im)
+        y = self.session.run(self.output_names, {self.input_name: x})
+        if self.end2end:  # NMS in graph, filter zero-padded rows only
+            det = y[0][0][y[0][0][:, 4] > conf_thres].astype(np.float32)
+            det = det[np.isin(det[:, 5], classes)] if classes is not None else det
+            det = det[:max_det]
+        else:
+            det = non_max_suppression(y[0], conf_thres, iou_thres, classes, agnostic, max_det=max_det)[0]
+        det[:, :4] = scale_boxes(x.shape[2:], det[:, :4], im.shape)
+        return det
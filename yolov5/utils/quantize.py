@@ -0,0 +1,196 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Post-training INT8 quantization of YOLOv5 PyTorch models for CPU inference.
+
+The backbone and neck, which hold nearly all of the compute, are quantized to INT8 and the Detect head is kept in FP32
+so box decoding stays exact:
+
+- 'static': FX graph mode quantization. Observers record activation ranges on calibration images, then Conv layers
+  run as INT8 kernels on INT8 activations between them.
+- 'dynamic': Conv and Linear weights are quantized ahead of time and activations per call, no calibration needed.
+  Used as the fallback when static quantization fails, i.e. for modules FX cannot trace.
+
+Quantized models are traced and saved as TorchScript, loadable by DetectMultiBackend like any *.torchscript model.
+ONNX models are quantized by ONNX Runtime to QDQ format, calibrated on the same images, with the head kept in FP32.
+
+Usage:
+    $ python export.py --weights best.pt --include torchscript --int8-mode static --data data.yaml  # INT8 TorchScript
+    $ python export.py --weights best.pt --include onnx --int8-mode static --data data.yaml  # INT8 QDQ ONNX
+    $ python detect.py --weights best-int8.torchscript
+    $ python benchmarks.py --weights best.pt --data data.yaml --device cpu --int8 --pt-only  # mAP, latency vs FP32
+"""
+
+import torch
+import torch.nn as nn
+
+from utils.dataloaders import LoadImages
+from utils.general import LOGGER, check_dataset, check_yaml, colorstr
+
+
+class Features(nn.Module):
+    """Runs the layers of a YOLOv5 model before its Detect head and returns the Detect inputs, traceable by FX."""
+
+    def __init__(self, model):
+        """Wraps the layers of `model` before its last (Detect) layer."""
+        super().__init__()
+        self.model = model.model[:-1]
+        self.save = model.save
+        self.f = model.model[-1].f  # Detect input layers
+
+    def forward(self, x):
+        """Returns the list of Detect input feature maps for image batch `x`."""
+        y = []  # outputs
+        for m in self.model:
+            if m.f != -1:  # if not from previous layer
+                x = y[m.f] if isinstance(m.f, int) else [x if j == -1 else y[j] for j in m.f]  # from earlier layers
+            x = m(x)  # run
+            y.append(x if m.i in self.save else None)  # save output
+        return [x if j == -1 else y[j] for j in self.f]
+
+
+class QuantizedModel(nn.Module):
+    """YOLOv5 model with quantized Features and the original FP32 Detect head."""
+
+    def __init__(self, model, features):
+        """Combines quantized `features` with the Detect head, stride and names of `model`."""
+        super().__init__()
+        self.features = features
+        self.detect = model.model[-1]
+        self.stride, self.names = model.stride, model.names
+
+    def forward(self, x):
+        """Runs quantized features then the FP32 Detect head."""
+        return self.detect(self.features(x))
+
+
+def calibration_images(data, imgsz=640, n=100, batch_size=1):
+    """
+    Returns an iterator of letterboxed (batch_size, 3, h, w) float image batches, `n` images in total, from the train
+    split of dataset.yaml `data`.
+
+    Exported models may have a fixed batch size, so only full batches are yielded and `n` must be at least `batch_size`.
+    """
+    assert n >= batch_size, f"--int8-calib {n} images must be at least the batch size {batch_size}"
+    dataset = LoadImages(check_dataset(check_yaml(data))["train"], img_size=imgsz, auto=False)
+    assert min(n, dataset.nf) >= batch_size, f"{dataset.nf} calibration images, fewer than the batch size {batch_size}"
+
+    def batches():
+        """Yields full batches of the first `n` images."""
+        batch = []
+        for i, (path, im, im0s, vid_cap, s) in enumerate(dataset):
+            if i >= n:
+                break
+            batch.append(torch.from_numpy(im).float() / 255)  # uint8 to float32, 0-255 to 0.0-1.0
+            if len(batch) == batch_size:
+                yield torch.stack(batch)
+                batch = []
+
+    return batches()
+
+
+def quantize_static(model, images, backend="x86"):
+    """
+    Returns the Features of `model` with INT8 Conv layers, calibrated by running them on the `images` batches.
+
+    `backend` is the quantized engine, 'x86' or 'fbgemm' for x86 servers, 'qnnpack' for ARM.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = backend
+    images = iter(images)
+    im = next(images)
+    model = prepare_fx(Features(model).eval(), get_default_qconfig_mapping(backend), example_inputs=(im,))
+    with torch.no_grad():
+        model(im)
+        for im in images:
+            model(im)  # calibrate
+    return convert_fx(model)
+
+
+def quantize_dynamic(model):
+    """Returns the Features of `model` with dynamically quantized Conv and Linear layers."""
+    import torch.ao.nn.quantized.dynamic as nnqd
+    from torch.ao.quantization import default_dynamic_qconfig
+    from torch.ao.quantization import quantize_dynamic as _quantize_dynamic
+
+    mapping = {nn.Conv2d: nnqd.Conv2d, nn.Linear: nnqd.Linear}
+    return _quantize_dynamic(Features(model).eval(), {k: default_dynamic_qconfig for k in mapping}, mapping=mapping)
+
+
+def quantize(model, images=None, mode="static", backend="x86", prefix=colorstr("INT8:")):
+    """
+    Quantizes the FP32 CPU YOLOv5 `model` with `mode` 'static', calibrated on `images`, or 'dynamic'.
+
+    Falls back to dynamic quantization if static quantization fails. Returns a QuantizedModel in eval mode and the mode
+    used, 'static' or 'dynamic'.
+    """
+    assert mode in {"static", "dynamic"}, f"invalid quantization mode '{mode}', valid modes are 'static', 'dynamic'"
+    features = None
+    if mode == "static":
+        try:
+            features = quantize_static(model, images, backend)
+        except Exception as e:
+            LOGGER.warning(f"{prefix} WARNING ⚠️ static quantization failed, falling back to dynamic: {e}")
+            mode = "dynamic"
+    if features is None:
+        features = quantize_dynamic(model)
+    LOGGER.info(f"{prefix} {mode} quantization with {torch.backends.quantized.engine} engine")
+    return QuantizedModel(model, features).eval(), mode
+
+
+def onnx_head(model):
+    """Returns names of the nodes of ONNX `model` between its last Conv layers and its outputs, both included."""
+    producer = {o: n for n in model.graph.node for o in n.output}
+    head, stack = set(), [x.name for x in model.graph.output]
+    while stack:
+        n = producer.get(stack.pop())
+        if n is None or n.name in head:
+            continue  # graph input, initializer or visited
+        head.add(n.name)
+        if n.op_type != "Conv":
+            stack.extend(n.input)
+    return sorted(head)
+
+
+def quantize_onnx(f, output, images, prefix=colorstr("INT8:")):
+    """
+    Quantizes ONNX model `f` to INT8 QDQ format with ONNX Runtime static quantization and saves it to `output`.
+
+    Activation ranges are calibrated on the `images` batches. Conv weights are quantized per channel, the Detect head,
+    its Conv layers and box decoding, is kept in FP32 and the model metadata is preserved.
+    """
+    import numpy as np
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class Reader(CalibrationDataReader):
+        """Feeds calibration images to the model input."""
+
+        def __init__(self, name, images):
+            """Initializes the reader for input `name`."""
+            self.name, self.images = name, iter(images)
+
+        def get_next(self):
+            """Returns the next input dict, None when done."""
+            im = next(self.images, None)
+            return None if im is None else {self.name: np.asarray(im, dtype=np.float32)}
+
+    model = onnx.load(f)
+    head = onnx_head(model)
+    quantize_static(
+        f,
+        output,
+        Reader(model.graph.input[0].name, images),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,  # U8S8, fastest x86 CPU kernels, S8S8 runs ~3x slower
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=head,
+    )
+    model_int8 = onnx.load(output)
+    del model_int8.metadata_props[:]
+    model_int8.metadata_props.extend(model.metadata_props)
+    onnx.save(model_int8, output)
+    LOGGER.info(f"{prefix} static QDQ quantization, {len(head)} head nodes kept in FP32")
+    return output
@@ -0,0 +1,138 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Slim inference weights: fused YOLOv5 tensors in a safetensors file, memory-mapped on load.
+
+A *.safetensors file is an 8-byte little-endian header size, a JSON header mapping each tensor name to its dtype, shape
+and byte offsets plus a '__metadata__' dict of strings, then the raw tensor bytes. YOLOv5 stores the state dict of the
+fused model with the model yaml, class, stride, names and anchors as metadata. Files are readable by the safetensors
+package, which is not required here.
+
+Loading builds the fused model from its yaml and points its parameters at a copy-on-write memory map of the file, so
+nothing is unpickled or copied and processes loading the same file share its page cache pages for CPU inference.
+
+Usage:
+    $ python export.py --weights yolov5s.pt --include safetensors  # yolov5s.safetensors
+    $ python detect.py --weights yolov5s.safetensors
+"""
+
+import json
+import logging
+import mmap
+import struct
+import threading
+
+import torch
+import torch.nn as nn
+
+from utils.general import LOGGER
+
+DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+class Quiet(logging.Filter):
+    """Logging filter dropping INFO and lower records of the thread that created it, leaving other threads and the
+    logger level untouched.
+    """
+
+    def __init__(self):
+        """Initializes the filter for the calling thread."""
+        super().__init__()
+        self.thread = threading.get_ident()
+
+    def filter(self, record):
+        """Returns False for records below WARNING from the filtered thread."""
+        return record.thread != self.thread or record.levelno >= logging.WARNING
+
+
+def save_file(tensors, f, metadata=None):
+    """Saves a dict of tensors to safetensors file `f`, with an optional dict of string `metadata`."""
+    codes = {v: k for k, v in DTYPES.items()}
+    tensors = {k: v.detach().cpu().contiguous() for k, v in tensors.items()}
+    header, start = {}, 0
+    for k, v in tensors.items():
+        end = start + v.numel() * v.element_size()
+        header[k] = {"dtype": codes[v.dtype], "shape": list(v.shape), "data_offsets": [start, end]}
+        start = end
+    if metadata:
+        header["__metadata__"] = metadata
+    h = json.dumps(header, separators=(",", ":")).encode()
+    h += b" " * (-len(h) % 8)  # pad so tensor data starts 8-byte aligned
+    with open(f, "wb") as file:
+        file.write(struct.pack("<Q", len(h)) + h)
+        for v in tensors.values():
+            file.write(v.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return f
+
+
+def load_file(f):
+    """Returns the tensors and metadata of safetensors file `f`, tensors are views of a copy-on-write memory map."""
+    with open(f, "rb") as file:
+        n = struct.unpack("<Q", file.read(8))[0]  # header size
+        header = json.loads(file.read(n))
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)  # private, pages shared until written
+    metadata = header.pop("__metadata__", {})
+    tensors = {}
+    for k, v in header.items():
+        dtype, (start, end) = DTYPES[v["dtype"]], v["data_offsets"]
+        if end > start:
+            count = (end - start) // torch.empty(0, dtype=dtype).element_size()
+            x = torch.frombuffer(buffer, dtype=dtype, count=count, offset=8 + n + start)  # holds a buffer reference
+        else:
+            x = torch.empty(0, dtype=dtype)
+        tensors[k] = x.view(v["shape"])
+    return tensors, metadata
+
+
+def save_model(model, f, metadata):
+    """Saves the weights of fused YOLOv5 `model` to safetensors file `f`, with architecture and export `metadata`."""
+    m = model.model[-1]  # Detect()
+    metadata = {
+        "model": type(model).__name__,  # DetectionModel or SegmentationModel
+        "yaml": json.dumps(model.yaml),
+        "stride": str(metadata["stride"]),
+        "names": json.dumps(metadata["names"]),
+        "anchors": json.dumps((m.anchors * m.stride.view(-1, 1, 1)).tolist()),  # pixels
+    }
+    return save_file(model.state_dict(), f, metadata)
+
+
+def load_model(f, device=None):
+    """
+    Loads a fused YOLOv5 model from safetensors file `f`, built from its yaml and given the memory-mapped weights.
+
+    Parameters are frozen views of the file, moved to `device` if given, and the model is returned in eval() mode.
+    """
+    from models import yolo  # scoped to avoid circular import
+
+    tensors, meta = load_file(f)
+    quiet = Quiet()  # build quietly, parse_model() and fuse() print the layers of the random model
+    LOGGER.addFilter(quiet)
+    try:
+        model = getattr(yolo, meta["model"])(json.loads(meta["yaml"])).fuse().eval()
+    finally:
+        LOGGER.removeFilter(quiet)
+    keys = model.state_dict().keys()
+    assert keys == tensors.keys(), f"{f} weights do not match its {meta['model']} yaml"
+    for k, x in tensors.items():
+        prefix, _, name = k.rpartition(".")
+        module = model.get_submodule(prefix)
+        if name in module._parameters:
+            module._parameters[name] = nn.Parameter(x, requires_grad=False)
+        else:
+            module._buffers[name] = x
+    model.names = json.loads(
+        meta["names"], object_hook=lambda d: {int(k) if k.isdigit() else k: v for k, v in d.items()}
+    )  # int class keys
+    model.nc = model.yaml["nc"]  # attach number of classes like train.py
+    return model.to(device) if device is not None else model
@@ -0,0 +1,146 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""Dynamic micro-batching of asyncio requests in front of a blocking batch inference function."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.serving.metrics import Metrics
+
+
+class Overloaded(Exception):
+    """Raised by MicroBatcher.submit() when the request queue is full."""
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches for a blocking batch function.
+
+    Requests are queued with submit(). A single batching task takes the first queued request, waits at most `max_wait`
+    seconds for up to `max_batch` requests in total, and runs `fn(items)` on a dedicated single-thread inference executor
+    so the event loop keeps accepting requests during inference. Requests whose deadline has passed by the time their
+    batch is formed are failed with asyncio.TimeoutError without being inferred. With `max_queue`, submit() raises
+    Overloaded instead of queueing once `max_queue` requests are waiting, bounding queueing delay under overload. With
+    `max_inflight` > 1 up to that many batches run concurrently, i.e. one per process of a WorkerPool, given an executor
+    with as many threads.
+
+    Usage:
+        batcher = MicroBatcher(lambda ims: model(ims).tolist(), max_batch=8, max_wait=0.005)
+        await batcher.start()
+        result = await batcher.submit(im, deadline=time.monotonic() + 1.0)
+    """
+
+    def __init__(self, fn, max_batch=8, max_wait=0.005, executor=None, max_queue=0, max_inflight=1):
+        """
+        Initializes the batcher.
+
+        Args:
+            fn (Callable[[list], list]): Blocking function mapping a list of items to a list of results of equal length,
+                an Exception result fails only its own request.
+            max_batch (int): Maximum items per batch.
+            max_wait (float): Maximum seconds to wait for a batch to fill after its first item arrives.
+            executor (concurrent.futures.Executor, optional): Inference executor, a new single-thread one by default.
+            max_queue (int): Maximum waiting requests before submit() raises Overloaded, 0 for unbounded.
+            max_inflight (int): Maximum batches inferred concurrently.
+        """
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor or ThreadPoolExecutor(1, thread_name_prefix="inference")
+        self.max_queue = max_queue
+        self.max_inflight = max_inflight
+        self.queue = None  # asyncio.Queue of (item, deadline, future, t), created on start() in the running loop
+        self.task = None
+        self.inflight = set()  # running batch tasks
+        self.metrics = Metrics()
+
+    async def start(self):
+        """Starts the batching task in the running event loop."""
+        self.queue = asyncio.Queue(self.max_queue)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the batching task and shuts down the inference executor."""
+        tasks = [t for t in (self.task, *self.inflight) if t]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, item, deadline=None):
+        """
+        Queues `item` and returns its result.
+
+        Raises Overloaded if the queue is full, and asyncio.TimeoutError if monotonic `deadline` passes first.
+        """
+        if self.queue.full():
+            self.metrics.rejected += 1
+            raise Overloaded(f"{self.queue.qsize()} requests queued")
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((item, deadline, future, time.monotonic()))
+        self.metrics.requests += 1
+        self.metrics.queue = self.queue.qsize()
+        try:
+            if deadline is None:
+                return await future
+            return await asyncio.wait_for(future, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+
+    async def _batch(self):
+        """Waits for the next batch of live requests, at most `max_batch` long and `max_wait` after the first one."""
+        batch = [await self.queue.get()]
+        end = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = end - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        now, live = time.monotonic(), []
+        self.metrics.queue = self.queue.qsize()
+        for item, deadline, future, t in batch:
+            if future.done():  # client timed out while queued
+                continue
+            if deadline is not None and deadline <= now:  # shed, deadline passed while queued
+                self.metrics.expired += 1
+                future.set_exception(asyncio.TimeoutError())
+            else:
+                self.metrics.wait.add(now - t)
+                live.append((item, future))
+        return live
+
+    async def _run(self):
+        """Batching loop, forms a batch whenever fewer than `max_inflight` batches are running and starts it."""
+        slots = asyncio.Semaphore(self.max_inflight)
+        while True:
+            await slots.acquire()
+            batch = await self._batch()
+            if not batch:
+                slots.release()
+                continue
+            task = asyncio.create_task(self._infer(batch))
+            self.inflight.add(task)
+            task.add_done_callback(lambda t: (self.inflight.discard(t), slots.release()))
+
+    async def _infer(self, batch):
+        """Runs one batch on the inference executor and resolves its futures."""
+        items, futures = zip(*batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.fn, list(items))
+        except Exception as e:
+            for f in futures:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        self.metrics.batches += 1
+        self.metrics.items += len(items)
+        for f, r in zip(futures, results):
+            if not f.done():
+                f.set_exception(r) if isinstance(r, Exception) else f.set_result(r)
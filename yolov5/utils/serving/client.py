@@ -0,0 +1,228 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Client helper for the inference server and benchmark of its request/response encodings.
+
+The benchmark sends the same image as a multipart JPEG upload with a JSON response and as binary frames (raw,
+zlib-compressed and JPEG pixels) with a binary response, reporting bytes on the wire, client encode/decode time and
+end-to-end latency per encoding. Codec costs are also measured offline, without a server, with --offline.
+
+With --stream, frames are pushed over --streams concurrent WebSocket connections at --fps instead, reporting inferred
+and dropped frames, throughput and latency per frame.
+
+Usage:
+    $ python utils/serving/client.py --url http://localhost:5000/v1/object-detection/yolov5s --n 50
+    $ python utils/serving/client.py --offline
+    $ python utils/serving/client.py --url ws://localhost:5000/v1/stream/yolov5s --stream --streams 4 --fps 30
+
+Usage - Python:
+    from utils.serving.client import DetectionClient
+    client = DetectionClient("http://localhost:5000/v1/object-detection/yolov5s")
+    det = client.detect(im)  # RGB HWC uint8 image, returns (n, 6) float32 array of [xyxy, conf, cls]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import requests
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from utils.general import LOGGER, check_requirements, print_args
+from utils.serving.protocol import (
+    CONTENT_TYPE_DETECTIONS,
+    CONTENT_TYPE_FRAME,
+    ENCODING_IMAGE,
+    ENCODING_RAW,
+    ENCODING_ZLIB,
+    decode_detections,
+    encode_frame,
+)
+
+ENCODINGS = {"raw": ENCODING_RAW, "zlib": ENCODING_ZLIB, "jpeg": ENCODING_IMAGE}
+
+
+class DetectionClient:
+    """HTTP client for the inference server detection endpoint, binary protocol by default with JSON as an option."""
+
+    def __init__(self, url, encoding="raw", binary=True, quality=90, timeout=30):
+        """Initializes the client for a detection `url` with frame `encoding` ('raw', 'zlib', 'jpeg') and response
+        format, binary if `binary` else JSON.
+        """
+        self.url, self.encoding, self.binary, self.quality, self.timeout = url, encoding, binary, quality, timeout
+        self.session = requests.Session()  # keep-alive
+        self.request_id = 0
+        self.bytes = [0, 0]  # sent, received
+
+    def encode(self, im):
+        """Encodes an RGB HWC uint8 image as (body, headers) for the configured encoding."""
+        self.request_id += 1
+        headers = {"Accept": CONTENT_TYPE_DETECTIONS if self.binary else "application/json"}
+        if self.encoding == "multipart":
+            return None, headers
+        headers["Content-Type"] = CONTENT_TYPE_FRAME
+        return encode_frame(im, self.request_id, ENCODINGS[self.encoding], self.quality), headers
+
+    def decode(self, r):
+        """Decodes a response to an (n, 6) float32 array of [xyxy, conf, cls], raising on HTTP errors."""
+        r.raise_for_status()
+        if self.binary:
+            det, request_id = decode_detections(r.content)
+            assert request_id == self.request_id, f"response id {request_id} != request id {self.request_id}"
+            return det
+        x = [[d["xmin"], d["ymin"], d["xmax"], d["ymax"], d["confidence"], d["class"]] for d in json.loads(r.content)]
+        return np.array(x, dtype=np.float32).reshape(-1, 6)
+
+    def detect(self, im, size=None):
+        """Runs detection on an RGB HWC uint8 image, optionally at inference `size`, returning (n, 6) detections."""
+        body, headers = self.encode(im)
+        params = {"size": size} if size else None
+        if body is None:  # multipart JPEG upload
+            jpg = cv2.imencode(".jpg", im[..., ::-1], [cv2.IMWRITE_JPEG_QUALITY, self.quality])[1].tobytes()
+            body, files = None, {"image": ("image.jpg", jpg)}
+            self.bytes[0] += len(jpg)
+        else:
+            files = None
+            self.bytes[0] += len(body)
+        r = self.session.post(self.url, data=body, files=files, headers=headers, params=params, timeout=self.timeout)
+        self.bytes[1] += len(r.content)
+        return self.decode(r)
+
+
+async def stream(url, frames, encoding="raw", fps=0.0, quality=90):
+    """
+    Pushes RGB HWC uint8 `frames` over a WebSocket to stream `url` at `fps`, 0 for as fast as possible, receiving
+    detections asynchronously.
+
+    Returns ({frame id: (n, 6) float32 detections or None if dropped}, {frame id: latency seconds}) with ids from 1.
+    """
+    import aiohttp
+
+    sent, results, latency = {}, {}, {}
+    async with aiohttp.ClientSession() as session, session.ws_connect(url, max_msg_size=0) as ws:
+
+        async def receive():
+            """Collects one response per frame sent."""
+            async for msg in ws:
+                det, i = decode_detections(msg.data)
+                results[i], latency[i] = det, time.monotonic() - sent[i]
+                if len(results) == len(frames):
+                    break
+
+        receiver = asyncio.create_task(receive())
+        for i, im in enumerate(frames, 1):
+            body = encode_frame(im, i, ENCODINGS[encoding], quality)
+            sent[i] = time.monotonic()
+            await ws.send_bytes(body)
+            await asyncio.sleep(1 / fps if fps else 0)
+        await receiver
+    return results, latency
+
+
+def benchmark_stream(url, im, n=50, streams=1, fps=0.0, encoding="raw", quality=90):
+    """Logs inferred and dropped frames, throughput and latency of `streams` concurrent streams of `n` frames each."""
+
+    async def run():
+        """Runs all streams concurrently."""
+        return await asyncio.gather(*(stream(url, [im] * n, encoding, fps, quality) for _ in range(streams)))
+
+    t = time.perf_counter()
+    out = asyncio.run(run())
+    dt = time.perf_counter() - t
+    inferred = [s for r, lat in out for i, s in lat.items() if r[i] is not None]
+    dropped = sum(r[i] is None for r, _ in out for i in r)
+    p = np.percentile(inferred, (50, 95)) * 1e3 if inferred else (0, 0)
+    LOGGER.info(("%10s" * 7) % ("streams", "frames", "inferred", "dropped", "fps", "p50 ms", "p95 ms"))
+    LOGGER.info(("%10d" * 4 + "%10.1f" * 3) % (streams, streams * n, len(inferred), dropped, len(inferred) / dt, *p))
+
+
+def benchmark_codecs(im, n=100, quality=90):
+    """Logs request size and client encode time per frame encoding, and response size and decode time for a JSON vs
+    binary response of 50 detections.
+    """
+    from utils.serving.protocol import decode_frame, encode_detections
+
+    def timeit(enc, dec):
+        """Returns the last encoded body and mean encode and decode ms."""
+        t0 = time.perf_counter()
+        for _ in range(n):
+            body = enc()
+        t1 = time.perf_counter()
+        for _ in range(n):
+            dec(body)
+        return body, (t1 - t0) / n * 1e3, (time.perf_counter() - t1) / n * 1e3
+
+    LOGGER.info(("%16s" + "%12s" * 3) % ("codec", "bytes", "encode ms", "decode ms"))
+    for name, encoding in ENCODINGS.items():
+        body, te, td = timeit(lambda e=encoding: encode_frame(im, 0, e, quality), decode_frame)
+        LOGGER.info(("%16s" + "%12d" + "%12.3f" * 2) % (f"frame {name}", len(body), te, td))
+
+    rng = np.random.default_rng(0)
+    det = np.concatenate((rng.uniform(0, 640, (50, 4)), rng.uniform(0, 1, (50, 1)), rng.integers(0, 80, (50, 1))), 1)
+    keys = ("xmin", "ymin", "xmax", "ymax", "confidence", "class", "name")
+    records = [dict(zip(keys, (*x[:5], int(x[5]), f"class{int(x[5])}"))) for x in det.round(2).tolist()]
+    for name, enc, dec in (
+        ("response json", lambda: json.dumps(records).encode(), json.loads),
+        ("response binary", lambda: encode_detections(det), decode_detections),
+    ):
+        body, te, td = timeit(enc, dec)
+        LOGGER.info(("%16s" + "%12d" + "%12.3f" * 2) % (name, len(body), te, td))
+
+
+def benchmark(url, im, n=50, size=None, quality=90):
+    """Logs bytes per request and response and latency percentiles of `n` requests per encoding."""
+    LOGGER.info(("%20s" + "%12s" * 5) % ("encoding", "sent B", "recv B", "dets", "p50 ms", "p95 ms"))
+    for encoding, binary in ("multipart", False), ("raw", True), ("zlib", True), ("jpeg", True), ("raw", False):
+        client = DetectionClient(url, encoding, binary, quality)
+        client.detect(im, size)  # warmup
+        client.bytes = [0, 0]
+        dt = []
+        for _ in range(n):
+            t = time.perf_counter()
+            det = client.detect(im, size)
+            dt.append(time.perf_counter() - t)
+        name = f"{encoding} + {'binary' if binary else 'json'}"
+        p = np.percentile(dt, (50, 95)) * 1e3
+        LOGGER.info(("%20s" + "%12d" * 3 + "%12.1f" * 2) % (name, *(b / n for b in client.bytes), len(det), *p))
+
+
+def parse_opt():
+    """Parses command-line arguments for the encoding benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5000/v1/object-detection/yolov5s", help="detection URL")
+    parser.add_argument("--image", default=ROOT / "data/images/zidane.jpg", help="image file to send")
+    parser.add_argument("--n", type=int, default=50, help="requests per encoding")
+    parser.add_argument("--size", type=int, default=None, help="inference size (pixels), default server --imgsz")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality")
+    parser.add_argument("--offline", action="store_true", help="benchmark codecs only, without a server")
+    parser.add_argument("--stream", action="store_true", help="benchmark WebSocket streaming, --url ws://.../v1/stream")
+    parser.add_argument("--streams", type=int, default=1, help="concurrent streams for --stream")
+    parser.add_argument("--fps", type=float, default=0.0, help="frames per second per stream, 0 unlimited")
+    parser.add_argument("--encoding", default="raw", choices=list(ENCODINGS), help="frame encoding for --stream")
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Runs the codec benchmark and, unless --offline, the end-to-end benchmark against a running server."""
+    im = cv2.imread(str(opt.image))[..., ::-1]  # BGR to RGB
+    if opt.stream:
+        check_requirements("aiohttp>=3.8")
+        return benchmark_stream(opt.url, im, opt.n, opt.streams, opt.fps, opt.encoding, opt.quality)
+    benchmark_codecs(im, opt.n, opt.quality)
+    if not opt.offline:
+        benchmark(opt.url, im, opt.n, opt.size, opt.quality)
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
@@ -0,0 +1,98 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Open-loop load test for the inference server.
+
+Requests are sent at a fixed Poisson arrival --rate regardless of how fast the server answers, so rates above server
+capacity show how admission control behaves under overload: successful requests should keep a bounded tail latency
+while excess requests are shed with 503 (queue full) or 504 (deadline exceeded) instead of queueing without limit.
+
+Usage:
+    $ python utils/serving/server.py --weights yolov5s.pt --max-queue 16
+    $ python utils/serving/loadtest.py --url http://localhost:5000/v1/object-detection/yolov5s --rate 50 --duration 30
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from utils.general import LOGGER, check_requirements, print_args
+
+
+async def load_test(url, data, rate=10.0, duration=10.0, deadline_ms=0, headers=None):
+    """Sends `data` to `url` at Poisson `rate` req/s for `duration` seconds, returning (status, latency) per request."""
+    import aiohttp
+
+    headers = {"Content-Type": "application/octet-stream", **(headers or {})}
+    if deadline_ms:
+        headers["X-Deadline-Ms"] = str(deadline_ms)
+    results = []
+
+    async def request(session):
+        """Sends one request and records its status and latency, status 0 for connection errors."""
+        t = time.monotonic()
+        try:
+            async with session.post(url, data=data, headers=headers) as r:
+                await r.read()
+                status = r.status
+        except aiohttp.ClientError:
+            status = 0
+        results.append((status, time.monotonic() - t))
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        tasks, end = [], time.monotonic() + duration
+        while time.monotonic() < end:
+            tasks.append(asyncio.create_task(request(session)))
+            await asyncio.sleep(random.expovariate(rate))  # Poisson arrivals
+        await asyncio.gather(*tasks)
+    return results
+
+
+def report(results, duration):
+    """Logs request counts per status, goodput and latency percentiles of successful and all requests."""
+    status = Counter(s for s, _ in results)
+    LOGGER.info(f"{len(results)} requests in {duration:.0f}s, status {dict(sorted(status.items()))}")
+    LOGGER.info(f"goodput {status[200] / duration:.1f} req/s, shed {1 - status[200] / max(len(results), 1):.1%}")
+    LOGGER.info(("%12s" + "%10s" * 5) % ("requests", "n", "p50 ms", "p95 ms", "p99 ms", "max ms"))
+    for name, x in ("200", [t for s, t in results if s == 200]), ("all", [t for _, t in results]):
+        if x:
+            p = np.percentile(x, (50, 95, 99, 100)) * 1e3
+            LOGGER.info(("%12s" + "%10d" + "%10.1f" * 4) % (name, len(x), *p))
+
+
+def parse_opt():
+    """Parses command-line arguments for the load test."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5000/v1/object-detection/yolov5s", help="detection URL")
+    parser.add_argument("--image", default=ROOT / "data/images/zidane.jpg", help="image file to send")
+    parser.add_argument("--rate", type=float, default=10.0, help="request arrival rate (req/s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="test duration (seconds)")
+    parser.add_argument(
+        "--deadline-ms", type=float, default=0, help="X-Deadline-Ms request header, 0 for server default"
+    )
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Runs the load test and logs its report."""
+    check_requirements("aiohttp>=3.8")
+    data = Path(opt.image).read_bytes()
+    results = asyncio.run(load_test(opt.url, data, opt.rate, opt.duration, opt.deadline_ms))
+    report(results, opt.duration)
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
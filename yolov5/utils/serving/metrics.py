@@ -0,0 +1,60 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""Serving metrics: request counters, queue gauges and latency percentiles in Prometheus text format."""
+
+from collections import deque
+
+import numpy as np
+
+
+class Window:
+    """Sliding window of the last `n` observations, for percentiles."""
+
+    def __init__(self, n=1024):
+        """Initializes an empty window of length `n`."""
+        self.x = deque(maxlen=n)
+        self.count = 0  # total observations
+        self.sum = 0.0  # total of observations
+
+    def add(self, v):
+        """Adds one observation."""
+        self.x.append(v)
+        self.count += 1
+        self.sum += v
+
+    def percentiles(self, q=(50, 95, 99)):
+        """Returns the percentiles `q` of the window, zeros if empty."""
+        return np.percentile(self.x, q).tolist() if self.x else [0.0] * len(q)
+
+
+class Metrics:
+    """Per-model serving metrics, updated by the MicroBatcher and the server."""
+
+    def __init__(self):
+        """Initializes zeroed counters and empty latency windows."""
+        self.requests = 0  # requests admitted to the queue
+        self.rejected = 0  # requests shed because the queue was full
+        self.expired = 0  # requests shed because their deadline passed while queued
+        self.timeouts = 0  # admitted requests answered with deadline exceeded, including expired
+        self.degraded = 0  # requests inferred at a reduced size under load
+        self.dropped = 0  # stream frames dropped because the client sent newer frames faster than inference
+        self.batches = 0  # batches inferred
+        self.items = 0  # requests inferred
+        self.queue = 0  # current queue length
+        self.streams = 0  # current stream connections
+        self.wait = Window()  # seconds from admission to batch start
+        self.latency = Window()  # seconds from request start to response
+
+    def render(self, labels=""):
+        """Returns the metrics in Prometheus text exposition format, with optional `labels`, i.e. 'model="yolov5s"'."""
+        lines = []
+        for k in "requests", "rejected", "expired", "timeouts", "degraded", "dropped", "batches", "items":
+            lines.append(f"yolov5_{k}_total{{{labels}}} {getattr(self, k)}")
+        lines.append(f"yolov5_queue_length{{{labels}}} {self.queue}")
+        lines.append(f"yolov5_streams{{{labels}}} {self.streams}")
+        for k in "wait", "latency":
+            w = getattr(self, k)
+            for q, v in zip((0.5, 0.95, 0.99), w.percentiles()):
+                lines.append(f'yolov5_{k}_seconds{{{labels}{"," if labels else ""}quantile="{q}"}} {v:.6f}')
+            lines.append(f"yolov5_{k}_seconds_sum{{{labels}}} {w.sum:.6f}")
+            lines.append(f"yolov5_{k}_seconds_count{{{labels}}} {w.count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,229 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Multi-process CPU inference worker pool sharing one copy of the model weights.
+
+The parent loads the model once and forks N worker processes. Forked workers share the parent's memory pages
+copy-on-write, and inference never writes to the weights, so N workers cost one copy of the weights plus their own
+activations instead of N copies. Each worker runs pre- and post-processing in its own interpreter, free of the
+parent's GIL, with `torch.set_num_threads()` partitioning intra-op threads between workers and, on Linux, pinned to
+its own cores.
+
+Usage - Python:
+    from utils.serving.pool import WorkerPool
+    pool = WorkerPool(lambda items: predict(model, items), workers=4).start()
+    results = pool(items)  # blocking and thread-safe, runs on the least-loaded worker
+    pool.close()
+
+Usage - benchmark throughput scaling with worker count:
+    $ python utils/serving/pool.py --weights yolov5s.pt --workers 1 2 4 --batch 1 --n 64
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from utils.general import LOGGER, colorstr, print_args
+
+
+def cpu_cores():
+    """Returns the sorted list of CPU cores this process may run on."""
+    return sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+
+
+def _worker(conn, fn, threads, cores):
+    """Worker process loop, runs `fn(items)` for every message received on `conn` until None."""
+    import torch
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    while True:
+        try:
+            items = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if items is None:
+            break
+        try:
+            conn.send((True, fn(items)))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+
+class WorkerPool:
+    """
+    Forked worker processes running a blocking batch function `fn(items) -> results`, i.e. over a shared model.
+
+    Calls are dispatched 'round_robin' or to the 'least_loaded' worker, the one with fewest calls in progress. Each
+    worker runs one call at a time, so up to `workers` threads, i.e. MicroBatcher executor threads, can call the pool
+    concurrently.
+    """
+
+    def __init__(self, fn, workers=2, threads=0, pin=True, dispatch="least_loaded", cores=None):
+        """
+        Initializes the pool, workers are forked on start().
+
+        Args:
+            fn (Callable[[list], list]): Blocking batch function closing over the model, inherited by fork.
+            workers (int): Number of worker processes.
+            threads (int): Intra-op threads per worker, 0 for pool cores // workers.
+            pin (bool): Pin each worker to its own cores, Linux only.
+            dispatch (str): 'least_loaded' or 'round_robin'.
+            cores (list[int], optional): CPU cores split between the workers, i.e. a disjoint share per pool when
+                serving several models. Defaults to all cores available to the process.
+        """
+        assert dispatch in {"least_loaded", "round_robin"}, f"invalid dispatch '{dispatch}'"
+        self.fn, self.workers, self.pin, self.dispatch = fn, workers, pin, dispatch
+        cores = cores or cpu_cores()
+        self.threads = threads or max(len(cores) // workers, 1)
+        self.cores = [[cores[(k * self.threads + j) % len(cores)] for j in range(self.threads)] for k in range(workers)]
+        self.procs, self.conns, self.locks = [], [], []
+        self.load = [0] * workers  # calls in progress per worker
+        self.calls = [0] * workers  # total calls per worker
+        self.lock = threading.Lock()
+        self.next = itertools.cycle(range(workers))
+
+    def start(self):
+        """Forks the workers, returns self."""
+        import multiprocessing as mp
+
+        ctx = mp.get_context("fork")  # ValueError on Windows, where fork is unavailable
+        gc.collect()
+        gc.freeze()  # keep the parent's objects out of GC passes in workers, which would copy their pages
+        for k in range(self.workers):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(
+                target=_worker,
+                args=(child, self.fn, self.threads, self.cores[k] if self.pin else None),
+                name=f"inference-{k}",
+                daemon=True,
+            )
+            p.start()
+            child.close()
+            self.procs.append(p)
+            self.conns.append(parent)
+            self.locks.append(threading.Lock())
+        gc.unfreeze()
+        LOGGER.info(
+            f"{colorstr('WorkerPool:')} {self.workers} workers x {self.threads} threads, {self.dispatch} dispatch"
+            + (f", pinned to cores {self.cores}" if self.pin and hasattr(os, "sched_setaffinity") else "")
+        )
+        return self
+
+    def _select(self):
+        """Selects a worker and counts the call as in progress."""
+        with self.lock:
+            if self.dispatch == "round_robin":
+                k = next(self.next)
+            else:
+                k = min(range(self.workers), key=self.load.__getitem__)
+            self.load[k] += 1
+            self.calls[k] += 1
+        return k
+
+    def __call__(self, items):
+        """Runs `fn(items)` on a worker and returns its results, re-raising worker exceptions."""
+        k = self._select()
+        try:
+            with self.locks[k]:
+                self.conns[k].send(items)
+                ok, result = self.conns[k].recv()
+        except EOFError as e:
+            raise RuntimeError(f"inference worker {k} exited with code {self.procs[k].exitcode}") from e
+        finally:
+            with self.lock:
+                self.load[k] -= 1
+        if not ok:
+            raise result
+        return result
+
+    def close(self):
+        """Stops the workers."""
+        for conn, p in zip(self.conns, self.procs):
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            p.join(5)
+            if p.is_alive():
+                p.terminate()
+            conn.close()
+        self.procs, self.conns, self.locks = [], [], []
+
+    def memory(self):
+        """Returns (shared, private) MB of resident memory per worker from /proc, Linux only, else empty lists."""
+        shared, private = [], []
+        for p in self.procs:
+            try:
+                lines = Path(f"/proc/{p.pid}/smaps_rollup").read_text().splitlines()[1:]  # skip address range
+            except OSError:
+                return [], []
+            kb = {k: int(v.split()[0]) for k, v in (line.split(":")[:2] for line in lines)}
+            shared.append((kb["Shared_Clean"] + kb["Shared_Dirty"]) / 1024)
+            private.append((kb["Private_Clean"] + kb["Private_Dirty"]) / 1024)
+        return shared, private
+
+
+def parse_opt():
+    """Parses command-line arguments for the worker pool benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default=ROOT / "yolov5s.pt", help="model path")
+    parser.add_argument("--image", default=ROOT / "data/images/zidane.jpg", help="image file to infer")
+    parser.add_argument("--imgsz", "--img", "--img-size", type=int, default=640, help="inference size (pixels)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="worker counts to benchmark")
+    parser.add_argument("--threads", type=int, default=0, help="threads per worker, 0 for cores // workers")
+    parser.add_argument("--dispatch", default="least_loaded", choices=["least_loaded", "round_robin"], help="dispatch")
+    parser.add_argument("--no-pin", action="store_true", help="do not pin workers to cores")
+    parser.add_argument("--batch", type=int, default=1, help="images per call")
+    parser.add_argument("--n", type=int, default=64, help="images per benchmark")
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Benchmarks throughput and per-worker memory of pools of increasing size over one loaded model."""
+    import cv2
+
+    from utils.serving.server import load_model, predict
+
+    model = load_model(opt.weights, imgsz=opt.imgsz)
+    im = cv2.imread(str(opt.image))[..., ::-1]  # BGR to RGB
+    batch = [(im, opt.imgsz, None)] * opt.batch
+    calls = max(opt.n // opt.batch, 1)
+    LOGGER.info(("%10s" * 3 + "%12s" * 4) % ("workers", "threads", "images", "img/s", "speedup", "shared MB", "own MB"))
+    base = None
+    for workers in opt.workers:
+        pool = WorkerPool(lambda items: predict(model, items), workers, opt.threads, not opt.no_pin, opt.dispatch)
+        pool.start()
+        with ThreadPoolExecutor(workers) as ex:  # one caller thread per worker, like MicroBatcher max_inflight
+            list(ex.map(pool, [batch] * workers))  # warmup
+            t = time.perf_counter()
+            list(ex.map(pool, [batch] * calls))
+            dt = time.perf_counter() - t
+        shared, private = pool.memory()
+        pool.close()
+        fps = calls * opt.batch / dt
+        base = base or fps
+        mem = (np.mean(shared), np.mean(private)) if shared else (float("nan"),) * 2
+        s = (workers, pool.threads, calls * opt.batch, fps, fps / base, *mem)
+        LOGGER.info(("%10d" * 3 + "%12.1f" * 2 + "%12.0f" * 2) % s)
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
@@ -0,0 +1,121 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Compact binary request/response protocol for the inference server.
+
+A request is a fixed 24-byte little-endian header followed by the frame payload:
+
+    magic    4s   b'Y5F1'
+    encoding B    0 raw pixels, 1 encoded image (JPEG/PNG/...), 2 zlib-compressed raw pixels
+    dtype    B    0 uint8
+    channels H    raw pixel channels, 1 gray, 3 RGB or 4 RGBA, ignored for encoded images
+    height   I    raw pixel height, height x width at most MAX_PIXELS
+    width    I    raw pixel width
+    id       Q    request id, echoed in the response
+
+A response is a fixed 20-byte header followed by `count` float32 rows of [x1, y1, x2, y2, conf, cls] in pixels:
+
+    magic    4s   b'Y5D1'
+    status   B    0 ok, 1 error (payload is a UTF-8 message), 2 frame dropped without inference
+    format   B    0 xyxy
+    count    I    number of detections
+    id       Q    request id
+
+Usage:
+    body = encode_frame(im, request_id=7, encoding=ENCODING_RAW)  # client
+    im, request_id = decode_frame(body)  # server
+    body = encode_detections(det, request_id)  # server
+    det, request_id = decode_detections(body)  # client, (n, 6) float32 array, None if dropped
+"""
+
+import struct
+import zlib
+
+import cv2
+import numpy as np
+
+CONTENT_TYPE_FRAME = "application/x-yolov5-frame"
+CONTENT_TYPE_DETECTIONS = "application/x-yolov5-detections"
+ENCODING_RAW, ENCODING_IMAGE, ENCODING_ZLIB = 0, 1, 2
+FRAME = struct.Struct("<4sBBHIIQ")  # request header
+DETECTIONS = struct.Struct("<4sBBxxIQ")  # response header
+FRAME_MAGIC, DETECTIONS_MAGIC = b"Y5F1", b"Y5D1"
+STATUS_OK, STATUS_ERROR, STATUS_DROPPED = 0, 1, 2
+MAX_PIXELS = 2**25  # maximum raw frame height x width, 32 MP covers 8K UHD
+
+
+def encode_frame(im, request_id=0, encoding=ENCODING_RAW, quality=90):
+    """Encodes an RGB HWC uint8 image as a binary request, raw, zlib-compressed or as JPEG with `quality`."""
+    h, w = im.shape[:2]
+    c = im.shape[2] if im.ndim == 3 else 1
+    if encoding == ENCODING_IMAGE:
+        payload = cv2.imencode(".jpg", im[..., ::-1] if c == 3 else im, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]
+    elif encoding == ENCODING_ZLIB:
+        payload = zlib.compress(np.ascontiguousarray(im), 1)
+    else:
+        payload = np.ascontiguousarray(im)
+    return FRAME.pack(FRAME_MAGIC, encoding, 0, c, h, w, request_id) + memoryview(payload).cast("B")
+
+
+def frame_id(data):
+    """Returns the request id of a binary request from its header alone, without decoding the frame."""
+    if len(data) < FRAME.size:
+        raise ValueError("frame too short")
+    return FRAME.unpack_from(data)[-1]
+
+
+def decode_frame(data):
+    """Decodes a binary request to an (RGB HWC uint8 image, request id) tuple, raising ValueError if malformed."""
+    if len(data) < FRAME.size:
+        raise ValueError("frame too short")
+    magic, encoding, dtype, c, h, w, request_id = FRAME.unpack_from(data)
+    if magic != FRAME_MAGIC or dtype != 0:
+        raise ValueError(f"unsupported frame header {magic}, dtype {dtype}")
+    payload = memoryview(data)[FRAME.size :]
+    if encoding != ENCODING_IMAGE and not (0 < h and 0 < w and h * w <= MAX_PIXELS and c in (1, 3, 4)):
+        raise ValueError(f"unsupported frame shape {h}x{w}x{c}")
+    if encoding == ENCODING_IMAGE:
+        im = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        if im is None or not 0 < im.shape[0] * im.shape[1] <= MAX_PIXELS:
+            raise ValueError("invalid encoded image")
+        return im[..., ::-1], request_id  # BGR to RGB
+    if encoding == ENCODING_ZLIB:
+        z = zlib.decompressobj()
+        payload = z.decompress(payload, h * w * c + 1)  # bounded, a compressed bomb fails below without inflating
+        if z.unconsumed_tail or z.unused_data:
+            raise ValueError(f"frame payload exceeds {h}x{w}x{c}")
+    elif encoding != ENCODING_RAW:
+        raise ValueError(f"unsupported frame encoding {encoding}")
+    if len(payload) != h * w * c:
+        raise ValueError(f"frame payload {len(payload)} bytes, expected {h}x{w}x{c}")
+    im = np.frombuffer(payload, np.uint8).reshape(h, w, c)
+    return (im[..., :3] if c > 1 else np.repeat(im, 3, 2)), request_id
+
+
+def encode_detections(det, request_id=0):
+    """Encodes (n, 6) [xyxy, conf, cls] detections as a binary response."""
+    det = np.ascontiguousarray(det, dtype="<f4")
+    return DETECTIONS.pack(DETECTIONS_MAGIC, STATUS_OK, 0, len(det), request_id) + det.tobytes()
+
+
+def encode_error(message, request_id=0):
+    """Encodes an error message as a binary response."""
+    return DETECTIONS.pack(DETECTIONS_MAGIC, STATUS_ERROR, 0, 0, request_id) + message.encode()
+
+
+def encode_dropped(request_id=0):
+    """Encodes a response for a frame dropped without inference."""
+    return DETECTIONS.pack(DETECTIONS_MAGIC, STATUS_DROPPED, 0, 0, request_id)
+
+
+def decode_detections(data):
+    """Decodes a binary response to an ((n, 6) float32 detections array, request id) tuple, with detections None for
+    dropped frames, raising ValueError on error responses.
+    """
+    magic, status, _, n, request_id = DETECTIONS.unpack_from(data)
+    if magic != DETECTIONS_MAGIC:
+        raise ValueError(f"unsupported response header {magic}")
+    if status == STATUS_DROPPED:
+        return None, request_id
+    if status:
+        raise ValueError(bytes(data[DETECTIONS.size :]).decode())
+    return np.frombuffer(data, "<f4", n * 6, DETECTIONS.size).reshape(n, 6), request_id
@@ -0,0 +1,432 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Asyncio HTTP inference server exposing one or more local YOLOv5 models with dynamic micro-batching.
+
+Request handlers decode uploaded images off the event loop and queue them on a per-model MicroBatcher, which forms
+batches by size or wait time and runs them on a dedicated inference thread. Each request carries a deadline, from the
+'X-Deadline-Ms' header or --timeout, and gets a 504 response if it is not answered in time.
+
+Requests with Content-Type 'application/x-yolov5-frame' carry a binary frame (utils/serving/protocol.py) with raw,
+zlib-compressed or encoded pixels, and requests with Accept 'application/x-yolov5-detections' get a binary (n, 6)
+float32 response instead of JSON.
+
+Video clients can keep a WebSocket open on the stream endpoint instead, sending binary frames and receiving binary
+detections asynchronously, tagged by frame id. Each connection infers at most --stream-inflight frames at a time and
+keeps at most --stream-queue newer frames waiting; frames pushed beyond that replace the oldest waiting frame, which is
+answered as dropped, so a client outpacing inference always gets its latest frames inferred with bounded latency.
+Frames from all connections are batched together by the model MicroBatcher.
+
+With --workers N, each model is loaded once and N forked worker processes infer batches concurrently, sharing the
+weights copy-on-write, each with its own share of intra-op threads and CPU cores (utils/serving/pool.py). Models are
+given disjoint shares of the available cores.
+
+Admission control keeps latency bounded under overload: requests beyond --max-queue waiting per model are rejected with
+503, requests whose deadline passes while queued are shed before inference, and with --degrade-queue requests arriving
+to a long queue are inferred at the smaller --degrade-size.
+
+Usage:
+    $ python utils/serving/server.py --weights yolov5s.pt --port 5000
+    $ curl -X POST -F image=@zidane.jpg 'http://localhost:5000/v1/object-detection/yolov5s'
+    $ python utils/serving/client.py --url ws://localhost:5000/v1/stream/yolov5s --stream --fps 30
+
+Endpoints:
+    POST /v1/object-detection/{model}  multipart 'image' field, encoded image body or binary frame, optional '?size=640'
+    GET  /v1/stream/{model}            WebSocket of binary frames and detections, optional '?size=640'
+    GET  /health                       liveness, 200 once the server is up
+    GET  /ready                        readiness, 200 once all models are loaded and warmed up, else 503
+    GET  /metrics                      Prometheus metrics, i.e. queue length, wait time, shed counts
+"""
+
+import argparse
+import asyncio
+import io
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[2]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+
+from PIL import Image
+
+from utils.general import LOGGER, check_requirements, colorstr, make_divisible, print_args
+from utils.serving.batcher import MicroBatcher, Overloaded
+from utils.serving.pool import WorkerPool, cpu_cores
+from utils.serving.protocol import (
+    CONTENT_TYPE_DETECTIONS,
+    CONTENT_TYPE_FRAME,
+    decode_frame,
+    encode_detections,
+    encode_dropped,
+    encode_error,
+    frame_id,
+)
+
+DETECTION_URL = "/v1/object-detection/{model}"
+STREAM_URL = "/v1/stream/{model}"
+
+
+def load_model(weights, device="", half=False, imgsz=640, compile_cache=None, compile_shapes=None):
+    """
+    Loads local `weights` as an AutoShape DetectMultiBackend model and runs one warmup inference.
+
+    `compile_cache` is an optional directory caching compiled TorchScript and OpenVINO models across restarts.
+    `compile_shapes` are optional torch.compile() shape buckets of PyTorch models, compiled before the first request.
+    """
+    from models.common import AutoShape, DetectMultiBackend
+    from utils.torch_utils import select_device
+
+    model = DetectMultiBackend(
+        weights, device=select_device(device), fp16=half, compile_cache=compile_cache, compile_shapes=compile_shapes
+    )
+    if compile_shapes:
+        model.warmup(imgsz=(1, 3, imgsz, imgsz))  # compile all buckets
+    model = AutoShape(model)
+    model(Image.new("RGB", (imgsz, imgsz)), size=imgsz)  # warmup
+    return model
+
+
+def decode(data):
+    """Decodes encoded image bytes to an RGB PIL image."""
+    return Image.open(io.BytesIO(data)).convert("RGB")
+
+
+def predict(model, items):
+    """
+    Runs a batch of (image, size, request_id) items, one AutoShape call per size.
+
+    Returns per image a binary response (utils/serving/protocol.py) if request_id is not None, else JSON records. If a
+    call fails its images are retried one by one, so a bad input returns its own exception and fails only its request.
+    """
+    results = [None] * len(items)
+
+    def run(idx, size):
+        """Infers images `idx` at `size` in one call, storing their results."""
+        r = model([items[i][0] for i in idx], size=size)
+        a, o = r.numpy()
+        for j, i in enumerate(idx):
+            request_id = items[i][2]
+            results[i] = r.json(j) if request_id is None else encode_detections(a[o[j] : o[j + 1]], request_id)
+
+    for size in {x[1] for x in items}:
+        idx = [i for i, x in enumerate(items) if x[1] == size]
+        try:
+            run(idx, size)
+        except Exception as e:
+            if len(idx) == 1:
+                results[idx[0]] = e
+                continue
+            for i in idx:  # isolate the failing images
+                try:
+                    run([i], size)
+                except Exception as e:
+                    results[i] = e
+    return results
+
+
+class Server:
+    """Asyncio HTTP server with per-model micro-batching, deadlines and health/readiness endpoints."""
+
+    def __init__(
+        self,
+        weights,
+        device="",
+        half=False,
+        imgsz=640,
+        max_batch=8,
+        max_wait=0.005,
+        timeout=10.0,
+        max_queue=64,
+        degrade_queue=0,
+        degrade_size=320,
+        stream_inflight=1,
+        stream_queue=1,
+        workers=0,
+        dispatch="least_loaded",
+        compile_cache=None,
+        compile_shapes=None,
+    ):
+        """Initializes the server for local `weights`, models are loaded in the background when the app starts."""
+        self.weights = weights
+        self.device, self.half, self.imgsz = device, half, imgsz
+        self.max_batch, self.max_wait, self.timeout = max_batch, max_wait, timeout
+        self.max_queue, self.degrade_queue, self.degrade_size = max_queue, degrade_queue, degrade_size
+        self.stream_inflight, self.stream_queue = stream_inflight, max(stream_queue, 1)
+        self.workers, self.dispatch = workers, dispatch
+        self.compile_cache, self.compile_shapes = compile_cache, compile_shapes
+        self.models = {}  # name: model
+        self.batchers = {}  # name: MicroBatcher
+        self.pools = []  # WorkerPools with --workers
+        self.ready = False
+
+    def app(self):
+        """Returns the aiohttp web application."""
+        from aiohttp import web
+
+        app = web.Application(client_max_size=32 * 1024**2)
+        app.add_routes(
+            [
+                web.post(DETECTION_URL, self.detect),
+                web.get(STREAM_URL, self.stream),
+                web.get("/health", self.health),
+                web.get("/ready", self.readiness),
+                web.get("/metrics", self.metrics),
+            ]
+        )
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    async def on_startup(self, app):
+        """Starts loading models in the background so /health answers immediately."""
+        app["loader"] = asyncio.create_task(self.load())
+
+    async def on_cleanup(self, app):
+        """Stops the batchers."""
+        app["loader"].cancel()
+        for b in self.batchers.values():
+            await b.stop()
+        for p in self.pools:
+            p.close()
+
+    async def load(self):
+        """Loads all models off the event loop and starts one batcher per model."""
+        loop = asyncio.get_running_loop()
+        cores, n = cpu_cores(), len(self.weights)
+        for i, w in enumerate(self.weights):
+            name = Path(w).stem
+            args = w, self.device, self.half, self.imgsz, self.compile_cache, self.compile_shapes
+            model = await loop.run_in_executor(None, load_model, *args)
+            fn, executor, inflight = lambda items, m=model: predict(m, items), None, 1
+            if self.workers:
+                share = cores[i * len(cores) // n : (i + 1) * len(cores) // n] or cores  # disjoint cores per model
+                fn = WorkerPool(fn, self.workers, dispatch=self.dispatch, cores=share).start()
+                executor, inflight = ThreadPoolExecutor(self.workers, thread_name_prefix="inference"), self.workers
+                self.pools.append(fn)
+            batcher = MicroBatcher(fn, self.max_batch, self.max_wait, executor, self.max_queue, inflight)
+            await batcher.start()
+            self.models[name], self.batchers[name] = model, batcher
+            LOGGER.info(f"Loaded {name} from {w}")
+        self.ready = True
+        LOGGER.info(f"{colorstr('Server:')} ready, models {list(self.models)}")
+
+    async def health(self, request):
+        """Liveness endpoint."""
+        from aiohttp import web
+
+        return web.json_response({"status": "ok"})
+
+    async def readiness(self, request):
+        """Readiness endpoint, 503 until all models are loaded."""
+        from aiohttp import web
+
+        return web.json_response({"ready": self.ready, "models": list(self.models)}, status=200 if self.ready else 503)
+
+    async def metrics(self, request):
+        """Prometheus metrics endpoint."""
+        from aiohttp import web
+
+        text = "".join(b.metrics.render(f'model="{k}"') for k, b in self.batchers.items())
+        return web.Response(text=text, content_type="text/plain")
+
+    def deadline(self, request):
+        """
+        Returns the monotonic deadline of a request from its 'X-Deadline-Ms' header or the server timeout.
+
+        Raises ValueError if the header is not a positive number of milliseconds.
+        """
+        ms = request.headers.get("X-Deadline-Ms")
+        if ms is None:
+            return time.monotonic() + self.timeout
+        ms = float(ms)
+        if not 0 < ms < math.inf:
+            raise ValueError(f"X-Deadline-Ms must be positive, not {ms}")
+        return time.monotonic() + ms / 1000
+
+    def size(self, request, name):
+        """
+        Returns the '?size=' inference size of a request to model `name`, rounded up to a multiple of its stride.
+
+        Raises ValueError if the size is not an integer in [32, 4 * --imgsz], bounding the letterbox memory per image.
+        """
+        size = int(request.query.get("size", self.imgsz))
+        if not 32 <= size <= 4 * self.imgsz:
+            raise ValueError(f"size must be in [32, {4 * self.imgsz}], not {size}")
+        return make_divisible(size, int(self.models[name].stride))
+
+    async def detect(self, request):
+        """Detection endpoint, answers with JSON records of xyxy boxes like the Flask REST API or binary detections."""
+        from aiohttp import web
+
+        t = time.monotonic()
+        name = request.match_info["model"]
+        if name not in self.batchers:
+            status = 404 if self.ready else 503
+            return web.json_response({"error": f"model '{name}' not available"}, status=status)
+        try:
+            deadline, size = self.deadline(request), self.size(request, name)
+        except ValueError as e:
+            return web.json_response({"error": f"invalid request: {e}"}, status=400)
+        if request.content_type.startswith("multipart/"):
+            field = (await request.post()).get("image")
+            data = field.file.read() if field is not None else b""
+        else:
+            data = await request.read()
+        if not data:
+            return web.json_response({"error": "no image"}, status=400)
+        binary = CONTENT_TYPE_DETECTIONS in request.headers.get("Accept", "")
+        request_id = 0 if binary else None
+        try:
+            if request.content_type == CONTENT_TYPE_FRAME:
+                im, request_id = await asyncio.get_running_loop().run_in_executor(None, decode_frame, data)
+                request_id = request_id if binary else None
+            else:
+                im = await asyncio.get_running_loop().run_in_executor(None, decode, data)
+        except Exception as e:
+            return web.json_response({"error": f"invalid image: {e}"}, status=400)
+        batcher = self.batchers[name]
+        if self.degrade_queue and batcher.queue.qsize() >= self.degrade_queue and size > self.degrade_size:
+            size = self.degrade_size  # degrade under load
+            batcher.metrics.degraded += 1
+        try:
+            result = await batcher.submit((im, size, request_id), deadline)
+        except Overloaded:
+            return web.json_response({"error": "overloaded"}, status=503, headers={"Retry-After": "1"})
+        except asyncio.TimeoutError:
+            return web.json_response({"error": "deadline exceeded"}, status=504)
+        except Exception as e:
+            return web.json_response({"error": f"inference failed: {e}"}, status=500)
+        batcher.metrics.latency.add(time.monotonic() - t)
+        if binary:
+            return web.Response(body=result, content_type=CONTENT_TYPE_DETECTIONS)
+        return web.Response(text=result, content_type="application/json")
+
+    async def stream(self, request):
+        """WebSocket stream endpoint, answers every binary frame with binary detections, an error or 'dropped'."""
+        from aiohttp import WSMsgType, web
+
+        name = request.match_info["model"]
+        if name not in self.batchers:
+            status = 404 if self.ready else 503
+            return web.json_response({"error": f"model '{name}' not available"}, status=status)
+        try:
+            size = self.size(request, name)
+        except ValueError as e:
+            return web.json_response({"error": f"invalid request: {e}"}, status=400)
+        batcher = self.batchers[name]
+        ws = web.WebSocketResponse(max_msg_size=32 * 1024**2)
+        await ws.prepare(request)
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue(self.stream_queue)  # waiting (data, frame id, t)
+
+        async def answer(data, i, t):
+            """Returns the encoded detections, error or 'dropped' answer of frame `i`."""
+            try:
+                im, _ = await loop.run_in_executor(None, decode_frame, data)
+            except ValueError as e:
+                return encode_error(f"invalid image: {e}", i)
+            try:
+                result = await batcher.submit((im, size, i), t + self.timeout)
+            except (Overloaded, asyncio.TimeoutError):
+                batcher.metrics.dropped += 1
+                return encode_dropped(i)
+            except Exception as e:  # answer every frame, keep the stream alive
+                LOGGER.warning(f"WARNING ⚠️ stream frame {i} failed: {e}")
+                return encode_error(f"inference failed: {e}", i)
+            batcher.metrics.latency.add(time.monotonic() - t)
+            return result
+
+        async def infer():
+            """Infers waiting frames one at a time, sending each result as soon as it is ready."""
+            while True:
+                result = await answer(*await pending.get())
+                if not ws.closed:
+                    await ws.send_bytes(result)
+
+        workers = [asyncio.create_task(infer()) for _ in range(self.stream_inflight)]
+        batcher.metrics.streams += 1
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.BINARY:
+                    continue
+                try:
+                    i = frame_id(msg.data)
+                except ValueError as e:
+                    await ws.send_bytes(encode_error(str(e)))
+                    continue
+                if pending.full():  # client outpaces inference, drop the oldest waiting frame
+                    _, j, _ = pending.get_nowait()
+                    batcher.metrics.dropped += 1
+                    await ws.send_bytes(encode_dropped(j))
+                pending.put_nowait((msg.data, i, time.monotonic()))
+        finally:
+            batcher.metrics.streams -= 1
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return ws
+
+
+def parse_opt():
+    """Parses command-line arguments for the inference server."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", nargs="+", type=str, default=ROOT / "yolov5s.pt", help="model path(s)")
+    parser.add_argument("--host", default="0.0.0.0", help="host address")
+    parser.add_argument("--port", type=int, default=5000, help="port number")
+    parser.add_argument("--imgsz", "--img", "--img-size", type=int, default=640, help="default inference size (pixels)")
+    parser.add_argument("--device", default="", help="cuda device, i.e. 0 or 0,1,2,3 or cpu")
+    parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
+    parser.add_argument("--max-batch", type=int, default=8, help="maximum images per batch")
+    parser.add_argument("--max-wait", type=float, default=5.0, help="maximum ms to wait for a batch to fill")
+    parser.add_argument("--timeout", type=float, default=10.0, help="default request deadline (seconds)")
+    parser.add_argument("--max-queue", type=int, default=64, help="maximum queued requests per model, 0 unbounded")
+    parser.add_argument("--degrade-queue", type=int, default=0, help="queue length to infer at --degrade-size, 0 off")
+    parser.add_argument("--degrade-size", type=int, default=320, help="inference size (pixels) under load")
+    parser.add_argument("--stream-inflight", type=int, default=1, help="frames inferred at a time per stream")
+    parser.add_argument("--stream-queue", type=int, default=1, help="newer frames waiting per stream before dropping")
+    parser.add_argument("--workers", type=int, default=0, help="forked inference processes per model, 0 in-process")
+    parser.add_argument("--dispatch", default="least_loaded", choices=["least_loaded", "round_robin"], help="workers")
+    parser.add_argument("--compile-cache", type=str, default=None, help="compiled TorchScript/OpenVINO model cache dir")
+    parser.add_argument("--compile", nargs="*", dest="compile_shapes", metavar="SHAPE", help="torch.compile() buckets")
+    opt = parser.parse_args()
+    from models.common import parse_shapes
+
+    opt.compile_shapes = parse_shapes(opt.compile_shapes)
+    opt.weights = opt.weights if isinstance(opt.weights, list) else [opt.weights]
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Runs the inference server."""
+    check_requirements("aiohttp>=3.8")
+    from aiohttp import web
+
+    server = Server(
+        opt.weights,
+        opt.device,
+        opt.half,
+        opt.imgsz,
+        opt.max_batch,
+        opt.max_wait / 1000,
+        opt.timeout,
+        opt.max_queue,
+        opt.degrade_queue,
+        opt.degrade_size,
+        opt.stream_inflight,
+        opt.stream_queue,
+        opt.workers,
+        opt.dispatch,
+        opt.compile_cache,
+        opt.compile_shapes,
+    )
+    web.run_app(server.app(), host=opt.host, port=opt.port)
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
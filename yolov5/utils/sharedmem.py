@@ -0,0 +1,177 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Shared-memory frame transport between capture and inference processes.
+
+A FrameRing is one shared memory block holding, per stream, a ring of preallocated uint8 frame slots with per-slot
+metadata (sequence number, stream id, timestamp, shape). Each stream has a single producer, so no locks are needed:
+the producer marks the oldest slot as being written, writes the pixels in place, then publishes its metadata. The
+consumer reads the newest published slot of each stream as a zero-copy NumPy view and holds it, so the producer skips
+that slot until the consumer reads the next frame; without holding, frames stay valid for `slots - 1` newer frames.
+
+Usage:
+    ring = FrameRing(streams=2, slots=4, create=True)  # consumer, owns the block
+    ring = FrameRing(ring.name)  # producer, in another process
+    ring.write(0, im, time.time())  # producer of stream 0
+    im, meta = ring.read(0)  # consumer, zero-copy view of the newest frame of stream 0, held until the next read
+    assert ring.valid(0, meta)  # not overwritten while in use
+"""
+
+import math
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+HEADER = np.dtype([("magic", "<u8"), ("streams", "<i8"), ("slots", "<i8"), ("slot_bytes", "<i8")])
+INFO = np.dtype(
+    [
+        ("head", "<i8"),  # frames published
+        ("next", "<i8"),  # slot being or to be written
+        ("hold", "<i8"),  # slot held by the consumer, -1 for none
+        ("state", "<i8"),
+        ("fps", "<f8"),
+        ("frames", "<f8"),
+        ("pid", "<i8"),
+    ]
+)
+META = np.dtype([("seq", "<i8"), ("t", "<f8"), ("stream", "<i4"), ("h", "<i4"), ("w", "<i4"), ("c", "<i4")])
+MAGIC = 0x59354652494E4731  # 'Y5FRING1'
+STARTING, RUNNING, DONE, FAILED = 0, 1, 2, 3  # stream states
+
+
+class FrameRing:
+    """Per-stream rings of preallocated uint8 frame slots with metadata in one shared memory block."""
+
+    def __init__(self, name=None, streams=1, slots=4, slot_bytes=3840 * 2160 * 3, create=False):
+        """
+        Creates a new block if `create`, else attaches to the existing block `name`, whose layout is read from its
+        header.
+
+        Slots are sized for `slot_bytes`, 4K BGR by default; shared memory pages are only backed once written, so
+        oversized slots cost address space, not RAM.
+        """
+        if create:
+            size = self._offsets(streams, slots, slot_bytes)[-1]
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+            header = np.ndarray(1, HEADER, self.shm.buf)
+            header[0] = (MAGIC, streams, slots, slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+            header = np.ndarray(1, HEADER, self.shm.buf)
+            assert header[0]["magic"] == MAGIC, f"{name} is not a FrameRing"
+            streams, slots, slot_bytes = (int(header[0][k]) for k in ("streams", "slots", "slot_bytes"))
+        self.name, self.owner = self.shm.name, create
+        self.streams, self.slots, self.slot_bytes = streams, slots, slot_bytes
+        info, meta, data, _ = self._offsets(streams, slots, slot_bytes)
+        self.info = np.ndarray(streams, INFO, self.shm.buf, info)
+        self.meta = np.ndarray((streams, slots), META, self.shm.buf, meta)
+        self.data = np.ndarray((streams, slots, slot_bytes), np.uint8, self.shm.buf, data)
+        if create:
+            self.info[:] = 0
+            self.info["hold"] = -1
+            self.meta["seq"] = -1
+
+    @staticmethod
+    def _offsets(streams, slots, slot_bytes):
+        """Returns byte offsets of the stream info, slot metadata and slot data sections and the total block size."""
+        align = lambda x: math.ceil(x / 64) * 64  # cache line
+        info = align(HEADER.itemsize)
+        meta = align(info + streams * INFO.itemsize)
+        data = align(meta + streams * slots * META.itemsize)
+        return info, meta, data, data + streams * slots * slot_bytes
+
+    def slot(self, stream, shape):
+        """Marks the oldest slot of `stream` not held by the consumer as being written, returning a view of `shape`."""
+        k = int(self.info["next"][stream])
+        if k == self.info["hold"][stream] and self.slots > 1:
+            k = (k + 1) % self.slots
+        self.info["next"][stream] = k
+        self.meta[stream, k]["seq"] = -1  # readers of this slot are now invalid
+        n = math.prod(shape)
+        assert n <= self.slot_bytes, f"frame {shape} larger than {self.slot_bytes} byte slots"
+        return self.data[stream, k, :n].reshape(shape)
+
+    def publish(self, stream, shape, t=None):
+        """Publishes the slot returned by the last slot() call of `stream` with its frame `shape` and timestamp."""
+        head, k = int(self.info["head"][stream]), int(self.info["next"][stream])
+        h, w, c = (*shape, 1)[:3]
+        self.meta[stream, k] = (head, time.time() if t is None else t, stream, h, w, c)
+        self.info["next"][stream] = (k + 1) % self.slots
+        self.info["head"][stream] = head + 1
+
+    def write(self, stream, im, t=None):
+        """Copies HWC uint8 image `im` into the next slot of `stream` and publishes it."""
+        self.slot(stream, im.shape)[:] = im
+        self.publish(stream, im.shape, t)
+
+    def read(self, stream, hold=True):
+        """
+        Returns (zero-copy HWC view, metadata) of the newest published frame of `stream`, (None, None) if none.
+
+        With `hold` the producer skips the frame's slot until the next read, so the view stays valid until then.
+        """
+        for _ in range(3):  # retry if the producer wrapped around onto the slot while it was being held
+            k = int(self.meta[stream]["seq"].argmax())
+            m = self.meta[stream, k].copy()
+            if m["seq"] < 0:
+                return None, None
+            if hold:
+                self.info["hold"][stream] = k
+            if self.meta[stream, k]["seq"] == m["seq"]:
+                break
+        h, w, c = int(m["h"]), int(m["w"]), int(m["c"])
+        return self.data[stream, k, : h * w * c].reshape(h, w, c), m
+
+    def valid(self, stream, meta):
+        """Returns True if the frame read with `meta` has not been overwritten since."""
+        return (self.meta[stream]["seq"] == meta["seq"]).any()
+
+    def close(self):
+        """Detaches from the block, and removes it if this instance created it."""
+        self.info = self.meta = self.data = None  # release views of the buffer before closing it
+        try:
+            self.shm.close()
+        except BufferError:  # frames read from the ring are still referenced, the mapping is released with them
+            pass
+        if self.owner:
+            self.shm.unlink()
+            self.owner = False
+
+
+def capture(name, stream, source, vid_stride=1):
+    """
+    Capture process loop, decodes frames of video `source` straight into the slots of `stream` in FrameRing `name`.
+
+    Stream info is set to RUNNING with fps and frame count once the source opens, and to DONE or FAILED on exit.
+    """
+    ring = FrameRing(name)
+    info = ring.info[stream : stream + 1]  # view
+    info["pid"] = os.getpid()
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        info["state"] = FAILED
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS)  # warning: may return 0 or nan
+    info["frames"] = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0) or float("inf")  # infinite stream fallback
+    info["fps"] = max((fps if math.isfinite(fps) else 0) % 100, 0) or 30  # 30 FPS fallback
+    shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+    n = 0
+    while cap.isOpened() and n < info["frames"][0]:
+        n += 1
+        cap.grab()  # .read() = .grab() followed by .retrieve()
+        if n % vid_stride == 0:
+            out = ring.slot(stream, shape)
+            success, im = cap.retrieve(out)  # decodes straight into the slot if shapes match
+            if not success:
+                out[:] = 0
+                cap.open(source)  # re-open stream if signal was lost
+            elif im is not out:  # shape differs from the reported one, copy
+                shape = im.shape
+                ring.slot(stream, shape)[:] = im
+            ring.publish(stream, shape, time.time())
+            info["state"] = RUNNING
+        time.sleep(0.0)  # wait time
+    info["state"] = DONE
+    cap.release()
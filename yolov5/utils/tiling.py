@@ -0,0 +1,84 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Tiled (sliced) inference for high-resolution images.
+
+Each image is cut into overlapping model-sized tiles, optionally plus one letterboxed full-frame view, and all views are
+run as a single batch. Raw predictions are mapped back to original image pixels before one NMS pass per image, so boxes
+that appear in several tiles are merged by the usual non_max_suppression().
+
+Usage:
+    x, transforms, counts = tile_images([im0], tile=(640, 640), overlap=0.2, full=True)
+    pred = model(torch.from_numpy(x).float() / 255)
+    det = [non_max_suppression(p)[0] for p in merge_tiles(pred, transforms, counts)]  # boxes in im0 pixels
+"""
+
+import numpy as np
+import torch
+
+from utils.augmentations import letterbox
+
+
+def tile_windows(shape, tile=(640, 640), overlap=0.2):
+    """Returns an (n, 4) array of xyxy tile windows covering an image of `shape` (h, w), with fractional `overlap`."""
+    assert 0 <= overlap < 1, f"tile overlap {overlap} must be in [0, 1)"
+
+    def starts(size, t):
+        """Tile start offsets along one axis, the last tile aligned to the image edge."""
+        if size <= t:
+            return [0]  # single padded tile
+        step = max(int(t * (1 - overlap)), 1)
+        return [*range(0, size - t, step), size - t]
+
+    (h, w), (th, tw) = shape[:2], tile
+    return np.array([(x, y, x + tw, y + th) for y in starts(h, th) for x in starts(w, tw)], dtype=int)
+
+
+def tile_images(ims, tile=(640, 640), overlap=0.2, full=False, bgr2rgb=True):
+    """
+    Cuts HWC uint8 images into a single BCHW uint8 batch of overlapping tiles.
+
+    Args:
+        ims (list[np.ndarray]): HWC uint8 images.
+        tile (tuple[int, int]): Tile (height, width), also the model input size.
+        overlap (float): Fractional overlap between neighbouring tiles.
+        full (bool): Also add a letterboxed full-frame view of each image, for objects larger than a tile.
+        bgr2rgb (bool): Reverse channels, i.e. for OpenCV BGR inputs.
+
+    Returns:
+        (np.ndarray): (n, 3, th, tw) uint8 batch of all views of all images.
+        (np.ndarray): (n, 3) float32 [gain, pad_x, pad_y] per view, mapping view pixels to image pixels.
+        (list[int]): Number of views per image.
+    """
+    th, tw = tile
+    x, transforms, counts = [], [], []
+    for im in ims:
+        windows = tile_windows(im.shape, tile, overlap)
+        for x1, y1, x2, y2 in windows:
+            crop = im[y1:y2, x1:x2]
+            if crop.shape[:2] != (th, tw):  # image smaller than tile, pad bottom-right
+                crop = np.pad(crop, ((0, th - crop.shape[0]), (0, tw - crop.shape[1]), (0, 0)), constant_values=114)
+            x.append(crop)
+            transforms.append((1, -x1, -y1))
+        if full:
+            crop, ratio, (dw, dh) = letterbox(im, tile, auto=False)
+            x.append(crop)
+            transforms.append((ratio[0], dw, dh))
+        counts.append(len(windows) + full)
+    x = np.stack(x).transpose((0, 3, 1, 2))  # BHWC to BCHW
+    x = np.ascontiguousarray(x[:, ::-1] if bgr2rgb else x)
+    return x, np.array(transforms, dtype=np.float32), counts
+
+
+def merge_tiles(pred, transforms, counts):
+    """
+    Maps raw (n, anchors, 5 + nc) tile predictions to image pixels and concatenates the views of each image.
+
+    Returns a list of (1, count * anchors, 5 + nc) tensors, one per image, ready for non_max_suppression().
+    """
+    if isinstance(pred, (list, tuple)):  # (inference_out, ...) outputs
+        pred = pred[0]
+    t = torch.as_tensor(transforms, device=pred.device, dtype=pred.dtype)[:, None]  # (n, 1, 3)
+    xy = (pred[..., :2] - t[..., 1:]) / t[..., :1]  # xy center
+    wh = pred[..., 2:4] / t[..., :1]
+    pred = torch.cat((xy, wh, pred[..., 4:]), 2)
+    return [x.flatten(0, 1)[None] for x in pred.split(counts)]
@@ -43,6 +43,12 @@ def smart_inference_mode(torch_1_9=check_version(torch.__version__, "1.9.0")):
     return decorate
 
 
+def is_compiling():
+    """Returns True while torch.compile() traces the calling code, always False on torch<2.3."""
+    compiler = getattr(torch, "compiler", None)
+    return bool(compiler and hasattr(compiler, "is_compiling") and compiler.is_compiling())
+
+
 def smartCrossEntropyLoss(label_smoothing=0.0):
     """Returns a CrossEntropyLoss with optional label smoothing for torch>=1.10.0; warns if smoothing on lower
     versions.
@@ -0,0 +1,172 @@
+# Ultralytics YOLOv5 🚀, AGPL-3.0 license
+"""
+Lightweight IoU + Kalman multi-object tracker for detect-then-track video inference.
+
+The detector runs every K frames and Tracker.update() associates its boxes with existing tracks. In between,
+Tracker.predict() propagates the tracks with a constant-velocity Kalman filter, so boxes keep moving without a forward
+pass. Persistent track ids make it possible to count unique objects instead of per-frame boxes.
+
+Usage:
+    tracker = Tracker()
+    tracks = tracker.update(det)  # (n, 7) [xyxy, conf, cls, id] on detection frames, det is (n, 6) [xyxy, conf, cls]
+    tracks = tracker.predict()  # (n, 7) propagated boxes on frames in between
+    LOGGER.info(tracker.summary(names))
+"""
+
+from collections import Counter
+
+import numpy as np
+
+
+def box_iou(box1, box2, eps=1e-7):
+    """Returns the (n, m) IoU matrix of two sets of xyxy boxes (n, 4) and (m, 4), as NumPy arrays."""
+    (a1, a2), (b1, b2) = np.split(box1[:, None], 2, 2), np.split(box2[None], 2, 2)
+    inter = (np.minimum(a2, b2) - np.maximum(a1, b1)).clip(0).prod(2)
+    return inter / ((a2 - a1).prod(2) + (b2 - b1).prod(2) - inter + eps)
+
+
+class KalmanBox:
+    """Constant-velocity Kalman filter on box center, width and height, with noise scaled to the box size."""
+
+    std_pos = 1 / 20  # position noise, fraction of box height
+    std_vel = 1 / 160  # velocity noise, fraction of box height
+
+    def __init__(self, xyxy):
+        """Initializes the state [cx, cy, w, h, vx, vy, vw, vh] from an xyxy box, with zero velocity."""
+        self.F = np.eye(8)  # state transition, one frame
+        self.F[:4, 4:] = np.eye(4)
+        self.H = np.eye(4, 8)  # measurement function
+        self.x = np.r_[self.xywh(xyxy), np.zeros(4)]
+        h = self.x[3]
+        self.P = np.diag(np.r_[[2 * self.std_pos * h] * 4, [10 * self.std_vel * h] * 4] ** 2)  # covariance
+
+    @staticmethod
+    def xywh(xyxy):
+        """Converts an xyxy box to [cx, cy, w, h]."""
+        return np.r_[(xyxy[:2] + xyxy[2:4]) / 2, xyxy[2:4] - xyxy[:2]]
+
+    @property
+    def xyxy(self):
+        """Returns the current state as an xyxy box."""
+        cxcy, wh = self.x[:2], self.x[2:4].clip(1)
+        return np.r_[cxcy - wh / 2, cxcy + wh / 2]
+
+    def predict(self):
+        """Advances the state by one frame."""
+        h = self.x[3]
+        Q = np.diag(np.r_[[self.std_pos * h] * 4, [self.std_vel * h] * 4] ** 2)
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + Q
+
+    def update(self, xyxy):
+        """Corrects the state with a measured xyxy box."""
+        R = np.diag([self.std_pos * self.x[3]] * 4) ** 2
+        S = self.H @ self.P @ self.H.T + R
+        K = self.P @ self.H.T @ np.linalg.inv(S)  # Kalman gain
+        self.x = self.x + K @ (self.xywh(xyxy) - self.H @ self.x)
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+
+
+class Track:
+    """A single tracked object with a persistent id."""
+
+    def __init__(self, det, id):
+        """Starts a track from an (6,) [xyxy, conf, cls] detection."""
+        self.kf = KalmanBox(det[:4])
+        self.conf, self.cls, self.id = det[4], det[5], id
+        self.hits = 1  # detections matched
+        self.misses = 0  # consecutive detection updates without a match
+        self.age = 0  # frames since last matched detection
+
+    def predict(self):
+        """Advances the track by one frame."""
+        self.kf.predict()
+        self.age += 1
+
+    def update(self, det):
+        """Corrects the track with a matched detection."""
+        self.kf.update(det[:4])
+        self.conf, self.cls = det[4], det[5]
+        self.hits += 1
+        self.misses = self.age = 0
+
+    def result(self, box=None):
+        """Returns the (7,) [xyxy, conf, cls, id] output row, with the filtered box unless `box` is given."""
+        return np.r_[self.kf.xyxy if box is None else box, self.conf, self.cls, self.id]
+
+
+class Tracker:
+    """
+    IoU + Kalman tracker assigning persistent ids to YOLOv5 detections.
+
+    Detections are matched to the predicted track boxes of the same class by maximum total IoU (Hungarian assignment).
+    Unmatched detections start new tracks, and tracks without a match for more than `max_age` frames are dropped. A track
+    is counted as a unique object once it has been matched `min_hits` times.
+    """
+
+    def __init__(self, iou_thres=0.3, max_age=30, min_hits=2):
+        """
+        Initializes the tracker.
+
+        Args:
+            iou_thres (float): Minimum IoU between a predicted track box and a detection to match them.
+            max_age (int): Frames a track survives without a matched detection.
+            min_hits (int): Matched detections before a track is counted as a unique object.
+        """
+        self.iou_thres = iou_thres
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.tracks = []
+        self.next_id = 1
+        self.counted = {}  # id -> class of tracks counted as unique objects
+
+    def _step(self):
+        """Advances all tracks by one frame and drops tracks older than `max_age`."""
+        for t in self.tracks:
+            t.predict()
+        self.tracks = [t for t in self.tracks if t.age <= self.max_age]
+
+    def predict(self):
+        """Propagates tracks to the next frame without detections, returning (n, 7) [xyxy, conf, cls, id] rows for the
+        tracks matched at the last detection update.
+        """
+        self._step()
+        return np.array([t.result() for t in self.tracks if not t.misses]).reshape(-1, 7)
+
+    def update(self, det):
+        """Associates (n, 6) [xyxy, conf, cls] detections with tracks, returning them as (n, 7) [xyxy, conf, cls, id]."""
+        from scipy.optimize import linear_sum_assignment  # scoped for faster 'import utils.tracker'
+
+        self._step()
+        det = np.asarray(det, dtype=np.float64).reshape(-1, 6)
+        matches, ids = [], np.zeros(len(det))
+        if self.tracks and len(det):
+            boxes = np.stack([t.kf.xyxy for t in self.tracks])
+            iou = box_iou(boxes, det[:, :4])
+            iou[np.array([t.cls for t in self.tracks])[:, None] != det[None, :, 5]] = 0  # same class only
+            matches = [(i, j) for i, j in zip(*linear_sum_assignment(-iou)) if iou[i, j] >= self.iou_thres]
+
+        matched = set()
+        for i, j in matches:
+            t = self.tracks[i]
+            t.update(det[j])
+            ids[j] = t.id
+            matched.add(i)
+            if t.hits >= self.min_hits:
+                self.counted[t.id] = int(t.cls)
+        for i, t in enumerate(self.tracks):
+            if i not in matched:
+                t.misses += 1
+        for j in set(range(len(det))) - {j for _, j in matches}:  # new tracks
+            self.tracks.append(Track(det[j], self.next_id))
+            ids[j] = self.next_id
+            if self.min_hits <= 1:
+                self.counted[self.next_id] = int(det[j, 5])
+            self.next_id += 1
+        return np.concatenate((det, ids[:, None]), 1)
+
+    def summary(self, names=None):
+        """Returns a string with the number of unique objects counted, per class."""
+        n = Counter(self.counted.values())
+        s = ", ".join(f"{v} {names[k] if names else k}{'s' * (v > 1)}" for k, v in sorted(n.items()))
+        return f"{len(self.counted)} unique objects tracked{': ' + s if s else ''}"
@@ -36,7 +36,9 @@ if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))  # add ROOT to PATH
 ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
-from models.common import DetectMultiBackend
+from models.common import Cascade, DetectMultiBackend, parse_ort, parse_shapes
+from models.experimental import Ensemble
+from models.yolo import Detect
 from utils.callbacks import Callbacks
 from utils.dataloaders import create_dataloader
 from utils.general import (
@@ -57,7 +59,6 @@ from utils.general import (
     xyxy2xywh,
 )
 from utils.metrics import ConfusionMatrix, ap_per_class, box_iou
-from utils.plots import output_to_target, plot_images, plot_val_study
 from utils.torch_utils import select_device, smart_inference_mode
 
 
@@ -208,6 +209,15 @@ def run(
     exist_ok=False,  # existing project/name ok, do not increment
     half=True,  # use FP16 half-precision inference
     dnn=False,  # use OpenCV DNN for ONNX inference
+    ensemble="sequential",  # run multi-weight ensemble members 'sequential' or concurrently in 'thread's
+    cascade=False,  # run multiple weights as a cascade, escalating uncertain images to the next model
+    cascade_rule="max_conf",  # cascade escalation rule, 'max_conf' or 'count'
+    cascade_band=(0.25, 0.6),  # cascade uncertainty band [low, high) of detection confidence
+    ort=None,  # ONNX Runtime session options dict, i.e. {'threads': 4, 'cache': True}
+    compile_cache=None,  # directory caching compiled TorchScript and OpenVINO models across runs
+    memory_format=None,  # PyTorch/TorchScript input memory format, i.e. 'channels_last'
+    autocast=None,  # PyTorch/TorchScript autocast dtype, i.e. 'bfloat16' on CPU
+    compile_shapes=None,  # torch.compile() PyTorch models for these shape buckets, i.e. [320, 640, (384, 640)]
     model=None,
     dataloader=None,
     save_dir=Path(""),
@@ -243,6 +253,24 @@ def run(
         exist_ok (bool, optional): Overwrite existing project/name without incrementing. Default is False.
         half (bool, optional): Use FP16 half-precision inference. Default is True.
         dnn (bool, optional): Use OpenCV DNN for ONNX inference. Default is False.
+        ensemble (str, optional): Execution strategy for multiple weights, 'sequential' or 'thread'. Default is
+            'sequential'.
+        cascade (bool, optional): Run multiple weights as a models.common.Cascade, smallest first, escalating images with
+            uncertain detections to the next model. Default is False.
+        cascade_rule (str, optional): Cascade escalation rule, 'max_conf' or 'count'. Default is 'max_conf'.
+        cascade_band (tuple[float, float], optional): Cascade uncertainty band [low, high) of detection confidence.
+            Default is (0.25, 0.6).
+        ort (dict, optional): ONNX Runtime session options for *.onnx weights, see models.common.ORT_OPTIONS.
+            Default is None.
+        compile_cache (str, optional): Directory caching frozen TorchScript modules and OpenVINO compiled models across
+            runs. Default is None.
+        memory_format (str, optional): PyTorch and TorchScript input memory format, 'channels_last' for faster CPU
+            convolutions. Default is None.
+        autocast (str, optional): PyTorch and TorchScript autocast dtype, i.e. 'bfloat16' on CPUs with AVX512-BF16 or
+            AMX. Default is None.
+        compile_shapes (list, optional): Input shape buckets, square sizes or (h, w), to run PyTorch models with
+            torch.compile(), compiled on warmup. Batches are padded to the smallest bucket they fit and larger batches
+            run eagerly. Default is None.
         model (torch.nn.Module, optional): Model object for training. Default is None.
         dataloader (torch.utils.data.DataLoader, optional): Dataloader object. Default is None.
         save_dir (Path, optional): Directory to save results. Default is Path('').
@@ -267,7 +295,28 @@ def run(
         (save_dir / "labels" if save_txt else save_dir).mkdir(parents=True, exist_ok=True)  # make dir
 
         # Load model
-        model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
+        if cascade:
+            model = Cascade(weights, device=device, dnn=dnn, data=data, fp16=half, rule=cascade_rule, band=cascade_band)
+            model.conf, model.iou, model.multi_label, model.agnostic, model.max_det = (
+                conf_thres,
+                iou_thres,
+                True,
+                single_cls,
+                max_det,
+            )
+        else:
+            model = DetectMultiBackend(
+                weights,
+                device=device,
+                dnn=dnn,
+                data=data,
+                fp16=half,
+                ort=ort,
+                compile_cache=compile_cache,
+                memory_format=memory_format,
+                autocast=autocast,
+                compile_shapes=compile_shapes,
+            )
         stride, pt, jit, engine = model.stride, model.pt, model.jit, model.engine
         imgsz = check_img_size(imgsz, s=stride)  # check image size
         half = model.fp16  # FP16 supported on limited backends with CUDA
@@ -292,13 +341,19 @@ def run(
 
     # Dataloader
     if not training:
-        if pt and not single_cls:  # check --weights are trained on --data
+        if pt and not (single_cls or cascade):  # check --weights are trained on --data
             ncm = model.model.nc
             assert ncm == nc, (
                 f"{weights} ({ncm} classes) trained on different --data than what you passed ({nc} "
                 f"classes). Pass correct combination of --weights and --data that are trained together."
             )
-        model.warmup(imgsz=(1 if pt else batch_size, 3, imgsz, imgsz))  # warmup
+        if pt and not (augment or cascade or compile_shapes):  # decode only candidate rows above conf_thres in Detect()
+            for m in model.model.modules():
+                if type(m) is Detect:
+                    m.conf_thres = conf_thres
+        if isinstance(getattr(model, "model", None), Ensemble):
+            model.model.strategy = ensemble
+        model.warmup(imgsz=(1 if pt and not compile_shapes else batch_size, 3, imgsz, imgsz))  # warmup
         pad, rect = (0.0, False) if task == "speed" else (0.5, pt)  # square inference for benchmarks
         task = task if task in ("train", "val", "test") else "val"  # path to train/val/test images
         dataloader = create_dataloader(
@@ -349,7 +404,14 @@ def run(
         lb = [targets[targets[:, 0] == i, 1:] for i in range(nb)] if save_hybrid else []  # for autolabelling
         with dt[2]:
             preds = non_max_suppression(
-                preds, conf_thres, iou_thres, labels=lb, multi_label=True, agnostic=single_cls, max_det=max_det
+                preds,
+                conf_thres,
+                iou_thres,
+                labels=lb,
+                multi_label=True,
+                agnostic=single_cls,
+                max_det=max_det,
+                end2end=not training and model.end2end,
             )
 
         # Metrics
@@ -393,6 +455,8 @@ def run(
 
         # Plot images
         if plots and batch_i < 3:
+            from utils.plots import output_to_target, plot_images  # scoped for faster 'import val'
+
             plot_images(im, targets, paths, save_dir / f"val_batch{batch_i}_labels.jpg", names)  # labels
             plot_images(im, output_to_target(preds), paths, save_dir / f"val_batch{batch_i}_pred.jpg", names)  # pred
 
@@ -421,7 +485,16 @@ def run(
     t = tuple(x.t / seen * 1e3 for x in dt)  # speeds per image
     if not training:
         shape = (batch_size, 3, imgsz, imgsz)
-        LOGGER.info(f"Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS per image at shape {shape}" % t)
+        modes = memory_format, autocast, "torch.compile" if compile_shapes else None
+        mode = ", ".join(str(x) for x in modes if x)  # CPU inference modes
+        LOGGER.info(
+            f"Speed: %.1fms pre-process, %.1fms inference, %.1fms NMS per image at shape {shape}" % t
+            + (f" ({mode})" if mode else "")
+        )
+        if isinstance(getattr(model, "model", None), Ensemble):
+            LOGGER.info(model.model.summary())
+        if cascade:
+            LOGGER.info(model.summary())
 
     # Plots
     if plots:
@@ -479,7 +552,7 @@ def parse_opt():
         conf_thres (float, optional): Confidence threshold for predictions. Default is 0.001.
         iou_thres (float, optional): IoU threshold for Non-Max Suppression (NMS). Default is 0.6.
         max_det (int, optional): Maximum number of detections per image. Default is 300.
-        task (str, optional): Task type - options are 'train', 'val', 'test', 'speed', or 'study'. Default is 'val'.
+        task (str, optional): Task type - options are 'train', 'val', 'test', 'speed', 'study', or 'cascade'. Default is 'val'.
         device (str, optional): Device to run the model on. e.g., '0' or '0,1,2,3' or 'cpu'. Default is empty to let the system choose automatically.
         workers (int, optional): Maximum number of dataloader workers per rank in DDP mode. Default is 8.
         single_cls (bool, optional): If set, treats the dataset as a single-class dataset. Default is False.
@@ -494,6 +567,20 @@ def parse_opt():
         exist_ok (bool, optional): If set, existing directory will not be incremented. Default is False.
         half (bool, optional): If set, uses FP16 half-precision inference. Default is False.
         dnn (bool, optional): If set, uses OpenCV DNN for ONNX inference. Default is False.
+        ensemble (str, optional): Execution strategy for multiple weights, 'sequential' or 'thread'. Default is
+            'sequential'.
+        cascade (bool, optional): If set, runs multiple weights as a cascade, smallest first. Default is False.
+        cascade_rule (str, optional): Cascade escalation rule, 'max_conf' or 'count'. Default is 'max_conf'.
+        cascade_band (list[float], optional): Cascade uncertainty band [low, high) of detection confidence. Default is
+            [0.25, 0.6].
+        ort (list[str], optional): ONNX Runtime options as KEY=VALUE, i.e. 'threads=4 opt=all cache=1', parsed to a
+            dict. Default is None.
+        compile_cache (str, optional): Directory caching compiled TorchScript and OpenVINO models across runs. Default
+            is None.
+        memory_format (str, optional): PyTorch and TorchScript input memory format, 'channels_last'. Default is None.
+        autocast (str, optional): PyTorch and TorchScript autocast dtype, 'bfloat16' or 'float16'. Default is None.
+        compile (list[str], optional): torch.compile() PyTorch models for shape buckets, SIZE or HxW, i.e.
+            '320 640 384x640', default buckets if none given. Default is None.
 
     Returns:
         argparse.Namespace: Parsed command-line options.
@@ -504,6 +591,10 @@ def parse_opt():
         - Args are printed using `print_args` to facilitate debugging.
 
     Example:
+        To compare a cascade with its stages, reporting mAP and latency deltas:
+        ```python
+        $ python val.py --task cascade --weights yolov5n.pt yolov5s.pt --data coco128.yaml --cascade-band 0.25 0.6
+        ```
         To validate a trained YOLOv5 model on a COCO dataset:
         ```python
         $ python val.py --weights yolov5s.pt --data coco128.yaml --img 640
@@ -522,7 +613,7 @@ def parse_opt():
     parser.add_argument("--conf-thres", type=float, default=0.001, help="confidence threshold")
     parser.add_argument("--iou-thres", type=float, default=0.6, help="NMS IoU threshold")
     parser.add_argument("--max-det", type=int, default=300, help="maximum detections per image")
-    parser.add_argument("--task", default="val", help="train, val, test, speed or study")
+    parser.add_argument("--task", default="val", help="train, val, test, speed, study or cascade")
     parser.add_argument("--device", default="", help="cuda device, i.e. 0 or 0,1,2,3 or cpu")
     parser.add_argument("--workers", type=int, default=8, help="max dataloader workers (per RANK in DDP mode)")
     parser.add_argument("--single-cls", action="store_true", help="treat as single-class dataset")
@@ -537,7 +628,18 @@ def parse_opt():
     parser.add_argument("--exist-ok", action="store_true", help="existing project/name ok, do not increment")
     parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
     parser.add_argument("--dnn", action="store_true", help="use OpenCV DNN for ONNX inference")
+    parser.add_argument("--ensemble", default="sequential", choices=["sequential", "thread"], help="ensemble strategy")
+    parser.add_argument("--cascade", action="store_true", help="run --weights as a cascade, smallest first")
+    parser.add_argument("--cascade-rule", default="max_conf", choices=["max_conf", "count"], help="escalation rule")
+    parser.add_argument("--cascade-band", nargs=2, type=float, default=[0.25, 0.6], help="uncertain conf [low, high)")
+    parser.add_argument("--ort", nargs="+", metavar="KEY=VALUE", help="ONNX Runtime options, i.e. threads=4 cache=1")
+    parser.add_argument("--compile-cache", type=str, default=None, help="compiled TorchScript/OpenVINO model cache dir")
+    parser.add_argument("--memory-format", choices=["channels_last"], default=None, help="PyTorch input memory format")
+    parser.add_argument("--autocast", choices=["bfloat16", "float16"], default=None, help="PyTorch autocast dtype")
+    parser.add_argument("--compile", nargs="*", dest="compile_shapes", metavar="SHAPE", help="torch.compile() buckets")
     opt = parser.parse_args()
+    opt.ort = parse_ort(opt.ort)
+    opt.compile_shapes = parse_shapes(opt.compile_shapes)
     opt.data = check_yaml(opt.data)  # check YAML
     opt.save_json |= opt.data.endswith("coco.yaml")
     opt.save_txt |= opt.save_hybrid
@@ -594,9 +696,22 @@ def main(opt):
                     y.append(r + t)  # results and times
                 np.savetxt(f, y, fmt="%10.4g")  # save
             subprocess.run(["zip", "-r", "study.zip", "study_*.txt"])
+            from utils.plots import plot_val_study  # scoped for faster 'import val'
+
             plot_val_study(x=x)  # plot
+        elif opt.task == "cascade":  # cascade vs. stand-alone stages, mAP and latency
+            # python val.py --task cascade --data coco.yaml --weights yolov5n.pt yolov5s.pt --cascade-band 0.25 0.6
+            opt.task, results = "val", []
+            for opt.weights, opt.cascade in [*((w, False) for w in weights), (weights, True)]:
+                r, _, t = run(**vars(opt), plots=False)
+                results.append((r[2], r[3], sum(t)))  # mAP50, mAP50-95, ms/img
+            LOGGER.info(("\n" + "%30s" + "%11s" * 3) % ("Model", "mAP50", "mAP50-95", "ms/img"))
+            for w, (map50, map, t) in zip([*(Path(w).name for w in weights), "cascade"], results):
+                LOGGER.info(("%30s" + "%11.4g" * 3) % (w, map50, map, t))
+            (_, map, t), (_, map_c, t_c) = results[-2:]  # final stage, cascade
+            LOGGER.info(f"Cascade vs {Path(weights[-1]).name}: mAP50-95 {map_c - map:+.4f}, {t_c - t:+.1f}ms/img")
         else:
-            raise NotImplementedError(f'--task {opt.task} not in ("train", "val", "test", "speed", "study")')
+            raise NotImplementedError(f'--task {opt.task} not in ("train", "val", "test", "speed", "study", "cascade")')
 
 
 if __name__ == "__main__":